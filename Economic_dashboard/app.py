@@ -1,15 +1,25 @@
-from flask import Flask, render_template_string, jsonify
-import plotly.graph_objs as go
-import plotly.utils
-import pandas as pd
-import numpy as np
+import click
+from flask import Flask, jsonify, request, Response
 from datetime import datetime, timedelta
 import json
 import random
 import logging
-import requests
 from threading import Thread
 import time
+import os
+
+import chart_specs
+from compression import Compress, compress_stream
+from data_provider import SimpleCountryDataProvider, countries_cache
+from derived_indicators import DerivedIndicatorsCache
+from events import EventBroker, format_event
+from export import EXPORT_FORMATS, DataExport, parquet_available
+from figure_cache import CachedPayload, FigureCache
+from metrics import instrument_app, registry as metrics_registry, serialize_seconds
+from refresh import start_background_refresh
+from snapshot_file import attach_shared_snapshot
+from static_build import build_static, prune_assets
+from timeseries import format_dates, parse_date
 
 # Встроенный HTML шаблон
 EMBEDDED_HTML = '''
@@ -353,9 +363,7 @@ EMBEDDED_HTML = '''
                 updateStatusIndicator('warning');
 
                 await Promise.all([
-                    loadCountrySummaryStats(countryCode),
-                    loadCountryCharts(countryCode),
-                    loadCountryInfo(countryCode),
+                    loadCountryBundle(countryCode),
                     loadCountriesComparison()
                 ]);
 
@@ -371,11 +379,22 @@ EMBEDDED_HTML = '''
             }
         }
 
-        async function loadCountrySummaryStats(countryCode) {
-            try {
-                const response = await fetch('/api/country-stats/' + countryCode);
-                const data = await response.json();
+        async function loadCountryBundle(countryCode) {
+            const response = await fetch('/api/country-bundle/' + countryCode);
+            if (!response.ok) {
+                throw new Error('HTTP ' + response.status);
+            }
+            const bundle = await response.json();
+
+            renderCountrySummaryStats(bundle.stats);
+            renderCountryInfo(bundle.info);
+            renderChart('gdp-chart', bundle.figures.gdp, 'данных ВВП');
+            renderChart('economic-indicators-chart', bundle.figures.indicators, 'экономических индикаторов');
+            renderChart('gdp-per-capita-chart', bundle.figures.gdp_per_capita, 'ВВП на душу населения');
+        }
 
+        function renderCountrySummaryStats(data) {
+            try {
                 // ВВП
                 if (data.gdp && data.gdp.current !== 'Н/Д') {
                     document.getElementById('gdp-value').textContent = data.gdp.current;
@@ -434,19 +453,8 @@ EMBEDDED_HTML = '''
             }
         }
 
-        async function loadCountryCharts(countryCode) {
-            await Promise.all([
-                loadChart('/api/country-gdp/' + countryCode, 'gdp-chart', 'данных ВВП'),
-                loadChart('/api/country-indicators/' + countryCode, 'economic-indicators-chart', 'экономических индикаторов'),
-                loadChart('/api/country-gdp-per-capita/' + countryCode, 'gdp-per-capita-chart', 'ВВП на душу населения')
-            ]);
-        }
-
-        async function loadCountryInfo(countryCode) {
+        function renderCountryInfo(data) {
             try {
-                const response = await fetch('/api/country-info/' + countryCode);
-                const data = await response.json();
-
                 if (data.country_info) {
                     const info = data.country_info;
                     document.getElementById('country-capital').textContent = info.capital || '-';
@@ -487,13 +495,26 @@ EMBEDDED_HTML = '''
                     throw new Error('HTTP ' + response.status);
                 }
                 const plotData = await response.json();
-                Plotly.newPlot(elementId, plotData.data, plotData.layout, plotConfig);
+                renderChart(elementId, plotData, errorMessage);
             } catch (error) {
                 console.error('Ошибка загрузки ' + errorMessage + ':', error);
-                document.getElementById(elementId).innerHTML = '<div class="loading">⚠️ Ошибка загрузки ' + errorMessage + '<br><small>Проверьте подключение к интернету</small></div>';
+                showChartError(elementId, errorMessage);
             }
         }
 
+        function renderChart(elementId, plotData, errorMessage) {
+            try {
+                Plotly.newPlot(elementId, plotData.data, plotData.layout, plotConfig);
+            } catch (error) {
+                console.error('Ошибка отрисовки ' + errorMessage + ':', error);
+                showChartError(elementId, errorMessage);
+            }
+        }
+
+        function showChartError(elementId, errorMessage) {
+            document.getElementById(elementId).innerHTML = '<div class="loading">⚠️ Ошибка загрузки ' + errorMessage + '<br><small>Проверьте подключение к интернету</small></div>';
+        }
+
         function refreshCurrentCountry() {
             const refreshBtn = document.querySelector('.refresh-btn');
             refreshBtn.style.transform = 'rotate(360deg)';
@@ -503,15 +524,59 @@ EMBEDDED_HTML = '''
             loadCountryData(currentCountry);
         }
 
-        // Автоматическое обновление каждые 20 минут
-        setInterval(() => {
-            loadCountryData(currentCountry);
-        }, 1200000);
+        // Обновление по событиям сервера: перезагружаются только графики,
+        // данные которых изменились
+        let dataVersion = null;
+        const pendingReloads = {};
+
+        function scheduleReload(key, reload) {
+            clearTimeout(pendingReloads[key]);
+            pendingReloads[key] = setTimeout(() => {
+                delete pendingReloads[key];
+                reload();
+            }, 300);
+        }
+
+        function connectDataEvents() {
+            if (!window.EventSource) {
+                // Старые браузеры: обновление каждые 20 минут
+                setInterval(() => loadCountryData(currentCountry), 1200000);
+                return;
+            }
+
+            const events = new EventSource('/api/events');
+
+            events.addEventListener('hello', (event) => {
+                const data = JSON.parse(event.data);
+                // Переподключение после обрыва: изменения могли быть пропущены
+                if (dataVersion !== null && data.version !== dataVersion) {
+                    scheduleReload('all', () => loadCountryData(currentCountry));
+                }
+                dataVersion = data.version;
+            });
+
+            events.addEventListener('data-changed', (event) => {
+                const data = JSON.parse(event.data);
+                dataVersion = Math.max(dataVersion || 0, data.version);
+                if (data.country === currentCountry) {
+                    scheduleReload('country', () => loadCountryBundle(currentCountry).catch(error => {
+                        console.error('Ошибка обновления данных страны:', error);
+                    }));
+                }
+                scheduleReload('comparison', loadCountriesComparison);
+                document.getElementById('last-update').textContent = new Date().toLocaleString('ru-RU');
+            });
+
+            events.addEventListener('resync', () => {
+                scheduleReload('all', () => loadCountryData(currentCountry));
+            });
+        }
 
         // Загрузка данных при старте
         document.addEventListener('DOMContentLoaded', () => {
             showNotification('Инициализация панели...', 'info');
             loadCountryData('USA');
+            connectDataEvents();
         });
 
         // Обработка изменения размера окна
@@ -528,393 +593,480 @@ EMBEDDED_HTML = '''
 '''
 
 app = Flask(__name__)
+# Метрики подключаются первыми: их after_request выполняется последним и учитывает сжатие
+instrument_app(app)
+compress = Compress(app)
+
+# Способ построения графиков: 'spec' (шаблоны-словари) или 'plotly' (объекты go.Figure),
+# для отдельных эндпоинтов: DASHBOARD_CHART_BUILDERS="country-gdp=plotly,countries-comparison=spec".
+# Plotly импортируется только при первом построении графика способом 'plotly'
+app.config['CHART_BUILDER'] = os.environ.get('DASHBOARD_CHART_BUILDER', 'spec')
+app.config['CHART_BUILDERS'] = dict(
+    item.split('=', 1) for item in os.environ.get('DASHBOARD_CHART_BUILDERS', '').split(',') if '=' in item
+)
+# Предел точек временного ряда в графике (по умолчанию и для параметра max_points)
+app.config['CHART_MAX_POINTS'] = int(os.environ.get('DASHBOARD_CHART_MAX_POINTS', 500))
+app.config['CHART_MAX_POINTS_LIMIT'] = int(os.environ.get('DASHBOARD_CHART_MAX_POINTS_LIMIT', 5000))
+# Записей в кэше ответов с параметрами запроса (окно ряда, выбор стран)
+app.config['QUERY_CACHE_ENTRIES'] = int(os.environ.get('DASHBOARD_QUERY_CACHE_ENTRIES', 64))
+# Строк в одном фрагменте потоковой выгрузки /api/export
+app.config['EXPORT_CHUNK_ROWS'] = int(os.environ.get('DASHBOARD_EXPORT_CHUNK_ROWS', 5000))
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Глобальное хранилище данных по странам
-countries_cache = {}
-
-
-class SimpleCountryDataProvider:
-    """Упрощенный провайдер данных с надежными резервными значениями"""
-
-    def __init__(self):
-        # Информация о странах
-        self.countries_info = {
-            'USA': {
-                'name': 'США', 'capital': 'Вашингтон', 'region': 'Северная Америка',
-                'income_level': 'Высокий доход', 'currency': 'Доллар США (USD)'
-            },
-            'RUS': {
-                'name': 'Россия', 'capital': 'Москва', 'region': 'Европа и Центральная Азия',
-                'income_level': 'Доход выше среднего', 'currency': 'Российский рубль (RUB)'
-            },
-            'CHN': {
-                'name': 'Китай', 'capital': 'Пекин', 'region': 'Восточная Азия и Тихий океан',
-                'income_level': 'Доход выше среднего', 'currency': 'Китайский юань (CNY)'
-            },
-            'DEU': {
-                'name': 'Германия', 'capital': 'Берлин', 'region': 'Европа и Центральная Азия',
-                'income_level': 'Высокий доход', 'currency': 'Евро (EUR)'
-            },
-            'GBR': {
-                'name': 'Великобритания', 'capital': 'Лондон', 'region': 'Европа и Центральная Азия',
-                'income_level': 'Высокий доход', 'currency': 'Фунт стерлингов (GBP)'
-            },
-            'JPN': {
-                'name': 'Япония', 'capital': 'Токио', 'region': 'Восточная Азия и Тихий океан',
-                'income_level': 'Высокий доход', 'currency': 'Японская иена (JPY)'
-            },
-            'FRA': {
-                'name': 'Франция', 'capital': 'Париж', 'region': 'Европа и Центральная Азия',
-                'income_level': 'Высокий доход', 'currency': 'Евро (EUR)'
-            },
-            'IND': {
-                'name': 'Индия', 'capital': 'Нью-Дели', 'region': 'Южная Азия',
-                'income_level': 'Доход ниже среднего', 'currency': 'Индийская рупия (INR)'
-            }
-        }
+# Ответы с долей в мировом ВВП и местами в рейтингах зависят от данных всех стран:
+# их версия - версия снимка, а не страны
+SNAPSHOT_ENDPOINTS = ('derived', 'country-bundle')
 
-        # Надежные данные основанные на реальной статистике 2024
-        self.country_data = {
-            'USA': {
-                'gdp_data': [
-                    {'year': 2020, 'gdp_trillion': 20.95},
-                    {'year': 2021, 'gdp_trillion': 23.32},
-                    {'year': 2022, 'gdp_trillion': 25.46},
-                    {'year': 2023, 'gdp_trillion': 26.85},
-                    {'year': 2024, 'gdp_trillion': 27.36}
-                ],
-                'gdp_per_capita': 82400,
-                'inflation': 3.2,
-                'unemployment': 3.7,
-                'population': 331.9,
-                'gdp_rank': 1,
-                'gdp_per_capita_rank': 8,
-                'world_gdp_share': '24.7%'
-            },
-            'RUS': {
-                'gdp_data': [
-                    {'year': 2020, 'gdp_trillion': 1.48},
-                    {'year': 2021, 'gdp_trillion': 1.78},
-                    {'year': 2022, 'gdp_trillion': 2.24},
-                    {'year': 2023, 'gdp_trillion': 2.06},
-                    {'year': 2024, 'gdp_trillion': 2.11}
-                ],
-                'gdp_per_capita': 14800,
-                'inflation': 5.9,
-                'unemployment': 3.2,
-                'population': 144.4,
-                'gdp_rank': 11,
-                'gdp_per_capita_rank': 62,
-                'world_gdp_share': '2.0%'
-            },
-            'CHN': {
-                'gdp_data': [
-                    {'year': 2020, 'gdp_trillion': 14.72},
-                    {'year': 2021, 'gdp_trillion': 17.73},
-                    {'year': 2022, 'gdp_trillion': 17.95},
-                    {'year': 2023, 'gdp_trillion': 17.89},
-                    {'year': 2024, 'gdp_trillion': 18.53}
-                ],
-                'gdp_per_capita': 13100,
-                'inflation': 0.2,
-                'unemployment': 5.2,
-                'population': 1412.0,
-                'gdp_rank': 2,
-                'gdp_per_capita_rank': 72,
-                'world_gdp_share': '17.8%'
-            },
-            'DEU': {
-                'gdp_data': [
-                    {'year': 2020, 'gdp_trillion': 3.85},
-                    {'year': 2021, 'gdp_trillion': 4.26},
-                    {'year': 2022, 'gdp_trillion': 4.26},
-                    {'year': 2023, 'gdp_trillion': 4.12},
-                    {'year': 2024, 'gdp_trillion': 4.18}
-                ],
-                'gdp_per_capita': 50200,
-                'inflation': 2.3,
-                'unemployment': 3.1,
-                'population': 83.2,
-                'gdp_rank': 4,
-                'gdp_per_capita_rank': 18,
-                'world_gdp_share': '4.0%'
-            },
-            'GBR': {
-                'gdp_data': [
-                    {'year': 2020, 'gdp_trillion': 2.76},
-                    {'year': 2021, 'gdp_trillion': 3.13},
-                    {'year': 2022, 'gdp_trillion': 3.13},
-                    {'year': 2023, 'gdp_trillion': 3.13},
-                    {'year': 2024, 'gdp_trillion': 3.18}
-                ],
-                'gdp_per_capita': 47100,
-                'inflation': 2.0,
-                'unemployment': 4.2,
-                'population': 67.5,
-                'gdp_rank': 6,
-                'gdp_per_capita_rank': 22,
-                'world_gdp_share': '3.1%'
-            },
-            'JPN': {
-                'gdp_data': [
-                    {'year': 2020, 'gdp_trillion': 4.89},
-                    {'year': 2021, 'gdp_trillion': 4.94},
-                    {'year': 2022, 'gdp_trillion': 4.94},
-                    {'year': 2023, 'gdp_trillion': 4.21},
-                    {'year': 2024, 'gdp_trillion': 4.11}
-                ],
-                'gdp_per_capita': 32700,
-                'inflation': 3.1,
-                'unemployment': 2.4,
-                'population': 125.8,
-                'gdp_rank': 3,
-                'gdp_per_capita_rank': 26,
-                'world_gdp_share': '4.3%'
-            },
-            'FRA': {
-                'gdp_data': [
-                    {'year': 2020, 'gdp_trillion': 2.60},
-                    {'year': 2021, 'gdp_trillion': 2.94},
-                    {'year': 2022, 'gdp_trillion': 2.78},
-                    {'year': 2023, 'gdp_trillion': 2.78},
-                    {'year': 2024, 'gdp_trillion': 2.81}
-                ],
-                'gdp_per_capita': 41500,
-                'inflation': 2.9,
-                'unemployment': 7.3,
-                'population': 67.8,
-                'gdp_rank': 7,
-                'gdp_per_capita_rank': 20,
-                'world_gdp_share': '2.9%'
-            },
-            'IND': {
-                'gdp_data': [
-                    {'year': 2020, 'gdp_trillion': 3.18},
-                    {'year': 2021, 'gdp_trillion': 3.39},
-                    {'year': 2022, 'gdp_trillion': 3.74},
-                    {'year': 2023, 'gdp_trillion': 3.74},
-                    {'year': 2024, 'gdp_trillion': 3.94}
-                ],
-                'gdp_per_capita': 2800,
-                'inflation': 5.1,
-                'unemployment': 3.4,
-                'population': 1380.0,
-                'gdp_rank': 5,
-                'gdp_per_capita_rank': 142,
-                'world_gdp_share': '3.7%'
-            }
-        }
+# Кэш готовых JSON-графиков
+figure_cache = FigureCache(snapshot_endpoints=SNAPSHOT_ENDPOINTS)
+# Ответы с произвольными параметрами запроса - в отдельном небольшом кэше,
+# чтобы они не вытесняли ответы по умолчанию
+query_cache = FigureCache(max_entries=app.config['QUERY_CACHE_ENTRIES'])
 
-    def get_country_data(self, country_code):
-        """Получение данных для страны"""
-        logger.info(f"📊 Загрузка данных для {self.countries_info[country_code]['name']}...")
-
-        country_data = self.country_data.get(country_code, self.country_data['USA'])
-
-        # ВВП на душу населения
-        gdp_per_capita_data = []
-        for record in country_data['gdp_data']:
-            gdp_per_capita_data.append({
-                'year': record['year'],
-                'gdp_per_capita': round((record['gdp_trillion'] * 1e12) / (country_data['population'] * 1e6), 0)
-            })
-
-        result = {
-            'gdp_data': country_data['gdp_data'],
-            'gdp_per_capita': gdp_per_capita_data,
-            'inflation': country_data['inflation'],
-            'unemployment': country_data['unemployment'],
-            'population': country_data['population'],
-            'rankings': {
-                'gdp_rank': country_data['gdp_rank'],
-                'gdp_per_capita_rank': country_data['gdp_per_capita_rank'],
-                'world_gdp_share': country_data['world_gdp_share']
-            },
-            'data_sources': {
-                'gdp': 'Статистические данные 2024',
-                'inflation': 'Центральные банки',
-                'unemployment': 'Национальная статистика',
-                'api_status': 'Резервные данные'
-            },
-            'last_update': datetime.now()
-        }
 
-        countries_cache[country_code] = result
-        logger.info(f"✅ Данные для {self.countries_info[country_code]['name']} загружены")
-        return result
+# Создание экземпляра провайдера данных
+data_provider = SimpleCountryDataProvider()
+data_provider.add_change_listener(figure_cache.invalidate)
+data_provider.add_change_listener(query_cache.invalidate)
 
-    def get_countries_comparison(self):
-        """Получение данных для сравнения стран"""
-        comparison_data = {}
+# Производные показатели (CAGR, скользящие средние, изменения), пересчет раз на снимок
+derived_indicators = DerivedIndicatorsCache(data_provider)
 
-        for country_code in self.countries_info.keys():
-            if country_code not in countries_cache:
-                self.get_country_data(country_code)
+# Уведомления открытых вкладок об изменении данных (SSE)
+event_broker = EventBroker()
+app.config['EVENTS_HEARTBEAT'] = float(os.environ.get('DASHBOARD_EVENTS_HEARTBEAT', 15))
 
-            country_data = countries_cache.get(country_code, {})
-            if country_data.get('gdp_data'):
-                latest_gdp = country_data['gdp_data'][-1]['gdp_trillion']
-                comparison_data[self.countries_info[country_code]['name']] = latest_gdp
 
-        return comparison_data
+def publish_data_change(country_code):
+    version = data_provider.get_data_version(country_code)
+    event_broker.publish('data-changed', {'country': country_code, 'version': version}, event_id=version)
 
 
-# Создание экземпляра провайдера данных
-data_provider = SimpleCountryDataProvider()
+data_provider.add_change_listener(publish_data_change)
+
+# Общий для процессов снимок данных (gunicorn с несколькими воркерами)
+shared_snapshot = attach_shared_snapshot(data_provider)
+
+if shared_snapshot is not None:
+    @app.before_request
+    def sync_shared_snapshot():
+        shared_snapshot.refresh_if_changed()
+
+
+# Метрики, которые уже считаются кэшем, провайдером и рассылкой событий
+metrics_registry.callback('dashboard_figure_cache_entries', 'Записей в кэше готовых ответов',
+                          lambda: figure_cache.stats()['entries'])
+metrics_registry.callback('dashboard_query_cache_entries', 'Записей в кэше ответов с параметрами запроса',
+                          lambda: query_cache.stats()['entries'])
+metrics_registry.callback(
+    'dashboard_country_loads_total', 'Загрузки данных стран: выполнено, объединено с идущей загрузкой, ошибок',
+    lambda: {(result,): data_provider.load_stats()[name]
+             for result, name in (('load', 'loads'), ('coalesced', 'coalesced'), ('error', 'errors'))},
+    kind='counter', labelnames=('result',))
+metrics_registry.callback('dashboard_country_loads_in_flight', 'Загрузки данных стран в процессе',
+                          lambda: data_provider.load_stats()['in_flight'])
+metrics_registry.callback('dashboard_snapshot_version', 'Версия текущего снимка данных',
+                          lambda: data_provider.snapshot.version)
+metrics_registry.callback('dashboard_snapshot_age_seconds', 'Возраст текущего снимка данных',
+                          lambda: (datetime.now() - data_provider.snapshot.loaded_at).total_seconds())
+metrics_registry.callback('dashboard_event_subscribers', 'Открытых подписок /api/events',
+                          lambda: event_broker.subscriber_count)
+
+
+def get_cached_country_data(country_code):
+    """Данные страны из кэша с загрузкой при первом обращении"""
+    return data_provider.load_country_data(country_code)
+
+
+def serialize_figure(fig):
+    import plotly.utils
+    with serialize_seconds.time('plotly'):
+        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+
+
+def figure_version(endpoint, country_code):
+    """Версия данных, по которой кэшируется ответ эндпоинта"""
+    if endpoint in SNAPSHOT_ENDPOINTS:
+        return data_provider.get_data_version()
+    return data_provider.get_data_version(country_code)
+
+
+def cached_figure(endpoint, country_code, builder, compress=False, cache=None):
+    """Готовый график из кэша; builder(country_code) вызывается только при промахе"""
+    version = figure_version(endpoint, country_code)
+    return (cache or figure_cache).get_or_build(endpoint, country_code, version, lambda: builder(country_code),
+                                     compress=compress)
+
+
+def payload_response(payload):
+    """
+    Ответ с ETag: 304 без тела, если клиент уже имеет эту версию.
+    Сжатый вариант берется готовым из payload, без сжатия на каждый запрос.
+    """
+    status, body, encoding, etag = payload.negotiate(request.accept_encodings, request.if_none_match,
+                                                     compress.min_size)
+    if status == 304:
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype=payload.mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
 
 
 # Flask Routes
+def render_dashboard_page():
+    """Компиляция и отрисовка страницы - один раз при старте, а не на каждый запрос"""
+    started = time.perf_counter()
+    template = app.jinja_env.from_string(EMBEDDED_HTML)
+    payload = CachedPayload(template.render(), mimetype='text/html', compress=True)
+    logger.info(f"🧩 Страница панели подготовлена за {(time.perf_counter() - started) * 1000:.1f} мс")
+    return payload
+
+
+# Отрисованная страница со сжатыми вариантами
+page_payload = render_dashboard_page()
+
+
 @app.route('/')
 def dashboard_page():
-    return render_template_string(EMBEDDED_HTML)
+    return payload_response(page_payload)
 
 
-@app.route('/api/country-stats/<country_code>')
-def country_stats(country_code):
-    try:
-        if country_code not in countries_cache:
-            data_provider.get_country_data(country_code)
+def derived_summary(country_code):
+    """Производные показатели страны (для неизвестных кодов - как в get_country_data)"""
+    derived = derived_indicators.current()
+    return derived.country_summary(country_code if country_code in derived else 'USA')
 
-        country_data = countries_cache.get(country_code, {})
-        result = {}
 
-        # ВВП
-        if country_data.get('gdp_data') and len(country_data['gdp_data']) >= 2:
-            latest = country_data['gdp_data'][-1]
-            prev = country_data['gdp_data'][-2]
-            change = ((latest['gdp_trillion'] - prev['gdp_trillion']) / prev['gdp_trillion'] * 100)
+def build_country_stats(country_code):
+    country_data = get_cached_country_data(country_code)
+    summary = derived_summary(country_code)
+    result = {}
+
+    # ВВП
+    if country_data.get('gdp_data') and summary['gdp_change_pct'] is not None:
+        result['gdp'] = {
+            'current': str(country_data['gdp_data'][-1]['gdp_trillion']) + ' трлн $',
+            'change': f"{summary['gdp_change_pct']:+.1f}% за год"
+        }
+    else:
+        result['gdp'] = {'current': 'Н/Д', 'change': 'Н/Д'}
+
+    # ВВП на душу населения
+    if country_data.get('gdp_per_capita'):
+        latest_per_capita = country_data['gdp_per_capita'][-1]['gdp_per_capita']
+        result['gdp_per_capita'] = {
+            'current': f"{latest_per_capita:,.0f} $",
+            'change': "Оценка 2024"
+        }
+    else:
+        result['gdp_per_capita'] = {'current': 'Н/Д', 'change': 'Н/Д'}
+
+    # Остальные показатели
+    result['inflation'] = country_data.get('inflation') if country_data.get('inflation') is not None else 'Н/Д'
+    result['unemployment'] = country_data.get('unemployment') if country_data.get(
+        'unemployment') is not None else 'Н/Д'
+    result['population'] = str(country_data.get('population', 0)) + ' млн' if country_data.get(
+        'population') else 'Н/Д млн'
+    result['derived'] = summary
+
+    return result
 
-            result['gdp'] = {
-                'current': str(latest['gdp_trillion']) + ' трлн $',
-                'change': f"{change:+.1f}% за год"
-            }
-        else:
-            result['gdp'] = {'current': 'Н/Д', 'change': 'Н/Д'}
-
-        # ВВП на душу населения
-        if country_data.get('gdp_per_capita'):
-            latest_per_capita = country_data['gdp_per_capita'][-1]['gdp_per_capita']
-            result['gdp_per_capita'] = {
-                'current': f"{latest_per_capita:,.0f} $",
-                'change': "Оценка 2024"
-            }
-        else:
-            result['gdp_per_capita'] = {'current': 'Н/Д', 'change': 'Н/Д'}
 
-        # Остальные показатели
-        result['inflation'] = country_data.get('inflation') if country_data.get('inflation') is not None else 'Н/Д'
-        result['unemployment'] = country_data.get('unemployment') if country_data.get(
-            'unemployment') is not None else 'Н/Д'
-        result['population'] = str(country_data.get('population', 0)) + ' млн' if country_data.get(
-            'population') else 'Н/Д млн'
+def build_country_info(country_code):
+    country_data = countries_cache.get(country_code, {})
+    country_basic_info = data_provider.countries_info.get(country_code, {})
 
-        return jsonify(result)
+    return {
+        'country_info': country_basic_info,
+        'rankings': country_data.get('rankings', {}),
+        'data_sources': country_data.get('data_sources', {})
+    }
+
+
+@app.route('/api/country-stats/<country_code>')
+def country_stats(country_code):
+    try:
+        return jsonify(build_country_stats(country_code))
 
     except Exception as e:
         logger.error(f"Ошибка в country_stats для {country_code}: {e}")
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/country-gdp/<country_code>')
-def country_gdp(country_code):
-    try:
-        if country_code not in countries_cache:
-            data_provider.get_country_data(country_code)
+def history_window():
+    """
+    Окно временного ряда из параметров from/to/max_points запроса
+    или None, если они не заданы
+    """
+    args = request.args
+    if not any(name in args for name in ('from', 'to', 'max_points')):
+        return None
 
-        country_data = countries_cache.get(country_code, {})
-        gdp_data = country_data.get('gdp_data', [])
+    start, end = parse_date(args.get('from')), parse_date(args.get('to'))
+    max_points = app.config['CHART_MAX_POINTS']
+    if args.get('max_points'):
+        try:
+            max_points = int(args['max_points'])
+        except ValueError:
+            raise ValueError(f"Invalid max_points: {args['max_points']!r}") from None
+    max_points = min(max(max_points, 3), app.config['CHART_MAX_POINTS_LIMIT'])
+    return start, end, max_points
 
-        if not gdp_data:
-            return jsonify({'error': 'No GDP data available'}), 500
 
-        fig = go.Figure()
+def history_chart_inputs(country_code, name, window=None):
+    """Подписи и значения длинного ряда страны с прореживанием на сервере"""
+    start, end, max_points = window or (None, None, app.config['CHART_MAX_POINTS'])
+    dates, values = data_provider.get_history(country_code, name, start, end, max_points)
+    return format_dates(dates), values.tolist()
 
-        years = [str(record['year']) for record in gdp_data]
-        values = [record['gdp_trillion'] for record in gdp_data]
 
-        country_name = data_provider.countries_info[country_code]['name']
+def gdp_chart_inputs(country_code, window=None):
+    years, values = history_chart_inputs(country_code, 'gdp', window)
 
-        fig.add_trace(go.Scatter(
-            x=years,
-            y=values,
-            mode='lines+markers',
-            name='ВВП ' + country_name,
-            line=dict(color='#1f77b4', width=3),
-            marker=dict(size=8),
-            hovertemplate='<b>%{x}</b><br>ВВП ' + country_name + ': $%{y:.2f} трлн<extra></extra>'
-        ))
+    if not years:
+        raise LookupError('No GDP data available')
 
-        fig.update_layout(
-            title='Динамика ВВП: ' + country_name,
-            xaxis_title='Год',
-            yaxis_title='ВВП (трлн долларов)',
-            hovermode='x unified',
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(family="Arial, sans-serif", size=12),
-            margin=dict(l=50, r=50, t=50, b=50),
-            xaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)'),
-            yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
-        )
+    return data_provider.countries_info[country_code]['name'], years, values
 
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
 
+def indicators_chart_inputs(country_code):
+    country_data = get_cached_country_data(country_code)
+    country_name = data_provider.countries_info[country_code]['name']
 
-@app.route('/api/country-indicators/<country_code>')
-def country_indicators(country_code):
-    try:
-        if country_code not in countries_cache:
-            data_provider.get_country_data(country_code)
+    indicators = []
+    values = []
+    colors = []
+
+    if country_data.get('inflation') is not None:
+        indicators.append('Инфляция')
+        values.append(country_data['inflation'])
+        colors.append('#ff7f0e')
+
+    if country_data.get('unemployment') is not None:
+        indicators.append('Безработица')
+        values.append(country_data['unemployment'])
+        colors.append('#d62728')
+
+    if not indicators:
+        indicators = ['Данные недоступны']
+        values = [0]
+        colors = ['#cccccc']
+
+    return country_name, indicators, values, colors
+
+
+def gdp_per_capita_chart_inputs(country_code, window=None):
+    years, values = history_chart_inputs(country_code, 'gdp_per_capita', window)
+    return data_provider.countries_info[country_code]['name'], years, values
+
+
+def country_name(country_code):
+    return data_provider.countries_info.get(country_code, {}).get('name', country_code)
+
+
+def comparison_chart_inputs(selection=None):
+    """ВВП стран по убыванию из готового рейтинга: все страны или (страны, год)"""
+    country_codes, year = selection or (None, None)
+    _, _, rows, _ = derived_indicators.current().ranks.compare('gdp', year, country_codes)
+    countries = [country_name(country_code) for country_code, _, _ in rows]
+    gdp_values = [value for _, value, _ in rows]
+
+    colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f']
+    return countries, gdp_values, [colors[i % len(colors)] for i in range(len(countries))]
+
+
+def build_gdp_figure(country_code, window=None):
+    import plotly.graph_objs as go
+    country_name, years, values = gdp_chart_inputs(country_code, window)
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatter(
+        x=years,
+        y=values,
+        mode='lines+markers',
+        name='ВВП ' + country_name,
+        line=dict(color='#1f77b4', width=3),
+        marker=dict(size=8),
+        hovertemplate='<b>%{x}</b><br>ВВП ' + country_name + ': $%{y:.2f} трлн<extra></extra>'
+    ))
+
+    fig.update_layout(
+        title='Динамика ВВП: ' + country_name,
+        xaxis_title='Год',
+        yaxis_title='ВВП (трлн долларов)',
+        hovermode='x unified',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family="Arial, sans-serif", size=12),
+        margin=dict(l=50, r=50, t=50, b=50),
+        xaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)'),
+        yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
+    )
 
-        country_data = countries_cache.get(country_code, {})
-        country_name = data_provider.countries_info[country_code]['name']
+    return serialize_figure(fig)
 
-        fig = go.Figure()
 
-        indicators = []
-        values = []
-        colors = []
+def build_indicators_figure(country_code):
+    import plotly.graph_objs as go
+    country_name, indicators, values, colors = indicators_chart_inputs(country_code)
 
-        if country_data.get('inflation') is not None:
-            indicators.append('Инфляция')
-            values.append(country_data['inflation'])
-            colors.append('#ff7f0e')
+    fig = go.Figure()
 
-        if country_data.get('unemployment') is not None:
-            indicators.append('Безработица')
-            values.append(country_data['unemployment'])
-            colors.append('#d62728')
+    fig.add_trace(go.Bar(
+        x=indicators,
+        y=values,
+        name='Показатели ' + country_name,
+        marker_color=colors,
+        text=[str(v) + '%' if v > 0 else 'Н/Д' for v in values],
+        textposition='auto',
+        hovertemplate='<b>%{x}</b><br>Значение: %{y:.1f}%<extra></extra>'
+    ))
 
-        if not indicators:
-            indicators = ['Данные недоступны']
-            values = [0]
-            colors = ['#cccccc']
+    fig.update_layout(
+        title='Экономические индикаторы: ' + country_name,
+        xaxis_title='Индикатор',
+        yaxis_title='Значение (%)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family="Arial, sans-serif", size=12),
+        margin=dict(l=50, r=50, t=50, b=50)
+    )
 
-        fig.add_trace(go.Bar(
-            x=indicators,
+    return serialize_figure(fig)
+
+
+def build_gdp_per_capita_figure(country_code, window=None):
+    import plotly.graph_objs as go
+    country_name, years, values = gdp_per_capita_chart_inputs(country_code, window)
+
+    fig = go.Figure()
+
+    if years:
+        fig.add_trace(go.Scatter(
+            x=years,
             y=values,
-            name='Показатели ' + country_name,
-            marker_color=colors,
-            text=[str(v) + '%' if v > 0 else 'Н/Д' for v in values],
-            textposition='auto',
-            hovertemplate='<b>%{x}</b><br>Значение: %{y:.1f}%<extra></extra>'
+            mode='lines+markers',
+            name='ВВП на душу населения ' + country_name,
+            line=dict(color='#2ca02c', width=3),
+            marker=dict(size=8),
+            hovertemplate='<b>%{x}</b><br>ВВП/чел ' + country_name + ': $%{y:,.0f}<extra></extra>'
         ))
 
-        fig.update_layout(
-            title='Экономические индикаторы: ' + country_name,
-            xaxis_title='Индикатор',
-            yaxis_title='Значение (%)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(family="Arial, sans-serif", size=12),
-            margin=dict(l=50, r=50, t=50, b=50)
-        )
+    fig.update_layout(
+        title='ВВП на душу населения: ' + country_name,
+        xaxis_title='Год',
+        yaxis_title='ВВП на душу населения (USD)',
+        hovermode='x unified',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family="Arial, sans-serif", size=12),
+        margin=dict(l=50, r=50, t=50, b=50),
+        xaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)'),
+        yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
+    )
+
+    return serialize_figure(fig)
+
+
+def build_comparison_figure(country_code=None, selection=None):
+    import plotly.graph_objs as go
+    countries, gdp_values, colors = comparison_chart_inputs(selection)
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Bar(
+        x=countries,
+        y=gdp_values,
+        name='ВВП по странам',
+        marker_color=colors,
+        text=[str(v) + ' трлн $' for v in gdp_values],
+        textposition='auto',
+        hovertemplate='<b>%{x}</b><br>ВВП: $%{y:.1f} трлн<extra></extra>'
+    ))
+
+    fig.update_layout(
+        title='Сравнение ВВП стран мира',
+        xaxis_title='Страна',
+        yaxis_title='ВВП (трлн долларов)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family="Arial, sans-serif", size=12),
+        margin=dict(l=50, r=50, t=50, b=50),
+        xaxis=dict(tickangle=45)
+    )
+
+    return serialize_figure(fig)
+
+
+# Построители графиков: через объекты Plotly или напрямую из шаблонов-словарей
+FIGURE_BUILDERS = {
+    'country-gdp': {
+        'plotly': build_gdp_figure,
+        'spec': lambda country_code, window=None: chart_specs.gdp_chart(*gdp_chart_inputs(country_code, window))
+    },
+    'country-indicators': {
+        'plotly': build_indicators_figure,
+        'spec': lambda country_code: chart_specs.indicators_chart(*indicators_chart_inputs(country_code))
+    },
+    'country-gdp-per-capita': {
+        'plotly': build_gdp_per_capita_figure,
+        'spec': lambda country_code, window=None: chart_specs.gdp_per_capita_chart(
+            *gdp_per_capita_chart_inputs(country_code, window))
+    },
+    'countries-comparison': {
+        'plotly': build_comparison_figure,
+        'spec': lambda country_code=None, selection=None: chart_specs.comparison_chart(
+            *comparison_chart_inputs(selection))
+    }
+}
+
+
+def chart_builder_mode(endpoint):
+    return app.config['CHART_BUILDERS'].get(endpoint, app.config['CHART_BUILDER'])
+
+
+def cached_chart(endpoint, country_code, options=None):
+    """
+    Готовый график эндпоинта выбранным для него способом построения.
+    Графики с параметрами запроса (окно ряда, выбор стран) - в query_cache.
+    """
+    mode = chart_builder_mode(endpoint)
+    builder = FIGURE_BUILDERS[endpoint][mode]
+    if options is None:
+        return cached_figure(f'{endpoint}:{mode}', country_code, builder)
+
+    key = ':'.join(str(option) for option in options)
+    return cached_figure(f'{endpoint}:{mode}:{key}', country_code, lambda code: builder(code, options),
+                         cache=query_cache)
 
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+
+@app.route('/api/country-gdp/<country_code>')
+def country_gdp(country_code):
+    try:
+        window = history_window()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        return payload_response(cached_chart('country-gdp', country_code, window))
+    except LookupError as e:
+        return jsonify({'error': e.args[0]}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/country-indicators/<country_code>')
+def country_indicators(country_code):
+    try:
+        return payload_response(cached_chart('country-indicators', country_code))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -922,44 +1074,14 @@ def country_indicators(country_code):
 @app.route('/api/country-gdp-per-capita/<country_code>')
 def country_gdp_per_capita(country_code):
     try:
-        if country_code not in countries_cache:
-            data_provider.get_country_data(country_code)
-
-        country_data = countries_cache.get(country_code, {})
-        per_capita_data = country_data.get('gdp_per_capita', [])
-
-        country_name = data_provider.countries_info[country_code]['name']
-
-        fig = go.Figure()
-
-        if per_capita_data:
-            years = [str(record['year']) for record in per_capita_data]
-            values = [record['gdp_per_capita'] for record in per_capita_data]
-
-            fig.add_trace(go.Scatter(
-                x=years,
-                y=values,
-                mode='lines+markers',
-                name='ВВП на душу населения ' + country_name,
-                line=dict(color='#2ca02c', width=3),
-                marker=dict(size=8),
-                hovertemplate='<b>%{x}</b><br>ВВП/чел ' + country_name + ': $%{y:,.0f}<extra></extra>'
-            ))
-
-        fig.update_layout(
-            title='ВВП на душу населения: ' + country_name,
-            xaxis_title='Год',
-            yaxis_title='ВВП на душу населения (USD)',
-            hovermode='x unified',
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(family="Arial, sans-serif", size=12),
-            margin=dict(l=50, r=50, t=50, b=50),
-            xaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)'),
-            yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
-        )
+        window = history_window()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+    try:
+        return payload_response(cached_chart('country-gdp-per-capita', country_code, window))
+    except LookupError as e:
+        return jsonify({'error': e.args[0]}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -967,66 +1089,271 @@ def country_gdp_per_capita(country_code):
 @app.route('/api/country-info/<country_code>')
 def country_info(country_code):
     try:
-        country_data = countries_cache.get(country_code, {})
-        country_basic_info = data_provider.countries_info.get(country_code, {})
+        return jsonify(build_country_info(country_code))
 
-        rankings = country_data.get('rankings', {})
-        sources = country_data.get('data_sources', {})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        result = {
-            'country_info': country_basic_info,
-            'rankings': rankings,
-            'data_sources': sources
-        }
 
-        return jsonify(result)
+def requested_countries():
+    """Коды стран из параметра countries=USA,RUS или None"""
+    country_codes = [code.strip().upper() for code in request.args.get('countries', '').split(',')
+                     if code.strip()]
+    return country_codes or None
 
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+
+def int_arg(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'Invalid {name}: {value!r}') from None
 
 
 @app.route('/api/countries-comparison')
 def countries_comparison():
+    """График ВВП всех стран или выбранных: ?countries=USA,RUS&year=2023"""
     try:
-        comparison_data = data_provider.get_countries_comparison()
+        country_codes, year = requested_countries(), int_arg('year')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-        fig = go.Figure()
+    try:
+        selection = (tuple(country_codes) if country_codes else None, year)
+        return payload_response(cached_chart('countries-comparison', None,
+                                             selection if any(selection) else None))
+    except KeyError as e:
+        return jsonify({'error': e.args[0]}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        countries = list(comparison_data.keys())
-        gdp_values = list(comparison_data.values())
 
-        # Сортируем по убыванию ВВП
-        sorted_data = sorted(zip(countries, gdp_values), key=lambda x: x[1], reverse=True)
-        countries, gdp_values = zip(*sorted_data)
+def build_comparison_payload(indicator, year, country_codes, limit):
+    year, ranked, rows, missing = derived_indicators.current().ranks.compare(indicator, year, country_codes, limit)
+    return json.dumps({
+        'indicator': indicator,
+        'year': year,
+        'ranked': ranked,
+        'countries': [{'country': country_code, 'name': country_name(country_code), 'value': value, 'rank': rank}
+                      for country_code, value, rank in rows],
+        'missing': missing
+    }, ensure_ascii=False)
+
+
+@app.route('/api/compare')
+def compare_countries():
+    """
+    Сравнение стран по показателю за год из готовых рейтингов:
+    /api/compare?countries=USA,RUS,CHN&indicator=gdp_per_capita&year=2023&limit=10
+    """
+    try:
+        country_codes = requested_countries()
+        indicator = request.args.get('indicator', 'gdp')
+        year, limit = int_arg('year'), int_arg('limit')
+        if limit is not None and limit < 1:
+            raise ValueError(f'Invalid limit: {limit!r}')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-        colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f']
+    try:
+        key = f"compare:{indicator}:{year}:{limit}:{','.join(country_codes or [])}"
+        payload = query_cache.get_or_build(key, None, data_provider.get_data_version(),
+                                           lambda: build_comparison_payload(indicator, year, country_codes, limit))
+        return payload_response(payload)
+    except KeyError as e:
+        return jsonify({'error': e.args[0]}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        fig.add_trace(go.Bar(
-            x=countries,
-            y=gdp_values,
-            name='ВВП по странам',
-            marker_color=colors[:len(countries)],
-            text=[str(v) + ' трлн $' for v in gdp_values],
-            textposition='auto',
-            hovertemplate='<b>%{x}</b><br>ВВП: $%{y:.1f} трлн<extra></extra>'
-        ))
 
-        fig.update_layout(
-            title='Сравнение ВВП стран мира',
-            xaxis_title='Страна',
-            yaxis_title='ВВП (трлн долларов)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(family="Arial, sans-serif", size=12),
-            margin=dict(l=50, r=50, t=50, b=50),
-            xaxis=dict(tickangle=45)
-        )
+def build_country_bundle(country_code):
+    """Все данные страны одним JSON: статистика, справка и три графика"""
+    stats = json.dumps(build_country_stats(country_code))
+    info = json.dumps(build_country_info(country_code))
+    figures = {
+        'gdp': cached_chart('country-gdp', country_code),
+        'indicators': cached_chart('country-indicators', country_code),
+        'gdp_per_capita': cached_chart('country-gdp-per-capita', country_code)
+    }
+
+    # Графики уже сериализованы - вставляем их байты без повторного разбора
+    parts = [b'{"country": ', json.dumps(country_code).encode(),
+             b', "stats": ', stats.encode(),
+             b', "info": ', info.encode(),
+             b', "figures": {']
+    for index, (name, payload) in enumerate(figures.items()):
+        if index:
+            parts.append(b', ')
+        parts.extend([json.dumps(name).encode(), b': ', payload.body])
+    parts.append(b'}}')
+    return b''.join(parts)
+
+
+def cached_country_bundle(country_code):
+    return cached_figure('country-bundle', country_code, build_country_bundle, compress=True)
+
+
+def build_derived_payload(country_code):
+    derived = derived_indicators.current()
+    if country_code not in derived:
+        # Исключение до записи в кэш: промахи по неизвестным кодам не занимают место
+        raise KeyError(f'Unknown country: {country_code}')
+    return json.dumps({
+        'country': country_code,
+        'rolling_window': derived.rolling_window,
+        'summary': derived.country_summary(country_code),
+        'annual': derived.country_series(country_code)
+    }, ensure_ascii=False)
+
+
+@app.route('/api/derived/<country_code>')
+def country_derived(country_code):
+    """Производные показатели страны: сводка и годовые ряды"""
+    try:
+        return payload_response(cached_figure('derived', country_code, build_derived_payload))
+    except KeyError as e:
+        return jsonify({'error': e.args[0]}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+
+@app.route('/api/derived')
+def countries_derived():
+    """Сводка производных показателей по всем странам"""
+    try:
+        payload = cached_figure('derived', None, lambda country_code: json.dumps(
+            derived_indicators.current().all_summaries(), ensure_ascii=False))
+        return payload_response(payload)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/country-bundle/<country_code>')
+def country_bundle(country_code):
+    try:
+        return payload_response(cached_country_bundle(country_code))
+    except Exception as e:
+        logger.error(f"Ошибка в country_bundle для {country_code}: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/country-bundle')
+def country_bundles():
+    """Пакеты нескольких стран: /api/country-bundle?countries=USA,RUS"""
+    try:
+        country_codes = requested_countries()
+        if not country_codes:
+            return jsonify({'error': 'Parameter "countries" is required'}), 400
+
+        def build_bundles():
+            parts = []
+            for country_code in country_codes:
+                parts.append(json.dumps(country_code).encode() + b': ' + cached_country_bundle(country_code).body)
+            return b'{' + b', '.join(parts) + b'}'
+
+        payload = query_cache.get_or_build('country-bundles', ','.join(country_codes),
+                                           data_provider.get_data_version(), build_bundles, compress=True)
+        return payload_response(payload)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/export')
+def export_data():
+    """
+    Потоковая выгрузка данных без сборки ответа в памяти:
+    /api/export?format=csv&countries=USA,RUS&indicators=gdp_trillion,gdp_per_capita&from=2000&to=2020
+
+    format - csv, ndjson или parquet (нужен pyarrow); dataset=history -
+    длинные ряды, тогда from/to - даты ('2010', '2010-06', '2010-06-30')
+    """
+    export_format = request.args.get('format', 'csv')
+    dataset = request.args.get('dataset', 'annual')
+    indicators = [name.strip() for name in request.args.get('indicators', '').split(',') if name.strip()]
+    # Вся выгрузка читается из одного снимка, даже если данные обновятся во время передачи
+    snapshot = data_provider.snapshot
+
+    try:
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f'Unknown format: {export_format!r}')
+        if dataset == 'history':
+            start, end = parse_date(request.args.get('from')), parse_date(request.args.get('to'))
+        else:
+            start, end = int_arg('from'), int_arg('to')
+        country_codes = requested_countries()
+        export = DataExport(snapshot.store, dataset, country_codes, indicators or None, start, end,
+                            app.config['EXPORT_CHUNK_ROWS'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    unknown = [country_code for country_code in country_codes or [] if country_code not in snapshot.store]
+    if unknown:
+        return jsonify({'error': f'Unknown countries: {", ".join(unknown)}'}), 404
+    if export_format == 'parquet' and not parquet_available():
+        return jsonify({'error': 'Parquet export requires pyarrow'}), 501
+
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    chunks = export.iter_format(export_format)
+    encoding = None
+    if export_format != 'parquet' and request.accept_encodings.best_match(('gzip',)):
+        chunks, encoding = compress_stream(chunks, compress.level), 'gzip'
+
+    response = Response(chunks, mimetype=mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.headers['Content-Disposition'] = (
+        f'attachment; filename="economic-{dataset}-{snapshot.version}.{extension}"')
+    response.headers['X-Data-Version'] = str(snapshot.version)
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@app.route('/api/events')
+def data_events():
+    """
+    Поток событий об изменении данных: при подключении 'hello' с текущими
+    версиями, затем 'data-changed' на каждую изменившуюся страну
+    """
+    on_idle = shared_snapshot.refresh_if_changed if shared_snapshot is not None else None
+
+    def stream():
+        # Подписка до чтения снимка, чтобы не пропустить изменения между ними
+        subscription = event_broker.subscribe()
+        try:
+            snapshot = data_provider.snapshot
+            yield format_event('hello', {'version': snapshot.version, 'countries': snapshot.country_versions},
+                               event_id=snapshot.version, retry=5000)
+            yield from event_broker.stream(subscription, app.config['EVENTS_HEARTBEAT'], on_idle)
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    response = Response(stream(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@app.cli.command('build-static')
+@click.option('--output', default='static_build', show_default=True, help='Каталог сборки')
+@click.option('--assets-url', default='/assets/', show_default=True, help='URL каталога assets в nginx')
+@click.option('--prune', is_flag=True, help='Удалить файлы, не входящие в новый манифест')
+def build_static_command(output, assets_url, prune):
+    """Отрисовка всех ответов API в файлы для раздачи nginx"""
+    manifest = build_static(app, data_provider, output, assets_url)
+    click.echo(f"✅ {len(manifest['files'])} ответов, версия данных {manifest['version']}: {output}")
+    if prune:
+        click.echo(f"🧹 Удалено устаревших файлов: {prune_assets(output, manifest)}")
+
+
+@app.route('/metrics')
+def metrics():
+    """Метрики процесса в текстовом формате Prometheus"""
+    return Response(metrics_registry.render(), content_type=metrics_registry.content_type)
+
+
 if __name__ == '__main__':
     print("🌍 Запуск исправленной многострановой экономической панели...")
     print("📊 Панель будет доступна по адресу: http://localhost:5004")
@@ -1035,4 +1362,8 @@ if __name__ == '__main__':
     print("✅ Исправлена синтаксическая ошибка с f-строками")
     print("🔄 Для остановки нажмите Ctrl+C")
 
+    # В режиме отладки поток запускается только в дочернем процессе перезагрузчика
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true' and shared_snapshot is None:
+        start_background_refresh(data_provider)
+
     app.run(debug=True, host='127.0.0.1', port=5004)
\ No newline at end of file
@@ -0,0 +1,240 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import io
+import logging
+import os
+import sys
+import time
+
+from werkzeug.http import parse_accept_header, parse_etags
+
+import app as dashboard
+from events import format_event
+from metrics import request_seconds
+from refresh import start_background_refresh
+
+logger = logging.getLogger(__name__)
+
+# Поток событий и готовые ответы из кэша обслуживаются прямо в цикле событий;
+# остальные запросы (и промахи кэша) выполняет Flask в пуле потоков
+wsgi_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('DASHBOARD_ASGI_THREADS', 16)),
+                                   thread_name_prefix='wsgi')
+
+CHART_ENDPOINTS = {'country-gdp', 'country-indicators', 'country-gdp-per-capita'}
+PAYLOAD_ENDPOINTS = {'country-bundle', 'derived'}
+
+
+def cached_payload(path):
+    """
+    Готовый ответ для пути без параметров и шаблон его маршрута Flask
+    (для метрик) или (None, None), если ответа нет в кэше
+    """
+    if path == '/':
+        return dashboard.page_payload, '/'
+
+    parts = path.strip('/').split('/')
+    if parts == ['api', 'countries-comparison']:
+        endpoint, country_code, route = 'countries-comparison', None, path
+    elif len(parts) == 3 and parts[0] == 'api' and parts[1] in CHART_ENDPOINTS | PAYLOAD_ENDPOINTS:
+        endpoint, country_code, route = parts[1], parts[2], f'/api/{parts[1]}/<country_code>'
+    else:
+        return None, None
+
+    if endpoint not in PAYLOAD_ENDPOINTS:
+        endpoint = f'{endpoint}:{dashboard.chart_builder_mode(endpoint)}'
+    version = dashboard.figure_version(endpoint, country_code)
+    return dashboard.figure_cache.get(endpoint, country_code, version, count_miss=False), route
+
+
+def request_headers(scope):
+    headers = {}
+    for name, value in scope['headers']:
+        name, value = name.decode('latin-1'), value.decode('latin-1')
+        headers[name] = f'{headers[name]},{value}' if name in headers else value
+    return headers
+
+
+async def send_payload(send, payload, headers):
+    """Отправка готового ответа; возвращает код ответа"""
+    status, body, encoding, etag = payload.negotiate(parse_accept_header(headers.get('accept-encoding')),
+                                                     parse_etags(headers.get('if-none-match')),
+                                                     dashboard.compress.min_size)
+    response_headers = [(b'etag', f'"{etag}"'.encode()), (b'cache-control', b'no-cache'),
+                        (b'vary', b'Accept-Encoding')]
+    if status == 200:
+        content_type = payload.mimetype + ('; charset=utf-8' if payload.mimetype.startswith('text/') else '')
+        response_headers += [(b'content-type', content_type.encode()),
+                             (b'content-length', str(len(body)).encode())]
+        if encoding:
+            response_headers.append((b'content-encoding', encoding.encode()))
+
+    await send({'type': 'http.response.start', 'status': status, 'headers': response_headers})
+    await send({'type': 'http.response.body', 'body': body})
+    return status
+
+
+async def data_events(scope, receive, send):
+    """
+    Поток событий /api/events без выделенного потока на клиента:
+    подписка - это asyncio.Queue, поэтому один процесс держит тысячи вкладок
+    """
+    loop = asyncio.get_running_loop()
+    heartbeat = dashboard.app.config['EVENTS_HEARTBEAT']
+    shared_snapshot = dashboard.shared_snapshot
+    subscription = dashboard.event_broker.subscribe_async(loop)
+    disconnect = asyncio.ensure_future(wait_for_disconnect(receive))
+
+    try:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no')
+        ]})
+        snapshot = dashboard.data_provider.snapshot
+        message = format_event('hello', {'version': snapshot.version, 'countries': snapshot.country_versions},
+                               event_id=snapshot.version, retry=5000)
+
+        while True:
+            await send({'type': 'http.response.body', 'body': message.encode('utf-8'), 'more_body': True})
+
+            get = asyncio.ensure_future(subscription.queue.get())
+            done, _ = await asyncio.wait({get, disconnect}, timeout=heartbeat,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if disconnect in done:
+                get.cancel()
+                break
+            if get in done:
+                message = get.result()
+                continue
+
+            get.cancel()
+            if shared_snapshot is not None:
+                await loop.run_in_executor(wsgi_executor, shared_snapshot.refresh_if_changed)
+            message = subscription.queue.get_nowait() if not subscription.queue.empty() else ': ping\n\n'
+    finally:
+        dashboard.event_broker.unsubscribe(subscription)
+        disconnect.cancel()
+
+
+async def wait_for_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+
+
+def wsgi_environ(scope, body):
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False
+    }
+    for name, value in request_headers(scope).items():
+        if name == 'content-type':
+            environ['CONTENT_TYPE'] = value
+        elif name == 'content-length':
+            environ['CONTENT_LENGTH'] = value
+        else:
+            environ['HTTP_' + name.upper().replace('-', '_')] = value
+    return environ
+
+
+def start_wsgi(environ):
+    """Вызов Flask в потоке пула: код, заголовки, первый фрагмент тела, итератор остальных"""
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+
+    result = dashboard.app(environ, start_response)
+    iterator = iter(result)
+    # Flask вызывает start_response до первого фрагмента тела
+    first = next(iterator, b'')
+    return started['status'], started['headers'], first, iterator, result
+
+
+async def call_wsgi(scope, receive, send):
+    body = b''
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get('body', b'')
+        more_body = message.get('more_body', False)
+
+    loop = asyncio.get_running_loop()
+    status, headers, chunk, iterator, result = await loop.run_in_executor(
+        wsgi_executor, start_wsgi, wsgi_environ(scope, body))
+    try:
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        # Потоковые ответы (экспорт) передаются по частям, не собираясь в памяти
+        while chunk is not None:
+            next_chunk = await loop.run_in_executor(wsgi_executor, next, iterator, None)
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': next_chunk is not None})
+            chunk = next_chunk
+    finally:
+        if hasattr(result, 'close'):
+            await loop.run_in_executor(wsgi_executor, result.close)
+
+
+async def lifespan(scope, receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            if dashboard.shared_snapshot is None:
+                start_background_refresh(dashboard.data_provider)
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            wsgi_executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """
+    ASGI-приложение панели: uvicorn asgi:app --port 5004
+
+    Те же провайдер данных и кэш графиков, что и у Flask-приложения.
+    """
+    if scope['type'] == 'lifespan':
+        return await lifespan(scope, receive, send)
+
+    if scope['type'] == 'websocket':
+        # WebSocket не поддерживается: закрытие до accept сервер отдает как 403
+        message = await receive()
+        if message['type'] == 'websocket.connect':
+            await send({'type': 'websocket.close', 'code': 1008})
+        return
+
+    if scope['type'] != 'http':
+        # По спецификации ASGI неизвестный тип соединения - исключение
+        raise ValueError(f"Unsupported ASGI scope type: {scope['type']!r}")
+
+    if scope['method'] == 'GET':
+        if scope['path'] == '/api/events':
+            return await data_events(scope, receive, send)
+
+        if not scope.get('query_string'):
+            started = time.perf_counter()
+            if dashboard.shared_snapshot is not None:
+                dashboard.shared_snapshot.refresh_if_changed()
+            payload, route = cached_payload(scope['path'])
+            if payload is not None:
+                status = await send_payload(send, payload, request_headers(scope))
+                request_seconds.observe(time.perf_counter() - started, route, 'GET', str(status))
+                return
+
+    await call_wsgi(scope, receive, send)
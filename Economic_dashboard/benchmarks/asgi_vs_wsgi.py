@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.load import (DASHBOARD_DIR, _free_port, discover_paths, generate_load, percentiles, rss_mb,
+                             start_server, stop_server, worker_pids)
+
+
+def proc_threads(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('Threads:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def wsgi_fanout(dashboard, clients):
+    """Подписчики /api/events через Flask: по потоку на клиента"""
+    received = threading.Barrier(clients + 1)
+    streams = []
+
+    def reader(response):
+        for chunk in response.response:
+            if b'data-changed' in chunk:
+                received.wait()
+                break
+
+    threads_before = threading.active_count()
+    client = dashboard.app.test_client()
+    for _ in range(clients):
+        response = client.get('/api/events', buffered=False)
+        next(iter(response.response))
+        streams.append(response)
+        threading.Thread(target=reader, args=(response,), daemon=True).start()
+
+    threads = threading.active_count() - threads_before
+    started = time.perf_counter()
+    dashboard.data_provider.update_country_data('RUS', inflation=round(time.time() % 10, 2))
+    received.wait()
+    elapsed = (time.perf_counter() - started) * 1000
+    for response in streams:
+        response.close()
+    return threads, elapsed
+
+
+def asgi_fanout(asgi, clients):
+    """Те же подписчики через ASGI-приложение: задачи asyncio в одном потоке"""
+    dashboard = asgi.dashboard
+
+    async def run():
+        delivered = asyncio.Event()
+        count = 0
+        disconnect = asyncio.Event()
+
+        async def receive():
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            nonlocal count
+            if b'data-changed' in message.get('body', b''):
+                count += 1
+                if count == clients:
+                    delivered.set()
+
+        scope = {'type': 'http', 'method': 'GET', 'path': '/api/events', 'query_string': b'', 'headers': []}
+        threads_before = threading.active_count()
+        tasks = [asyncio.ensure_future(asgi.app(scope, receive, send)) for _ in range(clients)]
+        await asyncio.sleep(0.5)
+        threads = threading.active_count() - threads_before
+
+        started = time.perf_counter()
+        await asyncio.get_running_loop().run_in_executor(
+            None, lambda: dashboard.data_provider.update_country_data('RUS', inflation=round(time.time() % 10, 2)))
+        await delivered.wait()
+        elapsed = (time.perf_counter() - started) * 1000
+
+        disconnect.set()
+        await asyncio.gather(*tasks)
+        return threads, elapsed
+
+    return asyncio.run(run())
+
+
+def open_sse_clients(port, clients, timeout=5.0):
+    """Сколько клиентов /api/events сервер успел принять за timeout секунд"""
+    sockets = []
+    connected = 0
+    deadline = time.monotonic() + timeout
+    for _ in range(clients):
+        sock = socket.create_connection(('127.0.0.1', port), timeout=timeout)
+        sock.sendall(b'GET /api/events HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n')
+        sockets.append(sock)
+
+    for sock in sockets:
+        sock.settimeout(max(0.01, deadline - time.monotonic()))
+        try:
+            if b'event: hello' in sock.recv(4096) or b'event: hello' in sock.recv(4096):
+                connected += 1
+        except OSError:
+            pass
+    return sockets, connected
+
+
+def start_asgi_server(port):
+    command = ['uvicorn', 'asgi:app', '--port', str(port), '--log-level', 'warning']
+    process = subprocess.Popen(command, cwd=DASHBOARD_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.send_signal(signal.SIGTERM)
+    raise RuntimeError('uvicorn не запустился')
+
+
+def bench_servers(dashboard, sse_clients, concurrency, total_requests):
+    """Один процесс ASGI (uvicorn) против одного воркера WSGI под одинаковой нагрузкой"""
+    paths = [path for route_paths in discover_paths(dashboard).values() for path in route_paths]
+    results = {}
+
+    for mode in ('wsgi', 'asgi'):
+        port = _free_port()
+        if mode == 'wsgi':
+            process, kind = start_server(1, port)
+            pid = (worker_pids(process.pid) or [process.pid])[0]
+        else:
+            process, kind = start_asgi_server(port), 'uvicorn'
+            pid = process.pid
+        try:
+            generate_load(port, paths, concurrency, len(paths))
+            sockets, connected = open_sse_clients(port, sse_clients)
+            timings, errors, elapsed = generate_load(port, paths, concurrency, total_requests)
+            results[mode] = dict(percentiles(timings), server=kind, rps=round(total_requests / elapsed, 1),
+                                 errors=errors, sse_connected=connected, threads=proc_threads(pid), rss_mb=rss_mb(pid))
+            for sock in sockets:
+                sock.close()
+        finally:
+            stop_server(process)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Сравнение ASGI и WSGI режимов панели')
+    parser.add_argument('--clients', type=int, default=500, help='подписчиков /api/events')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    import asgi
+    dashboard = asgi.dashboard
+
+    print(f"📡 Рассылка события {args.clients} подписчикам в одном процессе")
+    threads, elapsed = wsgi_fanout(dashboard, args.clients)
+    print(f"   WSGI: потоков {threads}, доставка всем за {elapsed:.1f} мс")
+    threads, elapsed = asgi_fanout(asgi, args.clients)
+    print(f"   ASGI: потоков {threads}, доставка всем за {elapsed:.1f} мс")
+
+    if not shutil.which('uvicorn'):
+        print("\nℹ️ uvicorn не установлен, сравнение серверов пропущено (pip install uvicorn)")
+        return True
+
+    results = bench_servers(dashboard, args.clients, args.concurrency, args.requests)
+    print(f"\n🚀 Один процесс, {args.clients} открытых /api/events + {args.concurrency} потоков нагрузки")
+    for mode, r in results.items():
+        print(f"   {mode} ({r['server']}): p50 {r['p50']:.2f} мс, p95 {r['p95']:.2f} мс, {r['rps']:.0f} req/s, "
+              f"ошибок {r['errors']}, SSE подключено {r['sse_connected']}, потоков {r['threads']}, "
+              f"RSS {r['rss_mb']} МБ")
+    return True
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
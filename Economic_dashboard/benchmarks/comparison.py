@@ -0,0 +1,67 @@
+import os
+import statistics
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.page_latency import measure
+
+
+def synthetic_records(country_count, years=range(1990, 2025), seed=0):
+    """Записи для country_count стран в формате провайдера"""
+    rng = np.random.default_rng(seed)
+    records = {}
+    for i in range(country_count):
+        base = rng.uniform(0.01, 20)
+        growth = rng.normal(1.03, 0.03, len(years)).cumprod()
+        records[f'C{i:03d}'] = {
+            'gdp_data': [{'year': year, 'gdp_trillion': round(float(base * g), 2)} for year, g in zip(years, growth)],
+            'inflation': 3.0, 'unemployment': 5.0, 'population': round(float(rng.uniform(1, 1400)), 1),
+            'gdp_rank': None, 'gdp_per_capita_rank': None, 'world_gdp_share': None
+        }
+    return records
+
+
+def scan_compare(store, country_codes, year):
+    """Прежний способ: обход всех стран и сортировка при каждом запросе"""
+    derived = store.derived
+    values = {}
+    for country_code in store.countries:
+        row = derived.loc[(country_code, year)]
+        values[country_code] = row['gdp_per_capita']
+    ranking = sorted(values, key=values.get, reverse=True)
+    return [(code, values[code], ranking.index(code) + 1) for code in country_codes]
+
+
+def main(country_count=300, selected=20, iterations=50):
+    from data_provider import SimpleCountryDataProvider
+    from derived_indicators import DerivedIndicators
+
+    provider = SimpleCountryDataProvider()
+    provider.publish(synthetic_records(country_count))
+    store = provider.store
+
+    derived = DerivedIndicators(store)
+    country_codes = store.countries[::max(1, country_count // selected)][:selected]
+
+    indexed = derived.ranks.compare('gdp_per_capita', 2020, country_codes)[2]
+    scanned = sorted(scan_compare(store, country_codes, 2020), key=lambda row: row[2])
+    ok = [(code, rank) for code, _, rank in indexed] == [(code, rank) for code, _, rank in scanned]
+
+    index_p50 = statistics.median(measure(lambda: derived.ranks.compare('gdp_per_capita', 2020, country_codes),
+                                          iterations))
+    scan_p50 = statistics.median(measure(lambda: scan_compare(store, country_codes, 2020), iterations))
+    build_p50 = statistics.median(measure(lambda: DerivedIndicators(store), 5))
+
+    print(f"🌍 Стран: {country_count}, в сравнении: {len(country_codes)}")
+    print(f"   обход и сортировка: p50 {scan_p50:.3f} мс")
+    print(f"   готовый рейтинг:    p50 {index_p50:.3f} мс")
+    print(f"   построение рейтингов (раз на снимок): p50 {build_p50:.1f} мс")
+    print("✅ Места совпадают с полным пересчетом" if ok else "❌ Места расходятся с полным пересчетом")
+    return ok
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
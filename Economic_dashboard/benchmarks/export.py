@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.comparison import synthetic_records
+from benchmarks.history import monthly_history
+
+
+def measure_export(produce):
+    """(размер в МБ, время в мс, пик выделенной памяти в МБ)"""
+    started = time.perf_counter()
+    size = sum(len(chunk) for chunk in produce())
+    elapsed = (time.perf_counter() - started) * 1000
+
+    # Память - отдельным проходом: tracemalloc заметно замедляет выполнение
+    tracemalloc.start()
+    for _ in produce():
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / 2 ** 20, elapsed, peak / 2 ** 20
+
+
+def main(country_count=300, months=480, chunk_rows=5000):
+    """
+    Выгрузка длинной истории всех стран: потоковая по фрагментам против
+    сборки всей таблицы и одного CSV в памяти
+    """
+    from data_provider import SimpleCountryDataProvider
+    from export import DataExport
+
+    records = synthetic_records(country_count)
+    history = monthly_history(months)
+    for record in records.values():
+        record['gdp_history'] = history
+
+    provider = SimpleCountryDataProvider()
+    provider.publish(records)
+    store = provider.store
+    export = DataExport(store, 'history', chunk_rows=chunk_rows)
+
+    def whole_csv():
+        yield store.history.to_csv(index=False, lineterminator='\n').encode('utf-8')
+
+    streamed_rows = sum(chunk.count(b'\n') for chunk in export.iter_csv()) - 1
+    ok = streamed_rows == country_count * months
+
+    print(f"📤 Выгрузка истории: {country_count} стран x {months} месяцев = {country_count * months} строк")
+    for label, produce in (('одним CSV в памяти', whole_csv), ('потоковый CSV', export.iter_csv),
+                           ('потоковый NDJSON', export.iter_ndjson)):
+        size, elapsed, peak = measure_export(produce)
+        print(f"   {label:<20} {size:7.1f} МБ за {elapsed:7.0f} мс ({size / elapsed * 1000:5.1f} МБ/с), "
+              f"пик памяти {peak:6.1f} МБ")
+    print("✅ Все строки выгружены" if ok else f"❌ Выгружено {streamed_rows} строк")
+    return ok
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.page_latency import measure
+
+
+def validate_specs(dashboard):
+    """Графики из шаблонов-словарей должны совпадать с JSON, который строит Plotly"""
+    mismatches = []
+    for endpoint, builders in dashboard.FIGURE_BUILDERS.items():
+        country_codes = [None] if endpoint == 'countries-comparison' else list(dashboard.data_provider.countries_info)
+        for country_code in country_codes:
+            if json.loads(builders['plotly'](country_code)) != json.loads(builders['spec'](country_code)):
+                mismatches.append((endpoint, country_code))
+    return mismatches
+
+
+def run_under_load(builder, country_codes, threads, iterations):
+    """Пропускная способность построителя при параллельных вызовах из threads потоков"""
+    jobs = [country_codes[i % len(country_codes)] for i in range(iterations)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(builder, jobs))
+    return iterations / (time.perf_counter() - started)
+
+
+def main(iterations=200, threads=8):
+    import app as dashboard
+
+    mismatches = validate_specs(dashboard)
+    if mismatches:
+        print(f"❌ Шаблоны расходятся с Plotly: {mismatches}")
+        return False
+    print("✅ Шаблоны-словари совпадают с JSON Plotly для всех графиков и стран")
+
+    country_codes = list(dashboard.data_provider.countries_info)
+    for endpoint, builders in dashboard.FIGURE_BUILDERS.items():
+        codes = [None] if endpoint == 'countries-comparison' else country_codes
+        print(f"\n📊 {endpoint}")
+        for mode in ('plotly', 'spec'):
+            builder = builders[mode]
+            timings = measure(lambda: builder(codes[0]), iterations)
+            throughput = run_under_load(builder, codes, threads, iterations)
+            print(f"   {mode:>6}: p50 {statistics.median(timings):.3f} мс, "
+                  f"{threads} потоков: {throughput:.0f} графиков/с")
+    return True
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
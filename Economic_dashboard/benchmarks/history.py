@@ -0,0 +1,61 @@
+import copy
+import os
+import statistics
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.page_latency import measure
+
+
+def monthly_history(months, seed=0):
+    """Синтетическая помесячная история ВВП длиной months точек"""
+    rng = np.random.default_rng(seed)
+    dates = np.arange(np.datetime64('2024-12', 'M') - months + 1, np.datetime64('2025-01', 'M'))
+    values = 5 + np.cumsum(rng.normal(0.01, 0.05, months))
+    return [{'date': str(date.astype('datetime64[D]')), 'gdp_trillion': float(value)}
+            for date, value in zip(dates, values)]
+
+
+def main(lengths=(120, 1200, 6000, 24000), iterations=20):
+    """
+    Размер и время построения графика ВВП при росте истории:
+    без прореживания размер растет с длиной ряда, с LTTB остается ограниченным
+    """
+    import app as dashboard
+
+    max_points = dashboard.app.config['CHART_MAX_POINTS']
+    limit = dashboard.app.config['CHART_MAX_POINTS_LIMIT']
+    print(f"{'точек':>8} {'полный, КБ':>12} {'полный, мс':>11} {'LTTB, КБ':>10} {'LTTB, мс':>9}")
+
+    ok = True
+    for length in lengths:
+        records = copy.deepcopy(dashboard.data_provider.country_data)
+        records['USA']['gdp_history'] = monthly_history(length)
+        dashboard.data_provider.publish(records)
+
+        def build(window=None):
+            return dashboard.chart_specs.gdp_chart(*dashboard.gdp_chart_inputs('USA', window))
+
+        reduced_size = len(build())
+        reduced_p50 = statistics.median(measure(build, iterations))
+        # Без прореживания - только в пределах допустимого max_points
+        if length <= limit:
+            full_window = (None, None, limit)
+            full_size = f'{len(build(full_window)) / 1024:.1f}'
+            full_p50 = f'{statistics.median(measure(lambda: build(full_window), iterations)):.2f}'
+        else:
+            full_size = full_p50 = '—'
+        print(f"{length:>8} {full_size:>12} {full_p50:>11} {reduced_size / 1024:>10.1f} {reduced_p50:>9.2f}")
+
+        points = len(dashboard.gdp_chart_inputs('USA')[1])
+        ok = ok and points <= max_points
+
+    print(f"\n{'✅' if ok else '❌'} Размер графика ограничен {max_points} точками при любой длине истории")
+    return ok
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,367 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import http.client
+import json
+import os
+import platform
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+DASHBOARD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DASHBOARD_DIR)
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Маршруты, которые не отвечают разовым запросом (потоки событий и т.п.)
+SKIP_ENDPOINTS = {'static', 'data_events'}
+
+# Параметры запроса для маршрутов без аргументов в пути
+DEFAULT_QUERY = {
+    '/api/country-bundle': 'countries=USA,RUS,CHN'
+}
+
+
+def discover_paths(dashboard):
+    """Все GET-маршруты приложения с подставленными кодами стран"""
+    country_codes = list(dashboard.data_provider.countries_info)
+    routes = {}
+    for rule in dashboard.app.url_map.iter_rules():
+        if rule.endpoint in SKIP_ENDPOINTS or 'GET' not in rule.methods:
+            continue
+        if rule.arguments - {'country_code'}:
+            continue
+
+        query = DEFAULT_QUERY.get(rule.rule)
+        suffix = '?' + query if query else ''
+        if 'country_code' in rule.arguments:
+            paths = [rule.rule.replace('<country_code>', code) + suffix for code in country_codes]
+        else:
+            paths = [rule.rule + suffix]
+        routes[rule.rule] = paths
+    return routes
+
+
+def percentiles(timings):
+    ordered = sorted(timings)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {'p50': round(pick(0.50), 3), 'p95': round(pick(0.95), 3), 'p99': round(pick(0.99), 3)}
+
+
+def bench_test_client(dashboard, requests_per_route=200):
+    """
+    Задержки каждого маршрута через test_client: горячий кеш и
+    холодный (после сброса кеша графиков)
+    """
+    client = dashboard.app.test_client()
+    headers = {'Accept-Encoding': 'gzip'}
+    results = {}
+
+    for route, paths in discover_paths(dashboard).items():
+        cold = []
+        for path in paths[:5]:
+            dashboard.figure_cache.invalidate()
+            dashboard.query_cache.invalidate()
+            started = time.perf_counter()
+            client.get(path, headers=headers)
+            cold.append((time.perf_counter() - started) * 1000)
+
+        timings = []
+        errors = 0
+        started = time.perf_counter()
+        for i in range(requests_per_route):
+            request_started = time.perf_counter()
+            response = client.get(paths[i % len(paths)], headers=headers)
+            timings.append((time.perf_counter() - request_started) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+        elapsed = time.perf_counter() - started
+
+        results[route] = dict(percentiles(timings),
+                              cold_p50=round(statistics.median(cold), 3),
+                              rps=round(requests_per_route / elapsed, 1),
+                              errors=errors)
+    return results
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers, port):
+    """
+    Многопроцессный сервер: gunicorn, если установлен, иначе
+    prefork-сервер на werkzeug из benchmarks/prefork.py
+    """
+    env = dict(os.environ, PYTHONPATH=DASHBOARD_DIR)
+    if shutil.which('gunicorn'):
+        command = ['gunicorn', '-c', 'gunicorn.conf.py', '-w', str(workers),
+                   '-b', f'127.0.0.1:{port}', '--log-level', 'warning', 'app:app']
+        kind = 'gunicorn'
+    else:
+        command = [sys.executable, '-m', 'benchmarks.prefork', '--workers', str(workers), '--port', str(port)]
+        kind = 'werkzeug-prefork'
+
+    process = subprocess.Popen(command, cwd=DASHBOARD_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/')
+            if conn.getresponse().status == 200 and len(worker_pids(process.pid)) >= workers:
+                conn.close()
+                return process, kind
+        except OSError:
+            time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f'Сервер {kind} не запустился на порту {port}')
+
+
+def stop_server(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def worker_pids(parent_pid):
+    """Дочерние процессы по /proc (Linux)"""
+    pids = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # Поле ppid идет после имени процесса в скобках
+        if int(stat.rsplit(')', 1)[1].split()[1]) == parent_pid:
+            pids.append(int(entry))
+    return sorted(pids)
+
+
+def rss_mb(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def generate_load(port, paths, concurrency, total_requests):
+    """
+    Нагрузка из concurrency потоков, у каждого свое keep-alive соединение.
+    Возвращает задержки в миллисекундах, число ошибок и общее время.
+    """
+    def worker(index):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        timings, errors = [], 0
+        for i in range(index, total_requests, concurrency):
+            started = time.perf_counter()
+            try:
+                conn.request('GET', paths[i % len(paths)], headers={'Accept-Encoding': 'gzip'})
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    errors += 1
+                if response.will_close:
+                    conn.close()
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                conn.close()
+            timings.append((time.perf_counter() - started) * 1000)
+        conn.close()
+        return timings, errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    timings = [t for worker_timings, _ in results for t in worker_timings]
+    return timings, sum(errors for _, errors in results), elapsed
+
+
+def bench_server(dashboard, workers=4, concurrency=16, total_requests=2000):
+    """Смешанная нагрузка по всем маршрутам на настоящий многопроцессный сервер"""
+    paths = [path for route_paths in discover_paths(dashboard).values() for path in route_paths]
+    port = _free_port()
+    process, kind = start_server(workers, port)
+    try:
+        # Прогрев: каждый воркер строит свои графики
+        generate_load(port, paths, concurrency, len(paths) * workers)
+        timings, errors, elapsed = generate_load(port, paths, concurrency, total_requests)
+        pids = worker_pids(process.pid)
+        memory = {str(pid): rss_mb(pid) for pid in pids}
+    finally:
+        stop_server(process)
+
+    return dict(percentiles(timings),
+                server=kind,
+                workers=workers,
+                concurrency=concurrency,
+                requests=total_requests,
+                rps=round(total_requests / elapsed, 1),
+                errors=errors,
+                rss_mb_per_worker=sorted(v for v in memory.values() if v is not None))
+
+
+def host_fingerprint():
+    """Процессор, число ядер и версия Python: абсолютные задержки сравнимы только на том же хосте"""
+    cpu_model = platform.processor() or platform.machine()
+    try:
+        with open('/proc/cpuinfo', encoding='utf-8') as f:
+            cpu_model = next((line.split(':', 1)[1].strip() for line in f if line.startswith('model name')),
+                             cpu_model)
+    except OSError:
+        pass
+    return {
+        'cpu': cpu_model,
+        'cpu_count': os.cpu_count(),
+        'python': f'{platform.python_implementation()} {platform.python_version()}'
+    }
+
+
+def host_speed_factor(results, baseline):
+    """
+    Во сколько раз этот хост медленнее эталонного: медиана отношений p50
+    по всем маршрутам этого же прогона. Регрессия отдельного маршрута
+    выделяется на фоне остальных, общее замедление всех маршрутов - нет.
+    """
+    ratios = [current['p50'] / reference['p50']
+              for route, current in results.get('test_client', {}).items()
+              for reference in [baseline.get('test_client', {}).get(route)]
+              if reference and reference['p50'] > 0]
+    return statistics.median(ratios) if ratios else 1.0
+
+
+def compare(results, baseline, tolerance=0.25, min_delta_ms=0.5):
+    """
+    Регрессии относительно сохраненного эталона: p95 выросла больше чем на
+    tolerance (и больше чем на min_delta_ms) или RPS упал больше чем на tolerance.
+
+    Если эталон снят на другом хосте, задержки test_client сравниваются с
+    поправкой на скорость хоста (host_speed_factor), а сервер - не сравнивается.
+    Эталон без описания хоста не сравнивается вовсе: это ошибка, а не пропуск.
+    """
+    if not baseline.get('host'):
+        return ['эталон без описания хоста - перезапишите его на этой машине (--save-baseline)']
+
+    regressions = []
+
+    same_host = results.get('host') == baseline.get('host')
+    factor = 1.0 if same_host else host_speed_factor(results, baseline)
+    if not same_host:
+        print(f"\n⚠️ Эталон снят на другом хосте ({baseline.get('host') or 'неизвестно'}), "
+              f"задержки сравниваются с поправкой x{factor:.2f}, сервер не сравнивается")
+
+    for route, current in results.get('test_client', {}).items():
+        reference = baseline.get('test_client', {}).get(route)
+        if not reference:
+            continue
+        reference_p95 = round(reference['p95'] * factor, 3)
+        if current['p95'] > reference_p95 * (1 + tolerance) and current['p95'] - reference_p95 > min_delta_ms:
+            regressions.append(f"{route}: p95 {reference_p95} → {current['p95']} мс")
+        if current['errors'] > reference['errors']:
+            regressions.append(f"{route}: ошибок {reference['errors']} → {current['errors']}")
+
+    current, reference = results.get('server'), baseline.get('server')
+    if same_host and current and reference and current['workers'] == reference['workers']:
+        if current['rps'] < reference['rps'] * (1 - tolerance):
+            regressions.append(f"server: RPS {reference['rps']} → {current['rps']}")
+        if current['p95'] > reference['p95'] * (1 + tolerance) and current['p95'] - reference['p95'] > min_delta_ms:
+            regressions.append(f"server: p95 {reference['p95']} → {current['p95']} мс")
+        if current['errors'] > reference['errors']:
+            regressions.append(f"server: ошибок {reference['errors']} → {current['errors']}")
+
+    return regressions
+
+
+def print_report(results):
+    if 'test_client' in results:
+        print("🧪 test_client (мс)")
+        print(f"   {'маршрут':<44} {'p50':>8} {'p95':>8} {'p99':>8} {'холодный':>9} {'req/s':>9}")
+        for route, r in results['test_client'].items():
+            print(f"   {route:<44} {r['p50']:>8.3f} {r['p95']:>8.3f} {r['p99']:>8.3f} "
+                  f"{r['cold_p50']:>9.3f} {r['rps']:>9.1f}" + (f"  ❌ ошибок: {r['errors']}" if r['errors'] else ''))
+
+    if 'server' in results:
+        r = results['server']
+        print(f"\n🚀 {r['server']}, воркеров: {r['workers']}, потоков нагрузки: {r['concurrency']}")
+        print(f"   p50 {r['p50']:.3f} мс, p95 {r['p95']:.3f} мс, p99 {r['p99']:.3f} мс, "
+              f"{r['rps']:.1f} req/s, ошибок: {r['errors']}")
+        print(f"   RSS воркеров (МБ): {', '.join(str(v) for v in r['rss_mb_per_worker'])}")
+
+
+def best_round(rounds):
+    """Прогон с наименьшей p95 (ошибки любого прогона не теряются)"""
+    rounds = list(rounds)
+    best = dict(min(rounds, key=lambda r: r['p95']))
+    best['errors'] = max(r['errors'] for r in rounds)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Нагрузочное тестирование API панели')
+    parser.add_argument('--mode', choices=('client', 'server', 'all'), default='all')
+    parser.add_argument('--requests-per-route', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=3,
+                        help='прогонов каждого замера; берется прогон с наименьшей p95')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='записать результаты как эталон')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='допустимое ухудшение (доля)')
+    args = parser.parse_args(argv)
+
+    import app as dashboard
+
+    results = {'host': host_fingerprint()}
+    if args.mode in ('client', 'all'):
+        # Шум (сборка мусора, соседние процессы) только увеличивает задержки,
+        # поэтому лучший из нескольких прогонов - устойчивая оценка и для эталона, и для сравнения
+        rounds = [bench_test_client(dashboard, args.requests_per_route) for _ in range(max(args.rounds, 1))]
+        results['test_client'] = {route: best_round(r[route] for r in rounds) for route in rounds[0]}
+    if args.mode in ('server', 'all'):
+        results['server'] = best_round(bench_server(dashboard, args.workers, args.concurrency, args.requests)
+                                       for _ in range(max(args.rounds, 1)))
+    print_report(results)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Эталон сохранен в {args.baseline}")
+        return True
+
+    if not os.path.exists(args.baseline):
+        print("\nℹ️ Эталон не найден, сравнение пропущено (--save-baseline)")
+        return True
+
+    with open(args.baseline, encoding='utf-8') as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    for regression in regressions:
+        print(f"❌ {regression}")
+    if not regressions:
+        print("\n✅ Регрессий относительно эталона нет")
+    return not regressions
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
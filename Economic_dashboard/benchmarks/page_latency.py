@@ -0,0 +1,57 @@
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def measure(func, iterations):
+    """Время выполнения func() в миллисекундах для каждой итерации"""
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main(iterations=500):
+    """
+    Проверка, что GET / не включает компиляцию шаблона: во время запросов
+    Jinja не вызывается, а медиана ответа меньше медианы компиляции.
+    """
+    import app as dashboard
+
+    jinja_env = dashboard.app.jinja_env
+    client = dashboard.app.test_client()
+
+    compile_times = measure(lambda: jinja_env.from_string(dashboard.EMBEDDED_HTML).render(), 50)
+
+    compile_calls = []
+    original_compile = jinja_env.compile
+
+    def counting_compile(*args, **kwargs):
+        compile_calls.append(args)
+        return original_compile(*args, **kwargs)
+
+    jinja_env.compile = counting_compile
+    try:
+        request_times = measure(lambda: client.get('/', headers={'Accept-Encoding': 'gzip'}), iterations)
+    finally:
+        jinja_env.compile = original_compile
+
+    compile_p50 = statistics.median(compile_times)
+    request_p50 = statistics.median(request_times)
+    print(f"🧩 Компиляция и отрисовка шаблона: p50 {compile_p50:.3f} мс")
+    print(f"🌐 GET /: p50 {request_p50:.3f} мс, "
+          f"p95 {statistics.quantiles(request_times, n=20)[-1]:.3f} мс ({iterations} запросов)")
+    print(f"🔍 Вызовов компиляции Jinja во время запросов: {len(compile_calls)}")
+
+    ok = not compile_calls and request_p50 < compile_p50
+    print("✅ Компиляция шаблона не входит в время ответа" if ok else "❌ Страница компилируется на запросе")
+    return ok
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
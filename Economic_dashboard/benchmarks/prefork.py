@@ -0,0 +1,50 @@
+import argparse
+import os
+import signal
+import socket
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def serve(host, port, workers):
+    """
+    Простой prefork-сервер на werkzeug для замеров без gunicorn:
+    один слушающий сокет и workers дочерних процессов.
+    """
+    from werkzeug.serving import make_server
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+    sock.set_inheritable(True)
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            import app as dashboard
+            server = make_server(host, port, dashboard.app, threaded=True, fd=sock.fileno())
+            server.serve_forever()
+            os._exit(0)
+        children.append(pid)
+
+    def shutdown(signum, frame):
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    for pid in children:
+        os.waitpid(pid, 0)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Prefork-сервер панели для нагрузочных тестов')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5004)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers)
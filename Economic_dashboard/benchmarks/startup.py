@@ -0,0 +1,161 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.load import DASHBOARD_DIR
+
+# Модули, которые не должны загружаться при старте с настройками по умолчанию
+LAZY_MODULES = ['plotly', 'requests', 'asyncio', 'pyarrow']
+
+FIRST_RESPONSE_SCRIPT = '''
+import app
+response = app.app.test_client().get({path!r})
+assert response.status_code == 200, response.status_code
+print('ready', flush=True)
+'''
+
+# Воркер gunicorn: модули предзагружены в мастере (preload), воркер создается через fork
+PRELOADED_WORKER_SCRIPT = '''
+import os, time
+from preload import preload
+preload()
+started = time.perf_counter()
+pid = os.fork()
+if pid == 0:
+    import app
+    response = app.app.test_client().get({path!r})
+    print(f'{{(time.perf_counter() - started) * 1000:.1f}}', flush=True)
+    os._exit(0 if response.status_code == 200 else 1)
+os.waitpid(pid, 0)
+'''
+
+
+def _env():
+    env = dict(os.environ)
+    for name in ('DASHBOARD_CHART_BUILDER', 'DASHBOARD_CHART_BUILDERS', 'DASHBOARD_DATA_SOURCE',
+                 'DASHBOARD_SNAPSHOT_PATH'):
+        env.pop(name, None)
+    return env
+
+
+def import_profile():
+    """
+    Разбор вывода python -X importtime -c 'import app':
+    [(модуль, собственное время мс, суммарное время мс, глубина)]
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=DASHBOARD_DIR,
+                            env=_env(), capture_output=True, text=True, check=True)
+    profile = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        profile.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000, depth))
+    return profile
+
+
+def loaded_modules():
+    """Пакеты верхнего уровня, загруженные после import app (неудачные попытки импорта не считаются)"""
+    script = "import sys, app; print(*sorted({name.split('.')[0] for name in sys.modules}))"
+    result = subprocess.run([sys.executable, '-c', script], cwd=DASHBOARD_DIR, env=_env(),
+                            capture_output=True, text=True, check=True)
+    return set(result.stdout.split())
+
+
+def importers(profile, module):
+    """Модули, которые импортируют module при старте (вывод importtime: родитель идет после вложенных)"""
+    found = []
+    for index, (name, _, _, depth) in enumerate(profile):
+        if name != module:
+            continue
+        parent = next((other for other, _, _, other_depth in profile[index + 1:] if other_depth == depth - 1),
+                      None)
+        found.append(parent or 'app')
+    return found
+
+
+def is_dashboard_module(name):
+    return os.path.exists(os.path.join(DASHBOARD_DIR, name.split('.')[0] + '.py'))
+
+
+def time_to_first_response(path, runs):
+    """Время от запуска процесса до первого ответа path (мс), по runs запускам"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        process = subprocess.Popen([sys.executable, '-c', FIRST_RESPONSE_SCRIPT.format(path=path)],
+                                   cwd=DASHBOARD_DIR, env=_env(), stdout=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL, text=True)
+        line = process.stdout.readline()
+        elapsed = (time.perf_counter() - started) * 1000
+        process.wait()
+        if line.strip() != 'ready':
+            raise RuntimeError(f'{path}: процесс завершился без ответа (код {process.returncode})')
+        timings.append(elapsed)
+    return timings
+
+
+def preloaded_worker_boot(path, runs):
+    """Время от fork предзагруженного мастера до первого ответа воркера (мс)"""
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', PRELOADED_WORKER_SCRIPT.format(path=path)],
+                                cwd=DASHBOARD_DIR, env=_env(), capture_output=True, text=True, check=True)
+        timings.append(float(result.stdout.strip()))
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Время старта панели и профиль импортов')
+    parser.add_argument('--path', default='/api/country-bundle/USA', help='первый запрос')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=12, help='сколько модулей показать')
+    parser.add_argument('--target-ms', type=float, default=1000,
+                        help='допустимая медиана времени до первого ответа')
+    args = parser.parse_args(argv)
+
+    profile = import_profile()
+    total = next(cumulative for name, _, cumulative, depth in profile if name == 'app' and depth == 0)
+    print(f"📚 import app: {total:.0f} мс (python -X importtime)")
+    for name, self_ms, cumulative, depth in sorted(profile, key=lambda row: -row[2])[1:args.top + 1]:
+        print(f"   {'  ' * (depth - 1)}{name:<{40 - 2 * (depth - 1)}} {cumulative:7.1f} мс (собственное {self_ms:.1f})")
+
+    # Ленивый модуль, загруженный сторонней библиотекой (pandas сам импортирует pyarrow, если он
+    # установлен), - предупреждение; загруженный модулями панели - ошибка
+    loaded = loaded_modules()
+    eager, dependency = [], []
+    for name in LAZY_MODULES:
+        if name not in loaded:
+            continue
+        by = importers(profile, name)
+        (eager if any(map(is_dashboard_module, by)) else dependency).append(f"{name} ({', '.join(by)})")
+
+    timings = time_to_first_response(args.path, args.runs)
+    median = statistics.median(timings)
+    print(f"\n🚀 Время до первого ответа {args.path}: p50 {median:.0f} мс, "
+          f"мин {min(timings):.0f} мс (цель {args.target_ms:.0f} мс)")
+    worker = preloaded_worker_boot(args.path, args.runs)
+    print(f"   воркер после fork предзагруженного мастера: p50 {statistics.median(worker):.0f} мс")
+
+    ok = True
+    if dependency:
+        print(f"⚠️ Сторонние библиотеки загружают при старте: {', '.join(dependency)}")
+    if eager:
+        print(f"❌ При старте загружаются модули, которые должны быть ленивыми: {', '.join(eager)}")
+        ok = False
+    if median > args.target_ms:
+        print("❌ Время до первого ответа больше цели")
+        ok = False
+    if ok:
+        print("✅ Ленивые модули не загружаются, время до первого ответа в пределах цели")
+    return ok
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,110 @@
+import json
+
+from metrics import serialize_seconds
+
+# Шаблоны графиков в виде обычных словарей: тот же JSON, что дает Plotly,
+# но без построения объектов go.Figure и проверки валидаторами.
+# Соответствие Plotly проверяется в benchmarks/figure_paths.py.
+
+BASE_LAYOUT = {
+    'plot_bgcolor': 'rgba(0,0,0,0)',
+    'paper_bgcolor': 'rgba(0,0,0,0)',
+    'font': {'family': 'Arial, sans-serif', 'size': 12},
+    'margin': {'l': 50, 'r': 50, 't': 50, 'b': 50}
+}
+
+GRID_AXIS = {'showgrid': True, 'gridwidth': 1, 'gridcolor': 'rgba(128,128,128,0.2)'}
+
+_template_json = None
+
+
+def template_json():
+    """Шаблон оформления Plotly по умолчанию, сериализованный один раз"""
+    global _template_json
+    if _template_json is None:
+        import plotly.io as pio
+        import plotly.utils
+
+        template = pio.templates[pio.templates.default]
+        _template_json = json.dumps(template.to_plotly_json(), cls=plotly.utils.PlotlyJSONEncoder)
+    return _template_json
+
+
+def serialize_spec(data, layout):
+    # Шаблон вставляется готовой строкой в конец layout, не проходя через json.dumps
+    template = template_json()
+    with serialize_seconds.time('spec'):
+        body = json.dumps({'data': data, 'layout': layout})
+        return body[:-2] + ', "template": ' + template + '}}'
+
+
+def _layout(title, x_title, y_title, x_extra=None, y_extra=None, **extra):
+    layout = dict(BASE_LAYOUT, **extra)
+    layout['title'] = {'text': title}
+    layout['xaxis'] = dict({'title': {'text': x_title}}, **(x_extra or {}))
+    layout['yaxis'] = dict({'title': {'text': y_title}}, **(y_extra or {}))
+    return layout
+
+
+def gdp_chart(country_name, years, values):
+    data = [{
+        'type': 'scatter',
+        'x': years,
+        'y': values,
+        'mode': 'lines+markers',
+        'name': 'ВВП ' + country_name,
+        'line': {'color': '#1f77b4', 'width': 3},
+        'marker': {'size': 8},
+        'hovertemplate': '<b>%{x}</b><br>ВВП ' + country_name + ': $%{y:.2f} трлн<extra></extra>'
+    }]
+    layout = _layout('Динамика ВВП: ' + country_name, 'Год', 'ВВП (трлн долларов)',
+                     GRID_AXIS, GRID_AXIS, hovermode='x unified')
+    return serialize_spec(data, layout)
+
+
+def indicators_chart(country_name, indicators, values, colors):
+    data = [{
+        'type': 'bar',
+        'x': indicators,
+        'y': values,
+        'name': 'Показатели ' + country_name,
+        'marker': {'color': colors},
+        'text': [str(v) + '%' if v > 0 else 'Н/Д' for v in values],
+        'textposition': 'auto',
+        'hovertemplate': '<b>%{x}</b><br>Значение: %{y:.1f}%<extra></extra>'
+    }]
+    layout = _layout('Экономические индикаторы: ' + country_name, 'Индикатор', 'Значение (%)')
+    return serialize_spec(data, layout)
+
+
+def gdp_per_capita_chart(country_name, years, values):
+    data = []
+    if years:
+        data.append({
+            'type': 'scatter',
+            'x': years,
+            'y': values,
+            'mode': 'lines+markers',
+            'name': 'ВВП на душу населения ' + country_name,
+            'line': {'color': '#2ca02c', 'width': 3},
+            'marker': {'size': 8},
+            'hovertemplate': '<b>%{x}</b><br>ВВП/чел ' + country_name + ': $%{y:,.0f}<extra></extra>'
+        })
+    layout = _layout('ВВП на душу населения: ' + country_name, 'Год', 'ВВП на душу населения (USD)',
+                     GRID_AXIS, GRID_AXIS, hovermode='x unified')
+    return serialize_spec(data, layout)
+
+
+def comparison_chart(countries, gdp_values, colors):
+    data = [{
+        'type': 'bar',
+        'x': countries,
+        'y': gdp_values,
+        'name': 'ВВП по странам',
+        'marker': {'color': colors},
+        'text': [str(v) + ' трлн $' for v in gdp_values],
+        'textposition': 'auto',
+        'hovertemplate': '<b>%{x}</b><br>ВВП: $%{y:.1f} трлн<extra></extra>'
+    }]
+    layout = _layout('Сравнение ВВП стран мира', 'Страна', 'ВВП (трлн долларов)', {'tickangle': 45})
+    return serialize_spec(data, layout)
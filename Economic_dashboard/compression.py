@@ -0,0 +1,81 @@
+import gzip
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # Brotli необязателен: без него используется только gzip
+    brotli = None
+
+
+# Поддерживаемые кодировки в порядке предпочтения
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'text/html', 'text/css', 'text/plain',
+    'text/javascript', 'application/javascript', 'text/csv', 'application/x-ndjson'
+}
+
+
+def compress_body(body, encoding, level=6):
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    if encoding == 'br':
+        return brotli.compress(body, quality=min(level + 3, 11))
+    raise ValueError(f'Unsupported encoding: {encoding}')
+
+
+def compress_stream(chunks, level=6):
+    """Сжатие потокового ответа gzip по мере генерации фрагментов"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def choose_encoding(accept_encodings):
+    """Лучшая кодировка из поддерживаемых с учетом Accept-Encoding клиента"""
+    return accept_encodings.best_match(ENCODINGS)
+
+
+class Compress:
+    """
+    Сжатие ответов Flask на лету.
+
+    Ответы, уже сжатые заранее (см. CachedPayload), потоковые ответы и
+    маленькие тела не трогаются.
+    """
+
+    def __init__(self, app=None, min_size=500, level=6):
+        self.min_size = min_size
+        self.level = level
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.after_request(self.after_request)
+
+    def after_request(self, response):
+        if (response.status_code != 200
+                or response.direct_passthrough
+                or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        body = response.get_data()
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None or len(body) < self.min_size:
+            return response
+
+        response.set_data(compress_body(body, encoding, self.level))
+        response.headers['Content-Encoding'] = encoding
+
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f'{etag}-{encoding}', weak)
+        return response
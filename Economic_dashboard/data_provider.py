@@ -0,0 +1,376 @@
+from datetime import datetime
+import logging
+import threading
+
+from data_sources import StaticDataSource
+from data_store import CountryDataStore
+from single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Глобальное хранилище данных по странам
+countries_cache = {}
+
+
+class DataSnapshot:
+    """Неизменяемый снимок данных: исходные записи, хранилище и версии"""
+
+    __slots__ = ('records', 'store', 'version', 'country_versions', 'loaded_at', 'data_sources')
+
+    def __init__(self, records, store, version, country_versions, loaded_at, data_sources):
+        self.records = records
+        self.store = store
+        self.version = version
+        self.country_versions = country_versions
+        self.loaded_at = loaded_at
+        self.data_sources = data_sources
+
+
+class SimpleCountryDataProvider:
+    """Упрощенный провайдер данных с надежными резервными значениями"""
+
+    def __init__(self):
+        # Информация о странах
+        self.countries_info = {
+            'USA': {
+                'name': 'США', 'capital': 'Вашингтон', 'region': 'Северная Америка',
+                'income_level': 'Высокий доход', 'currency': 'Доллар США (USD)'
+            },
+            'RUS': {
+                'name': 'Россия', 'capital': 'Москва', 'region': 'Европа и Центральная Азия',
+                'income_level': 'Доход выше среднего', 'currency': 'Российский рубль (RUB)'
+            },
+            'CHN': {
+                'name': 'Китай', 'capital': 'Пекин', 'region': 'Восточная Азия и Тихий океан',
+                'income_level': 'Доход выше среднего', 'currency': 'Китайский юань (CNY)'
+            },
+            'DEU': {
+                'name': 'Германия', 'capital': 'Берлин', 'region': 'Европа и Центральная Азия',
+                'income_level': 'Высокий доход', 'currency': 'Евро (EUR)'
+            },
+            'GBR': {
+                'name': 'Великобритания', 'capital': 'Лондон', 'region': 'Европа и Центральная Азия',
+                'income_level': 'Высокий доход', 'currency': 'Фунт стерлингов (GBP)'
+            },
+            'JPN': {
+                'name': 'Япония', 'capital': 'Токио', 'region': 'Восточная Азия и Тихий океан',
+                'income_level': 'Высокий доход', 'currency': 'Японская иена (JPY)'
+            },
+            'FRA': {
+                'name': 'Франция', 'capital': 'Париж', 'region': 'Европа и Центральная Азия',
+                'income_level': 'Высокий доход', 'currency': 'Евро (EUR)'
+            },
+            'IND': {
+                'name': 'Индия', 'capital': 'Нью-Дели', 'region': 'Южная Азия',
+                'income_level': 'Доход ниже среднего', 'currency': 'Индийская рупия (INR)'
+            }
+        }
+
+        # Надежные данные основанные на реальной статистике 2024
+        self.country_data = {
+            'USA': {
+                'gdp_data': [
+                    {'year': 2020, 'gdp_trillion': 20.95},
+                    {'year': 2021, 'gdp_trillion': 23.32},
+                    {'year': 2022, 'gdp_trillion': 25.46},
+                    {'year': 2023, 'gdp_trillion': 26.85},
+                    {'year': 2024, 'gdp_trillion': 27.36}
+                ],
+                'gdp_per_capita': 82400,
+                'inflation': 3.2,
+                'unemployment': 3.7,
+                'population': 331.9,
+                'gdp_rank': 1,
+                'gdp_per_capita_rank': 8,
+                'world_gdp_share': '24.7%'
+            },
+            'RUS': {
+                'gdp_data': [
+                    {'year': 2020, 'gdp_trillion': 1.48},
+                    {'year': 2021, 'gdp_trillion': 1.78},
+                    {'year': 2022, 'gdp_trillion': 2.24},
+                    {'year': 2023, 'gdp_trillion': 2.06},
+                    {'year': 2024, 'gdp_trillion': 2.11}
+                ],
+                'gdp_per_capita': 14800,
+                'inflation': 5.9,
+                'unemployment': 3.2,
+                'population': 144.4,
+                'gdp_rank': 11,
+                'gdp_per_capita_rank': 62,
+                'world_gdp_share': '2.0%'
+            },
+            'CHN': {
+                'gdp_data': [
+                    {'year': 2020, 'gdp_trillion': 14.72},
+                    {'year': 2021, 'gdp_trillion': 17.73},
+                    {'year': 2022, 'gdp_trillion': 17.95},
+                    {'year': 2023, 'gdp_trillion': 17.89},
+                    {'year': 2024, 'gdp_trillion': 18.53}
+                ],
+                'gdp_per_capita': 13100,
+                'inflation': 0.2,
+                'unemployment': 5.2,
+                'population': 1412.0,
+                'gdp_rank': 2,
+                'gdp_per_capita_rank': 72,
+                'world_gdp_share': '17.8%'
+            },
+            'DEU': {
+                'gdp_data': [
+                    {'year': 2020, 'gdp_trillion': 3.85},
+                    {'year': 2021, 'gdp_trillion': 4.26},
+                    {'year': 2022, 'gdp_trillion': 4.26},
+                    {'year': 2023, 'gdp_trillion': 4.12},
+                    {'year': 2024, 'gdp_trillion': 4.18}
+                ],
+                'gdp_per_capita': 50200,
+                'inflation': 2.3,
+                'unemployment': 3.1,
+                'population': 83.2,
+                'gdp_rank': 4,
+                'gdp_per_capita_rank': 18,
+                'world_gdp_share': '4.0%'
+            },
+            'GBR': {
+                'gdp_data': [
+                    {'year': 2020, 'gdp_trillion': 2.76},
+                    {'year': 2021, 'gdp_trillion': 3.13},
+                    {'year': 2022, 'gdp_trillion': 3.13},
+                    {'year': 2023, 'gdp_trillion': 3.13},
+                    {'year': 2024, 'gdp_trillion': 3.18}
+                ],
+                'gdp_per_capita': 47100,
+                'inflation': 2.0,
+                'unemployment': 4.2,
+                'population': 67.5,
+                'gdp_rank': 6,
+                'gdp_per_capita_rank': 22,
+                'world_gdp_share': '3.1%'
+            },
+            'JPN': {
+                'gdp_data': [
+                    {'year': 2020, 'gdp_trillion': 4.89},
+                    {'year': 2021, 'gdp_trillion': 4.94},
+                    {'year': 2022, 'gdp_trillion': 4.94},
+                    {'year': 2023, 'gdp_trillion': 4.21},
+                    {'year': 2024, 'gdp_trillion': 4.11}
+                ],
+                'gdp_per_capita': 32700,
+                'inflation': 3.1,
+                'unemployment': 2.4,
+                'population': 125.8,
+                'gdp_rank': 3,
+                'gdp_per_capita_rank': 26,
+                'world_gdp_share': '4.3%'
+            },
+            'FRA': {
+                'gdp_data': [
+                    {'year': 2020, 'gdp_trillion': 2.60},
+                    {'year': 2021, 'gdp_trillion': 2.94},
+                    {'year': 2022, 'gdp_trillion': 2.78},
+                    {'year': 2023, 'gdp_trillion': 2.78},
+                    {'year': 2024, 'gdp_trillion': 2.81}
+                ],
+                'gdp_per_capita': 41500,
+                'inflation': 2.9,
+                'unemployment': 7.3,
+                'population': 67.8,
+                'gdp_rank': 7,
+                'gdp_per_capita_rank': 20,
+                'world_gdp_share': '2.9%'
+            },
+            'IND': {
+                'gdp_data': [
+                    {'year': 2020, 'gdp_trillion': 3.18},
+                    {'year': 2021, 'gdp_trillion': 3.39},
+                    {'year': 2022, 'gdp_trillion': 3.74},
+                    {'year': 2023, 'gdp_trillion': 3.74},
+                    {'year': 2024, 'gdp_trillion': 3.94}
+                ],
+                'gdp_per_capita': 2800,
+                'inflation': 5.1,
+                'unemployment': 3.4,
+                'population': 1380.0,
+                'gdp_rank': 5,
+                'gdp_per_capita_rank': 142,
+                'world_gdp_share': '3.7%'
+            }
+        }
+
+        # Текущий снимок заменяется целиком, поэтому читать его можно без блокировок
+        self.snapshot = DataSnapshot(
+            records=self.country_data,
+            store=CountryDataStore.from_records(self.country_data),
+            version=1,
+            country_versions={country_code: 1 for country_code in self.country_data},
+            loaded_at=datetime.now(),
+            data_sources=StaticDataSource.labels
+        )
+        self._publish_lock = threading.Lock()
+        # Запись в countries_cache и ее очистка при смене снимка
+        self._cache_lock = threading.Lock()
+        self._loads = SingleFlight()
+        self._change_listeners = []
+        self._snapshot_listeners = []
+
+    @property
+    def store(self):
+        return self.snapshot.store
+
+    @property
+    def data_version(self):
+        return self.snapshot.version
+
+    def get_data_version(self, country_code=None):
+        """Версия данных страны или общая версия, если страна не указана"""
+        snapshot = self.snapshot
+        if country_code is None:
+            return snapshot.version
+        return snapshot.country_versions.get(country_code, snapshot.version)
+
+    def add_change_listener(self, listener):
+        """Подписка на изменение данных: listener(country_code)"""
+        self._change_listeners.append(listener)
+
+    def add_snapshot_listener(self, listener):
+        """Подписка на публикацию нового снимка: listener(snapshot)"""
+        self._snapshot_listeners.append(listener)
+
+    def _notify(self, changed, snapshot):
+        # Места в рейтингах и доля в мировом ВВП в записях кэша зависят от всех стран
+        if changed:
+            with self._cache_lock:
+                countries_cache.clear()
+
+        for country_code in changed:
+            for listener in self._change_listeners:
+                listener(country_code)
+
+        for listener in self._snapshot_listeners:
+            listener(snapshot)
+
+    def publish(self, records, data_sources=None):
+        """
+        Атомарная замена снимка новыми данными.
+        Возвращает список стран, данные которых изменились.
+        """
+        with self._publish_lock:
+            current = self.snapshot
+            data_sources = data_sources or current.data_sources
+
+            # У снимка из общего файла исходных записей нет - считаем изменившимся все
+            if current.records is None or data_sources != current.data_sources:
+                changed = sorted(set(records) | set(current.country_versions))
+            else:
+                changed = sorted(country_code for country_code in set(records) | set(current.records)
+                                 if records.get(country_code) != current.records.get(country_code))
+
+            version = current.version + 1 if changed else current.version
+            country_versions = dict(current.country_versions)
+            for country_code in changed:
+                country_versions[country_code] = version
+
+            self.snapshot = DataSnapshot(
+                records=records,
+                store=CountryDataStore.from_records(records) if changed else current.store,
+                version=version,
+                country_versions=country_versions,
+                loaded_at=datetime.now(),
+                data_sources=data_sources
+            )
+            snapshot = self.snapshot
+
+        self._notify(changed, snapshot)
+        return changed
+
+    def install_snapshot(self, snapshot):
+        """Установка готового снимка, например прочитанного из общего файла"""
+        with self._publish_lock:
+            current = self.snapshot
+            changed = sorted(country_code
+                             for country_code in set(snapshot.country_versions) | set(current.country_versions)
+                             if snapshot.country_versions.get(country_code)
+                             != current.country_versions.get(country_code))
+            self.snapshot = snapshot
+
+        self._notify(changed, snapshot)
+        return changed
+
+    def update_country_data(self, country_code, **values):
+        """
+        Обновление данных страны с инвалидацией кэшей.
+
+        У снимка из общего файла исходных записей нет: собрать из встроенных
+        данных новый снимок значило бы откатить остальные страны, поэтому
+        в этом режиме данные меняет только процесс, записывающий общий файл.
+        """
+        snapshot = self.snapshot
+        if snapshot.records is None:
+            raise RuntimeError('Данные общего снимка обновляются только через его источник данных '
+                               '(DASHBOARD_DATA_SOURCE в записывающем процессе)')
+        records = dict(snapshot.records)
+        records[country_code] = dict(records.get(country_code, {}), **values)
+        self.publish(records)
+
+    def get_country_data(self, country_code):
+        """Получение данных для страны"""
+        logger.info(f"📊 Загрузка данных для {self.countries_info[country_code]['name']}...")
+
+        snapshot = self.snapshot
+        store = snapshot.store
+        source_code = country_code if country_code in store else 'USA'
+
+        years, gdp_values = store.gdp_series(source_code)
+        _, per_capita_values = store.gdp_per_capita_series(source_code)
+        indicators = store.country_indicators(source_code)
+
+        result = {
+            'gdp_data': [{'year': year, 'gdp_trillion': value} for year, value in zip(years, gdp_values)],
+            'gdp_per_capita': [{'year': year, 'gdp_per_capita': value}
+                               for year, value in zip(years, per_capita_values)],
+            'inflation': indicators['inflation'],
+            'unemployment': indicators['unemployment'],
+            'population': indicators['population'],
+            'rankings': store.country_rankings(source_code),
+            'data_sources': dict(snapshot.data_sources),
+            'last_update': snapshot.loaded_at
+        }
+
+        # Результат по устаревшему снимку в кэш не попадает
+        with self._cache_lock:
+            if self.snapshot is snapshot:
+                countries_cache[country_code] = result
+        logger.info(f"✅ Данные для {self.countries_info[country_code]['name']} загружены")
+        return result
+
+    def get_history(self, country_code, name, start=None, end=None, max_points=None):
+        """Длинный ряд 'gdp' или 'gdp_per_capita' с окном по датам и прореживанием"""
+        store = self.store
+        source_code = country_code if country_code in store else 'USA'
+        return store.history_series(source_code, name, start, end, max_points)
+
+    def load_country_data(self, country_code):
+        """
+        Данные страны из кэша; при промахе одновременные запросы одной страны
+        ждут одну общую загрузку
+        """
+        country_data = countries_cache.get(country_code)
+        if country_data is not None:
+            return country_data
+
+        key = (country_code, self.snapshot.version)
+        return self._loads.do(key, lambda: countries_cache.get(country_code)
+                              or self.get_country_data(country_code))
+
+    def load_stats(self):
+        """Счетчики загрузок: выполнено, объединено с уже идущими, ошибок"""
+        return self._loads.stats()
+
+    def get_countries_comparison(self):
+        """Получение данных для сравнения стран"""
+        latest_gdp = self.store.latest_gdp()
+
+        return {info['name']: latest_gdp[country_code]
+                for country_code, info in self.countries_info.items()
+                if country_code in latest_gdp}
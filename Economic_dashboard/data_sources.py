@@ -0,0 +1,136 @@
+import copy
+import json
+import os
+
+
+# Индикаторы World Bank, которые использует панель
+WORLD_BANK_INDICATORS = {
+    'gdp': 'NY.GDP.MKTP.CD',
+    'inflation': 'FP.CPI.TOTL.ZG',
+    'unemployment': 'SL.UEM.TOTL.ZS',
+    'population': 'SP.POP.TOTL'
+}
+
+
+def parse_world_bank_payload(payload):
+    """
+    Разбор ответа World Bank API: [метаданные, [записи]] -> {страна: {год: значение}}
+    """
+    rows = payload[1] if isinstance(payload, list) and len(payload) > 1 else payload
+    values = {}
+
+    for row in rows or []:
+        if row.get('value') is None:
+            continue
+        country_code = row.get('countryiso3code') or row['country']['id']
+        values.setdefault(country_code, {})[int(row['date'])] = float(row['value'])
+
+    return values
+
+
+def build_country_records(indicator_values, fallback):
+    """
+    Сборка записей по странам из значений индикаторов.
+    Отсутствующие показатели берутся из резервных данных.
+    """
+    records = {}
+
+    for country_code, fallback_values in fallback.items():
+        record = copy.deepcopy(fallback_values)
+
+        gdp = indicator_values.get('gdp', {}).get(country_code)
+        if gdp:
+            record['gdp_data'] = [{'year': year, 'gdp_trillion': round(value / 1e12, 2)}
+                                  for year, value in sorted(gdp.items())]
+
+        for name in ('inflation', 'unemployment'):
+            series = indicator_values.get(name, {}).get(country_code)
+            if series:
+                record[name] = round(series[max(series)], 1)
+
+        population = indicator_values.get('population', {}).get(country_code)
+        if population:
+            record['population'] = round(population[max(population)] / 1e6, 1)
+
+        records[country_code] = record
+
+    return records
+
+
+class StaticDataSource:
+    """Встроенные резервные данные"""
+
+    name = 'static'
+    labels = {
+        'gdp': 'Статистические данные 2024',
+        'inflation': 'Центральные банки',
+        'unemployment': 'Национальная статистика',
+        'api_status': 'Резервные данные'
+    }
+
+    def __init__(self, country_data):
+        self.country_data = country_data
+
+    def load(self):
+        return copy.deepcopy(self.country_data)
+
+
+class JsonFileDataSource:
+    """Файлы в формате World Bank API: <каталог>/<индикатор>.json"""
+
+    name = 'world-bank-files'
+    labels = {
+        'gdp': 'World Bank',
+        'inflation': 'World Bank',
+        'unemployment': 'World Bank',
+        'api_status': 'Локальные данные World Bank'
+    }
+
+    def __init__(self, directory, fallback):
+        self.directory = directory
+        self.fallback = fallback
+
+    def fetch_indicator(self, indicator_id):
+        with open(os.path.join(self.directory, indicator_id + '.json'), encoding='utf-8') as f:
+            return json.load(f)
+
+    def load(self):
+        indicator_values = {name: parse_world_bank_payload(self.fetch_indicator(indicator_id))
+                            for name, indicator_id in WORLD_BANK_INDICATORS.items()}
+        return build_country_records(indicator_values, self.fallback)
+
+
+class HttpDataSource(JsonFileDataSource):
+    """Те же файлы, но по HTTP: <base_url>/<индикатор>.json"""
+
+    name = 'world-bank-http'
+    labels = dict(JsonFileDataSource.labels, api_status='World Bank API')
+
+    def __init__(self, base_url, fallback, timeout=10):
+        super().__init__(None, fallback)
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        # requests загружается только для HTTP-источника: это заметная часть времени старта
+        import requests
+        self.session = requests.Session()
+
+    def fetch_indicator(self, indicator_id):
+        response = self.session.get(f'{self.base_url}/{indicator_id}.json', timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+
+def create_data_source(spec, fallback):
+    """
+    Источник по строке настройки: 'static', 'worldbank[:<базовый URL API>]',
+    URL каталога с файлами или путь к каталогу
+    """
+    if not spec or spec == 'static':
+        return StaticDataSource(fallback)
+    if spec == 'worldbank' or spec.startswith('worldbank:'):
+        from ingest import IndicatorFetcher, WorldBankApiSource, WORLD_BANK_API
+        base_url = spec.partition(':')[2] or WORLD_BANK_API
+        return WorldBankApiSource(fallback, IndicatorFetcher(base_url=base_url))
+    if spec.startswith(('http://', 'https://')):
+        return HttpDataSource(spec, fallback)
+    return JsonFileDataSource(spec, fallback)
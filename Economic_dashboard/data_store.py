@@ -0,0 +1,219 @@
+import numpy as np
+import pandas as pd
+
+from timeseries import window
+
+
+INDICATOR_COLUMNS = ['inflation', 'unemployment', 'population']
+RANKING_COLUMNS = ['gdp_rank', 'gdp_per_capita_rank', 'world_gdp_share']
+SERIES_COLUMNS = ['country', 'year', 'gdp_trillion', 'gdp_per_capita', 'gdp_change_pct',
+                  'gdp_rank', 'gdp_per_capita_rank', 'world_gdp_share']
+
+
+def derive_series(series, indicators):
+    """
+    Векторный расчет производных рядов сразу для всех стран:
+    ВВП на душу, изменение за год, места и доля в суммарном ВВП.
+    """
+    derived = series.sort_index().join(indicators[['population']].astype(float), on='country')
+    gdp = derived['gdp_trillion']
+
+    derived['gdp_per_capita'] = ((gdp * 1e12) / (derived['population'] * 1e6)).round(0)
+    derived['gdp_change_pct'] = gdp.groupby(level='country').pct_change() * 100
+    derived['gdp_rank'] = gdp.groupby(level='year').rank(ascending=False, method='min')
+    derived['gdp_per_capita_rank'] = derived['gdp_per_capita'].groupby(level='year').rank(
+        ascending=False, method='min')
+    derived['world_gdp_share'] = gdp / gdp.groupby(level='year').transform('sum') * 100
+    return derived.drop(columns='population')
+
+
+class CountryDataStore:
+    """
+    Колоночное хранилище экономических данных.
+
+    columns - массивы одинаковой длины, отсортированные по (страна, год),
+    indicators - показатели по странам, rankings - места стран.
+    Производные значения считаются векторно при создании хранилища,
+    поэтому запрос к стране - это только срез готовых массивов.
+    Массивы могут быть отображены из общего файла снимка (см. snapshot_file).
+
+    Колонки history_* хранят длинные ряды произвольной частоты (квартальные,
+    помесячные) для графиков; если их нет, историей служат годовые ряды.
+    """
+
+    def __init__(self, columns, indicators, rankings):
+        self.columns = columns
+        self.indicators = indicators
+        self.rankings = rankings
+        self._derived = None
+
+        # Срезы стран в отсортированных массивах
+        self._slices = self._country_slices(columns['country'])
+
+        self._years = columns['year']
+        self._gdp = columns['gdp_trillion']
+        self._gdp_per_capita = columns['gdp_per_capita']
+
+        if 'history_country' in columns:
+            self._history_slices = self._country_slices(columns['history_country'])
+            self._history_dates = columns['history_date']
+            self._history = {'gdp': columns['history_gdp'],
+                             'gdp_per_capita': columns['history_gdp_per_capita']}
+        else:
+            self._history_slices = self._slices
+            self._history_dates = (self._years - 1970).astype('datetime64[Y]').astype('datetime64[D]')
+            self._history = {'gdp': self._gdp, 'gdp_per_capita': self._gdp_per_capita}
+
+    @staticmethod
+    def _country_slices(country_codes):
+        codes, starts, counts = np.unique(country_codes, return_index=True, return_counts=True)
+        return {str(code): slice(int(start), int(start + count))
+                for code, start, count in zip(codes, starts, counts)}
+
+    @classmethod
+    def from_records(cls, country_data):
+        """Создание хранилища из словаря {страна: {'gdp_data': [...], ...}}"""
+        rows = [(country_code, record['year'], record['gdp_trillion'])
+                for country_code, values in country_data.items()
+                for record in values.get('gdp_data', [])]
+        series = pd.DataFrame(rows, columns=['country', 'year', 'gdp_trillion']).set_index(['country', 'year'])
+
+        indicators = pd.DataFrame.from_dict(
+            {country_code: {column: values.get(column) for column in INDICATOR_COLUMNS + RANKING_COLUMNS}
+             for country_code, values in country_data.items()},
+            orient='index'
+        )
+        indicators.index.name = 'country'
+
+        derived = derive_series(series, indicators).reset_index()
+        columns = {
+            'country': derived['country'].to_numpy().astype(str),
+            'year': derived['year'].to_numpy(dtype=np.int64)
+        }
+        for name in SERIES_COLUMNS[2:]:
+            columns[name] = derived[name].to_numpy(dtype=np.float64)
+
+        rankings = cls._build_rankings(columns, indicators)
+        columns.update(cls._build_history(country_data, indicators))
+        return cls(columns, indicators[INDICATOR_COLUMNS], rankings)
+
+    @staticmethod
+    def _build_history(country_data, indicators):
+        """
+        Колонки длинной истории: ряд 'gdp_history' ([{'date', 'gdp_trillion'}])
+        или, если его нет, годовой 'gdp_data' с датой на начало года
+        """
+        rows = []
+        for country_code, values in country_data.items():
+            if values.get('gdp_history'):
+                rows.extend((country_code, point['date'], point['gdp_trillion'])
+                            for point in values['gdp_history'])
+            else:
+                rows.extend((country_code, f"{record['year']}-01-01", record['gdp_trillion'])
+                            for record in values.get('gdp_data', []))
+
+        # Даты разбираются NumPy: у pandas диапазон дат ограничен 1677-2262 годами
+        countries = np.array([row[0] for row in rows], dtype=str)
+        dates = np.array([row[1] for row in rows], dtype='datetime64[D]')
+        gdp = np.array([row[2] for row in rows], dtype=np.float64)
+        order = np.lexsort((dates, countries))
+        countries, dates, gdp = countries[order], dates[order], gdp[order]
+        population = indicators['population'].astype(float).reindex(countries).to_numpy()
+
+        return {
+            'history_country': countries,
+            'history_date': dates,
+            'history_gdp': gdp,
+            'history_gdp_per_capita': np.round((gdp * 1e12) / (population * 1e6), 0)
+        }
+
+    @staticmethod
+    def _build_rankings(columns, indicators):
+        """Справочные места из источника, а при их отсутствии - рассчитанные"""
+        latest = pd.DataFrame({name: columns[name] for name in SERIES_COLUMNS}).groupby('country').tail(1).set_index('country')
+        computed = pd.DataFrame({
+            'gdp_rank': latest['gdp_rank'],
+            'gdp_per_capita_rank': latest['gdp_per_capita_rank'],
+            'world_gdp_share': latest['world_gdp_share'].map('{:.1f}%'.format)
+        })
+        rankings = indicators[RANKING_COLUMNS].astype(object).combine_first(computed.astype(object))
+        return {country_code: {name: (value.item() if isinstance(value, np.generic) else value)
+                               for name, value in values.items()}
+                for country_code, values in rankings.to_dict(orient='index').items()}
+
+    @property
+    def derived(self):
+        """Все ряды одной таблицей с индексом (страна, год)"""
+        if self._derived is None:
+            series = pd.DataFrame({name: self.columns[name] for name in SERIES_COLUMNS})
+            self._derived = series.set_index(['country', 'year'])
+        return self._derived
+
+    @property
+    def history(self):
+        """Длинные ряды одной таблицей: страна, дата, ВВП, ВВП на душу"""
+        countries = np.empty(len(self._history_dates), dtype=object)
+        for country_code, sl in self._history_slices.items():
+            countries[sl] = country_code
+        return pd.DataFrame({'country': countries, 'date': self._history_dates,
+                             'gdp': self._history['gdp'], 'gdp_per_capita': self._history['gdp_per_capita']})
+
+    @property
+    def countries(self):
+        return list(self._slices)
+
+    def __contains__(self, country_code):
+        return country_code in self._slices
+
+    def gdp_series(self, country_code):
+        sl = self._slices[country_code]
+        return self._years[sl].tolist(), self._gdp[sl].tolist()
+
+    def gdp_per_capita_series(self, country_code):
+        sl = self._slices[country_code]
+        return self._years[sl].tolist(), self._gdp_per_capita[sl].tolist()
+
+    def history_series(self, country_code, name, start=None, end=None, max_points=None):
+        """Длинный ряд страны: (даты, значения) в окне [start, end], не более max_points точек"""
+        sl = self._history_slices[country_code]
+        return window(self._history_dates[sl], self._history[name][sl], start, end, max_points)
+
+    def export_columns(self, history=False):
+        """Колонки для выгрузки: ключ (год или дата) и значения, без колонки стран"""
+        if history:
+            return {'date': self._history_dates, **self._history}
+        columns = {'year': self._years}
+        columns.update((name, self.columns[name]) for name in SERIES_COLUMNS[2:])
+        return columns
+
+    def row_ranges(self, country_codes=None, start=None, end=None, history=False):
+        """
+        Строки стран в колонках выгрузки: (страна, начало, конец) для ключей
+        в окне [start, end]. Ряды внутри страны отсортированы, поэтому
+        границы находятся двоичным поиском без копирования данных.
+        """
+        slices = self._history_slices if history else self._slices
+        keys = self._history_dates if history else self._years
+        for country_code in (slices if country_codes is None else country_codes):
+            sl = slices[country_code]
+            country_keys = keys[sl]
+            first = int(np.searchsorted(country_keys, start, side='left')) if start is not None else 0
+            last = int(np.searchsorted(country_keys, end, side='right')) if end is not None else len(country_keys)
+            if last > first:
+                yield country_code, sl.start + first, sl.start + last
+
+    def country_indicators(self, country_code):
+        row = self.indicators.loc[country_code, INDICATOR_COLUMNS]
+        return {column: (None if pd.isna(value) else float(value)) for column, value in row.items()}
+
+    def country_rankings(self, country_code):
+        rankings = self.rankings[country_code]
+        return {
+            'gdp_rank': int(rankings['gdp_rank']),
+            'gdp_per_capita_rank': int(rankings['gdp_per_capita_rank']),
+            'world_gdp_share': rankings['world_gdp_share']
+        }
+
+    def latest_gdp(self):
+        """Последнее значение ВВП по всем странам"""
+        return {country_code: float(self._gdp[sl.stop - 1]) for country_code, sl in self._slices.items()}
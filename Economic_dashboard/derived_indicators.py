@@ -0,0 +1,230 @@
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+def _clean(value, digits=4):
+    """Значение для JSON: NaN -> None, типы NumPy -> типы Python, округление"""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float):
+        return None if math.isnan(value) else round(value, digits)
+    return value
+
+
+# Показатели, доступные для сравнения стран: имя в API -> колонка annual
+RANKED_INDICATORS = {
+    'gdp': 'gdp_trillion',
+    'gdp_per_capita': 'gdp_per_capita',
+    'gdp_growth': 'gdp_change_pct',
+    'gdp_per_capita_growth': 'gdp_per_capita_change_pct',
+    'gdp_rolling_mean': 'gdp_rolling_mean',
+    'gdp_cagr': 'gdp_cagr_pct',
+    'world_gdp_share': 'world_gdp_share'
+}
+
+
+def cagr(first, last, periods):
+    """Среднегодовой темп роста (%) - векторно для массивов"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where((periods > 0) & (first > 0), ((last / first) ** (1 / periods) - 1) * 100, np.nan)
+
+
+class DerivedIndicators:
+    """
+    Производные показатели всех стран, рассчитанные одним векторным
+    проходом по снимку данных:
+
+    annual  - (страна, год): ВВП, ВВП на душу, изменение за год, скользящее
+              среднее, CAGR с начала ряда, доля в мировом ВВП;
+    history - длинные ряды: изменение к предыдущему периоду (QoQ для
+              квартальных, MoM для помесячных данных) и к тому же месяцу
+              прошлого года;
+    summary - последние значения по странам, CAGR за весь период и 5 лет.
+    """
+
+    def __init__(self, store, rolling_window=3):
+        self.rolling_window = rolling_window
+        self.annual = self._annual(store.derived, rolling_window)
+        self.history = self._history(store.history)
+        self.summary = self._summary(self.annual, self.history)
+        self.ranks = RankIndex(self.annual)
+
+    @staticmethod
+    def _annual(series, rolling_window):
+        annual = series[['gdp_trillion', 'gdp_per_capita', 'gdp_change_pct', 'world_gdp_share']].copy()
+        by_country = annual.groupby(level='country')
+
+        annual['gdp_per_capita_change_pct'] = by_country['gdp_per_capita'].pct_change() * 100
+        annual['gdp_rolling_mean'] = by_country['gdp_trillion'].transform(
+            lambda values: values.rolling(rolling_window, min_periods=1).mean())
+
+        years = pd.Series(annual.index.get_level_values('year'), index=annual.index)
+        first_year = years.groupby(level='country').transform('first').to_numpy()
+        first_gdp = by_country['gdp_trillion'].transform('first').to_numpy()
+        annual['gdp_cagr_pct'] = cagr(first_gdp, annual['gdp_trillion'].to_numpy(),
+                                     years.to_numpy() - first_year)
+        return annual
+
+    @staticmethod
+    def _history(history):
+        history = history.copy()
+        history['period_change_pct'] = history.groupby('country')['gdp'].pct_change() * 100
+
+        # Изменение к тому же месяцу прошлого года: соединение по (страна, месяц - 12)
+        months = history['date'].to_numpy().astype('datetime64[M]').astype(np.int64)
+        history['month'] = months
+        previous = pd.DataFrame({'country': history['country'], 'month': months + 12,
+                                 'previous_gdp': history['gdp']})
+        previous = previous.drop_duplicates(['country', 'month'], keep='last')
+        history = history.merge(previous, on=['country', 'month'], how='left')
+        history['yoy_pct'] = (history['gdp'] / history['previous_gdp'] - 1) * 100
+        return history.drop(columns=['month', 'previous_gdp'])
+
+    @staticmethod
+    def _summary(annual, history):
+        latest = annual.groupby(level='country').tail(1).reset_index(level='year')
+        first = annual.groupby(level='country').head(1).reset_index(level='year')
+
+        summary = pd.DataFrame({
+            'year': latest['year'],
+            'gdp_trillion': latest['gdp_trillion'],
+            'gdp_change_pct': latest['gdp_change_pct'],
+            'gdp_per_capita': latest['gdp_per_capita'],
+            'gdp_per_capita_change_pct': latest['gdp_per_capita_change_pct'],
+            'gdp_rolling_mean': latest['gdp_rolling_mean'],
+            'world_gdp_share': latest['world_gdp_share'],
+            'gdp_cagr_pct': latest['gdp_cagr_pct'],
+            'cagr_from_year': first['year']
+        })
+
+        # CAGR за последние 5 лет (или с начала ряда, если он короче)
+        years = annual.index.get_level_values('year').to_numpy()
+        latest_years = latest['year'].reindex(annual.index.get_level_values('country')).to_numpy()
+        start = annual[years >= latest_years - 5].groupby(level='country').head(1).reset_index(level='year')
+        summary['gdp_cagr_5y_pct'] = cagr(start['gdp_trillion'].to_numpy(), latest['gdp_trillion'].to_numpy(),
+                                          (latest['year'] - start['year']).to_numpy())
+
+        last_history = history.groupby('country').tail(1).set_index('country')
+        summary['latest_period'] = last_history['date'].astype(str)
+        summary['period_change_pct'] = last_history['period_change_pct']
+        summary['period_yoy_pct'] = last_history['yoy_pct']
+        return summary
+
+    def __contains__(self, country_code):
+        return country_code in self.summary.index
+
+    def country_summary(self, country_code):
+        return {name: _clean(value) for name, value in self.summary.loc[country_code].items()}
+
+    def country_series(self, country_code):
+        """Годовые производные ряды страны: {колонка: [значения]}"""
+        annual = self.annual.loc[country_code]
+        series = {'year': annual.index.tolist()}
+        for name in annual.columns:
+            series[name] = [_clean(value) for value in annual[name].to_numpy()]
+        return series
+
+    def all_summaries(self):
+        return {country_code: self.country_summary(country_code) for country_code in self.summary.index}
+
+
+class RankIndex:
+    """
+    Заранее отсортированные места стран для каждой пары (показатель, год).
+
+    Для пары хранятся коды стран по убыванию значения, сами значения и
+    массив мест, выровненный по общему индексу стран, поэтому сравнение
+    выбранных стран - это выборка из массива и сортировка только выбранных.
+    """
+
+    def __init__(self, annual):
+        self.countries = np.array(sorted(annual.index.get_level_values('country').unique()), dtype=object)
+        self.country_index = {country_code: i for i, country_code in enumerate(self.countries)}
+        self.years = {}
+        self._entries = {}
+
+        frame = annual.reset_index()
+        positions = frame['country'].map(self.country_index).to_numpy()
+        for indicator, column in RANKED_INDICATORS.items():
+            values = frame[column].to_numpy(dtype=np.float64)
+            years = frame['year'].to_numpy()
+            valid = ~np.isnan(values)
+            self.years[indicator] = sorted(int(year) for year in np.unique(years[valid]))
+
+            for year in self.years[indicator]:
+                mask = valid & (years == year)
+                order = np.argsort(-values[mask], kind='stable')
+                sorted_positions = positions[mask][order]
+                sorted_values = values[mask][order]
+
+                # Одинаковые значения получают одно (меньшее) место
+                ranks = np.full(len(self.countries), -1, dtype=np.int64)
+                ranks[sorted_positions] = np.searchsorted(-sorted_values, -sorted_values, side='left') + 1
+                by_country = np.full(len(self.countries), np.nan)
+                by_country[sorted_positions] = sorted_values
+                self._entries[indicator, year] = (sorted_positions, ranks, by_country)
+
+    def latest_year(self, indicator):
+        years = self.years.get(indicator)
+        return years[-1] if years else None
+
+    def compare(self, indicator, year=None, country_codes=None, limit=None):
+        """
+        Места и значения показателя за год: выбранные страны по порядку мест
+        или весь рейтинг, если страны не указаны; не больше limit строк.
+        Возвращает (год, число стран в рейтинге, [(страна, значение, место)], [страны без данных]).
+        Неизвестные коды стран - KeyError, limit меньше 1 - ValueError.
+        """
+        if limit is not None and limit < 1:
+            raise ValueError(f'Invalid limit: {limit!r}')
+        if indicator not in RANKED_INDICATORS:
+            raise KeyError(f'Unknown indicator: {indicator}')
+        year = self.latest_year(indicator) if year is None else year
+        if (indicator, year) not in self._entries:
+            raise KeyError(f'No {indicator} data for {year}')
+
+        sorted_positions, ranks, by_country = self._entries[indicator, year]
+        missing = []
+        if country_codes is None:
+            positions = sorted_positions
+        else:
+            unknown = [code for code in country_codes if code not in self.country_index]
+            if unknown:
+                raise KeyError(f"Unknown countries: {', '.join(unknown)}")
+            known = np.array([self.country_index[code] for code in country_codes], dtype=np.int64)
+            ranked = ranks[known] > 0
+            missing = [code for code, ok in zip(country_codes, ranked) if not ok]
+            positions = known[ranked]
+            positions = positions[np.argsort(ranks[positions], kind='stable')]
+
+        positions = positions[:limit]
+        rows = [(self.countries[position], float(by_country[position]), int(ranks[position]))
+                for position in positions]
+        return year, len(sorted_positions), rows, missing
+
+
+class DerivedIndicatorsCache:
+    """Производные показатели текущего снимка; пересчет только при смене версии"""
+
+    def __init__(self, provider, rolling_window=3):
+        self.provider = provider
+        self.rolling_window = rolling_window
+        # (версия, показатели) заменяются одной парой, поэтому читаются без блокировки
+        self._entry = (None, None)
+        self._lock = threading.Lock()
+
+    def current(self):
+        snapshot = self.provider.snapshot
+        version, value = self._entry
+        if version == snapshot.version:
+            return value
+
+        with self._lock:
+            version, value = self._entry
+            if version != snapshot.version:
+                value = DerivedIndicators(snapshot.store, self.rolling_window)
+                self._entry = (snapshot.version, value)
+            return value
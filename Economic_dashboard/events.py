@@ -0,0 +1,115 @@
+import json
+import queue
+import threading
+import time
+
+
+def format_event(event_type, data, event_id=None, retry=None):
+    """Сообщение в формате text/event-stream"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if retry is not None:
+        lines.append(f'retry: {retry}')
+    lines.append(f'event: {event_type}')
+    lines.append('data: ' + json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+    return '\n'.join(lines) + '\n\n'
+
+
+class AsyncSubscription:
+    """
+    Подписчик в цикле событий asyncio (режим ASGI): publish() вызывается из
+    любых потоков, а сообщения попадают в asyncio.Queue через call_soon_threadsafe
+    """
+
+    def __init__(self, loop, maxsize):
+        # asyncio нужен только в режиме ASGI: в WSGI-процессах не загружается
+        import asyncio
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+
+    def put_nowait(self, message):
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:  # цикл событий уже остановлен
+            pass
+
+    def _put(self, message):
+        import asyncio
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(format_event('resync', {}))
+
+
+class EventBroker:
+    """
+    Рассылка событий об изменении данных открытым вкладкам (Server-Sent Events).
+
+    У каждого подписчика своя ограниченная очередь. Если клиент не успевает
+    читать и очередь переполнилась, накопленные события заменяются одним
+    'resync', после которого клиент перезагружает все данные.
+    """
+
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def subscribe(self):
+        subscription = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def subscribe_async(self, loop):
+        subscription = AsyncSubscription(loop, self.max_queue)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event_type, data, event_id=None):
+        message = format_event(event_type, data, event_id)
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        for subscription in subscribers:
+            try:
+                subscription.put_nowait(message)
+            except queue.Full:
+                self._overflow(subscription)
+
+    def _overflow(self, subscription):
+        try:
+            while True:
+                subscription.get_nowait()
+        except queue.Empty:
+            pass
+        subscription.put_nowait(format_event('resync', {}))
+
+    def stream(self, subscription, heartbeat=15.0, on_idle=None):
+        """
+        Генератор сообщений подписчика. Раз в heartbeat секунд без событий
+        отправляет комментарий, чтобы прокси не закрывали соединение,
+        и вызывает on_idle (например, проверку общего снимка данных).
+        """
+        while True:
+            try:
+                yield subscription.get(timeout=heartbeat)
+            except queue.Empty:
+                if on_idle is not None:
+                    on_idle()
+                    # События, появившиеся после on_idle, отдаются сразу
+                    if not subscription.empty():
+                        continue
+                yield f': ping {int(time.time())}\n\n'
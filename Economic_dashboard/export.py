@@ -0,0 +1,184 @@
+import importlib.util
+import json
+
+import numpy as np
+import pandas as pd
+
+from data_store import INDICATOR_COLUMNS, SERIES_COLUMNS
+
+
+# Формат -> (MIME-тип, расширение файла)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet')
+}
+
+# Наборы данных: годовые ряды (с показателями страны) и длинная история
+EXPORT_INDICATORS = {
+    'annual': SERIES_COLUMNS[2:] + INDICATOR_COLUMNS,
+    'history': ['gdp', 'gdp_per_capita']
+}
+
+INTEGER_COLUMNS = {'year', 'gdp_rank', 'gdp_per_capita_rank'}
+
+
+def parquet_available():
+    """
+    pyarrow импортируется только при первой выгрузке в Parquet;
+    без него доступны только CSV и NDJSON
+    """
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+class _ParquetSink:
+    """Файл для ParquetWriter: записанные байты забираются после каждой группы строк"""
+
+    closed = False
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def writable(self):
+        return True
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+class DataExport:
+    """
+    Потоковая выгрузка данных снимка: выбранные страны, показатели и годы
+    (или даты для истории) в CSV, NDJSON или Parquet.
+
+    Строки берутся срезами колонок хранилища и форматируются фрагментами
+    по chunk_rows строк, поэтому память не зависит от размера выгрузки.
+    """
+
+    def __init__(self, store, dataset='annual', country_codes=None, indicators=None,
+                 start=None, end=None, chunk_rows=5000):
+        if dataset not in EXPORT_INDICATORS:
+            raise ValueError(f'Unknown dataset: {dataset!r}')
+        available = EXPORT_INDICATORS[dataset]
+        unknown = [name for name in indicators or [] if name not in available]
+        if unknown:
+            raise ValueError(f'Unknown indicators: {", ".join(unknown)}')
+
+        self.store = store
+        self.dataset = dataset
+        self.history = dataset == 'history'
+        self.key = 'date' if self.history else 'year'
+        self.indicators = list(indicators) if indicators else list(available)
+        self.country_codes = country_codes
+        self.start = start
+        self.end = end
+        self.chunk_rows = chunk_rows
+
+    @property
+    def columns(self):
+        return ['country', self.key] + self.indicators
+
+    def frames(self):
+        """Фрагменты выгрузки (DataFrame не длиннее chunk_rows строк); хотя бы один, возможно пустой"""
+        arrays = self.store.export_columns(self.history)
+        pending, size, emitted = [], 0, False
+        for country_code, start, stop in self.store.row_ranges(self.country_codes, self.start, self.end,
+                                                               self.history):
+            while start < stop:
+                take = min(stop - start, self.chunk_rows - size)
+                pending.append((country_code, start, start + take))
+                size += take
+                start += take
+                if size == self.chunk_rows:
+                    yield self._frame(arrays, pending)
+                    pending, size, emitted = [], 0, True
+        if pending or not emitted:
+            yield self._frame(arrays, pending)
+
+    def _frame(self, arrays, ranges):
+        lengths = [stop - start for _, start, stop in ranges]
+        codes = [country_code for country_code, _, _ in ranges]
+        frame = {'country': np.repeat(np.array(codes, dtype=object), lengths)}
+
+        def column(name):
+            # Пустой срез в начале задает тип и для пустой выборки
+            return np.concatenate([arrays[name][:0]] + [arrays[name][start:stop] for _, start, stop in ranges])
+
+        keys = column(self.key)
+        frame[self.key] = np.datetime_as_string(keys, unit='D').astype(object) if self.history else keys
+
+        for name in self.indicators:
+            if name in arrays:
+                values = column(name)
+            else:
+                per_country = [self.store.country_indicators(country_code)[name] for country_code in codes]
+                values = np.repeat(np.array(per_country, dtype=np.float64), lengths)
+            frame[name] = pd.array(values, dtype='Int64') if name in INTEGER_COLUMNS else values
+
+        if self.key in INTEGER_COLUMNS:
+            frame[self.key] = pd.array(frame[self.key], dtype='Int64')
+        return pd.DataFrame(frame, columns=self.columns)
+
+    def iter_csv(self):
+        header = True
+        for frame in self.frames():
+            yield frame.to_csv(index=False, header=header, lineterminator='\n').encode('utf-8')
+            header = False
+
+    def iter_ndjson(self):
+        # json, а не to_json: to_json округляет числа до 15 знаков
+        encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+        for frame in self.frames():
+            if len(frame):
+                names = list(frame.columns)
+                columns = [frame[name].to_numpy(dtype=object, na_value=None).tolist() for name in names]
+                yield ''.join(encoder.encode(dict(zip(names, row))) + '\n'
+                              for row in zip(*columns)).encode('utf-8')
+
+    def iter_parquet(self):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError('Parquet export requires pyarrow') from None
+
+        sink = _ParquetSink()
+        writer = None
+        try:
+            for frame in self.frames():
+                if writer is None:
+                    table = pa.Table.from_pandas(frame, preserve_index=False)
+                    writer = pq.ParquetWriter(sink, table.schema)
+                else:
+                    table = pa.Table.from_pandas(frame, schema=writer.schema, preserve_index=False)
+                writer.write_table(table)
+                data = sink.take()
+                if data:
+                    yield data
+        finally:
+            if writer is not None:
+                writer.close()
+        yield sink.take()
+
+    def iter_format(self, export_format):
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f'Unknown format: {export_format!r}')
+        return getattr(self, f'iter_{export_format}')()
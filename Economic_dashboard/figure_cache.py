@@ -0,0 +1,112 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from compression import ENCODINGS, choose_encoding, compress_body
+from metrics import endpoint_label, figure_build_seconds, figure_cache_requests
+
+
+class CachedPayload:
+    """Готовый ответ API: сериализованные байты, их ETag и сжатые варианты"""
+
+    __slots__ = ('body', 'etag', 'mimetype', 'encoded')
+
+    def __init__(self, body, mimetype='application/json', compress=False):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.mimetype = mimetype
+
+        # Сжатые варианты: заранее при compress=True, иначе при первом запросе
+        self.encoded = {}
+        if compress:
+            for encoding in ENCODINGS:
+                self.encode(encoding)
+
+    def encode(self, encoding):
+        data = self.encoded.get(encoding)
+        if data is None:
+            data = self.encoded[encoding] = compress_body(self.body, encoding)
+        return data
+
+    def negotiate(self, accept_encodings, if_none_match, min_size):
+        """
+        Вариант ответа для клиента: (код, тело, кодировка, ETag).
+        304 без тела, если у клиента уже есть этот вариант.
+        """
+        encoding = choose_encoding(accept_encodings) if len(self.body) >= min_size else None
+        etag = f'{self.etag}-{encoding}' if encoding else self.etag
+        if etag in if_none_match:
+            return 304, b'', encoding, etag
+        return 200, (self.encode(encoding) if encoding else self.body), encoding, etag
+
+
+class FigureCache:
+    """
+    Кэш готовых JSON-графиков Plotly.
+
+    Ключ - (эндпоинт, код страны, версия данных). При попадании в кэш
+    Plotly не вызывается вовсе: отдаются уже сериализованные байты.
+    Записи эндпоинтов snapshot_endpoints зависят от данных всех стран
+    (доля в мировом ВВП, места в рейтингах) и удаляются при любом изменении.
+    """
+
+    def __init__(self, max_entries=512, snapshot_endpoints=()):
+        self.max_entries = max_entries
+        self.snapshot_endpoints = frozenset(snapshot_endpoints)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, endpoint, country_code, version, count_miss=True):
+        key = (endpoint, country_code, version)
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                if count_miss:
+                    self.misses += 1
+                    figure_cache_requests.inc(endpoint_label(endpoint), 'miss')
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        figure_cache_requests.inc(endpoint_label(endpoint), 'hit')
+        return payload
+
+    def put(self, endpoint, country_code, version, payload):
+        key = (endpoint, country_code, version)
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return payload
+
+    def get_or_build(self, endpoint, country_code, version, builder, compress=False):
+        """Возвращает payload из кэша или строит его через builder() -> bytes"""
+        payload = self.get(endpoint, country_code, version)
+        if payload is None:
+            started = time.perf_counter()
+            body = builder()
+            figure_build_seconds.observe(time.perf_counter() - started, endpoint_label(endpoint))
+            payload = self.put(endpoint, country_code, version, CachedPayload(body, compress=compress))
+        return payload
+
+    def invalidate(self, country_code=None):
+        """Удаляет записи страны (или все записи, если страна не указана)"""
+        with self._lock:
+            if country_code is None:
+                self._entries.clear()
+                return
+            # Записи без страны и пакеты нескольких стран ("USA,RUS") зависят от всех данных
+            stale = [key for key in self._entries
+                     if key[1] is None or key[0] in self.snapshot_endpoints
+                     or country_code in key[1].split(',')]
+            for key in stale:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,36 @@
+import multiprocessing
+import os
+
+# Количество рабочих процессов
+workers = multiprocessing.cpu_count() * 2 + 1
+
+# Тип рабочих процессов (потоки нужны для фонового обновления данных)
+worker_class = 'gthread'
+threads = 4
+
+# Привязка к сокету
+bind = '127.0.0.1:5004'
+
+# Время ожидания для рабочих процессов
+timeout = 120
+graceful_timeout = 30
+
+# Логирование
+loglevel = 'info'
+
+# Общий снимок данных: загружается один раз при старте и отображается
+# в память всеми воркерами. По умолчанию - в каталоге приложения, а не в общем /tmp:
+# у каждого деплоя свой файл, и другие пользователи не могут подменить его заранее
+os.environ.setdefault('DASHBOARD_SNAPSHOT_PATH',
+                      os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'dashboard.snapshot'))
+
+
+def on_starting(server):
+    # Тяжелые модули загружаются в мастере один раз и достаются воркерам через fork
+    from preload import preload
+    preload()
+
+    from snapshot_file import build_snapshot_file
+    path = os.environ['DASHBOARD_SNAPSHOT_PATH']
+    os.makedirs(os.path.dirname(path) or '.', mode=0o700, exist_ok=True)
+    build_snapshot_file(path)
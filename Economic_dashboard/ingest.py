@@ -0,0 +1,247 @@
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from data_sources import WORLD_BANK_INDICATORS, build_country_records, parse_world_bank_payload
+
+logger = logging.getLogger(__name__)
+
+WORLD_BANK_API = 'https://api.worldbank.org/v2'
+
+
+class IndicatorFetcher:
+    """
+    Параллельная загрузка индикаторов World Bank.
+
+    Все запросы идут через один requests.Session с пулом соединений и
+    повторами; число одновременных запросов к одному хосту ограничено
+    per_host_limit. Ответы с ETag/Last-Modified запоминаются, и повторная
+    загрузка делается условным GET: при 304 используется прежний ответ.
+    """
+
+    def __init__(self, base_url=WORLD_BANK_API, max_workers=8, per_host_limit=4, retries=3,
+                 backoff_factor=0.5, timeout=10, years='2000:2024'):
+        self.base_url = base_url.rstrip('/')
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.years = years
+
+        retry = Retry(total=retries, backoff_factor=backoff_factor,
+                      status_forcelist=(429, 500, 502, 503, 504), allowed_methods=('GET',))
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_workers, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._host_limits = {}
+        self._validators = {}
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'not_modified': 0, 'errors': 0}
+
+    def indicator_url(self, country_code, indicator_id):
+        return (f'{self.base_url}/country/{country_code}/indicator/{indicator_id}'
+                f'?format=json&date={self.years}&per_page=1000')
+
+    def _host_limit(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_limits[host]
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def fetch_json(self, url):
+        """GET с условными заголовками; при 304 возвращает сохраненный ответ"""
+        cached = self._validators.get(url)
+        headers = {}
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        with self._host_limit(url):
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        self._count('requests')
+
+        if response.status_code == 304 and cached:
+            self._count('not_modified')
+            return cached['payload']
+
+        response.raise_for_status()
+        payload = response.json()
+        if response.headers.get('ETag') or response.headers.get('Last-Modified'):
+            self._validators[url] = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'payload': payload
+            }
+        return payload
+
+    def _fetch_one(self, country_code, name, indicator_id):
+        try:
+            return name, parse_world_bank_payload(self.fetch_json(self.indicator_url(country_code, indicator_id)))
+        except Exception as e:
+            self._count('errors')
+            logger.warning(f"⚠️ Не удалось загрузить {indicator_id} для {country_code}: {e}")
+            return name, {}
+
+    def fetch_all(self, country_codes, indicators=None):
+        """Все индикаторы по всем странам: {индикатор: {страна: {год: значение}}}"""
+        indicators = indicators or WORLD_BANK_INDICATORS
+        jobs = [(country_code, name, indicator_id)
+                for country_code in country_codes
+                for name, indicator_id in indicators.items()]
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(lambda job: self._fetch_one(*job), jobs))
+
+        indicator_values = {name: {} for name in indicators}
+        for name, values in results:
+            indicator_values[name].update(values)
+
+        logger.info(f"🌐 Загружено {len(jobs)} рядов за {time.monotonic() - started:.2f} с "
+                    f"(без изменений: {self.stats['not_modified']}, ошибок: {self.stats['errors']})")
+        return indicator_values
+
+
+class WorldBankApiSource:
+    """Источник данных для RefreshWorker поверх IndicatorFetcher"""
+
+    name = 'world-bank-api'
+    labels = {
+        'gdp': 'World Bank',
+        'inflation': 'World Bank',
+        'unemployment': 'World Bank',
+        'api_status': 'World Bank API'
+    }
+
+    def __init__(self, fallback, fetcher=None):
+        self.fallback = fallback
+        self.fetcher = fetcher or IndicatorFetcher()
+
+    def load(self):
+        indicator_values = self.fetcher.fetch_all(list(self.fallback))
+        if not any(indicator_values.values()):
+            raise RuntimeError('World Bank API не вернул данных')
+        return build_country_records(indicator_values, self.fallback)
+
+
+def ingest_into_provider(provider, fetcher=None):
+    """Загрузка всех индикаторов и публикация нового снимка в провайдере"""
+    source = WorldBankApiSource(provider.country_data, fetcher)
+    return provider.publish(source.load(), source.labels)
+
+
+class FixtureServer:
+    """
+    Локальная замена World Bank API для разработки и тестов.
+
+    Отдает файлы <каталог>/<индикатор>.json (формат World Bank) как по
+    адресу /<индикатор>.json, так и по /country/<код>/indicator/<индикатор>
+    с фильтрацией по стране. Поддерживает ETag и If-None-Match.
+    """
+
+    def __init__(self, fixtures_dir, host='127.0.0.1', port=0):
+        fixtures_dir = os.path.abspath(fixtures_dir)
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = urlsplit(self.path).path.strip('/').split('/')
+                if len(parts) == 4 and parts[0] == 'country' and parts[2] == 'indicator':
+                    country_code, indicator_id = parts[1], parts[3]
+                elif len(parts) == 1 and parts[0].endswith('.json'):
+                    country_code, indicator_id = None, parts[0][:-len('.json')]
+                else:
+                    return self.send_error(404)
+
+                try:
+                    with open(os.path.join(fixtures_dir, indicator_id + '.json'), encoding='utf-8') as f:
+                        meta, rows = json.load(f)
+                except (OSError, ValueError):
+                    return self.send_error(404)
+
+                if country_code:
+                    rows = [row for row in rows
+                            if country_code in (row.get('countryiso3code'), row.get('country', {}).get('id'))]
+                body = json.dumps([meta, rows]).encode('utf-8')
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format, *args)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='fixture-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+
+    if len(sys.argv) >= 3 and sys.argv[1] == 'serve':
+        server = FixtureServer(sys.argv[2], port=int(sys.argv[3]) if len(sys.argv) > 3 else 8000)
+        print(f"🌐 Фикстуры World Bank доступны по адресу {server.url}")
+        server.server.serve_forever()
+    elif len(sys.argv) >= 2 and sys.argv[1] == 'fetch':
+        from data_provider import SimpleCountryDataProvider
+        from snapshot_file import write_snapshot
+
+        provider = SimpleCountryDataProvider()
+        base_url = sys.argv[3] if len(sys.argv) > 3 else WORLD_BANK_API
+        changed = ingest_into_provider(provider, IndicatorFetcher(base_url=base_url))
+        print(f"✅ Обновлены страны: {', '.join(changed) or 'нет'}")
+        if len(sys.argv) > 2:
+            write_snapshot(sys.argv[2], provider.snapshot)
+    else:
+        print("Использование:\n"
+              "  python ingest.py serve <каталог фикстур> [порт]\n"
+              "  python ingest.py fetch [путь к снимку] [базовый URL]")
+        sys.exit(1)
@@ -0,0 +1,200 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+import threading
+import time
+
+from flask import g, request
+
+# Границы корзин гистограмм (секунды): от долей миллисекунды до секунд
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Счетчик с метками: counter.inc('country-gdp', 'hit')"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}'
+
+
+class Histogram:
+    """
+    Гистограмма длительностей с метками. Наблюдение - поиск корзины и
+    увеличение счетчика под блокировкой, накопленные суммы считаются
+    только при выдаче /metrics.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # метки -> [счетчики корзин (последняя - +Inf), сумма, количество]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def samples(self):
+        with self._lock:
+            snapshot = {labels: (list(counts), total, count)
+                        for labels, (counts, total, count) in self._series.items()}
+        for labels, (counts, total, count) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                yield (f'{self.name}_bucket{_format_labels(self.labelnames, labels, [("le", _format_value(bound))])}'
+                       f' {cumulative}')
+            yield f'{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}'
+            yield f'{self.name}_count{_format_labels(self.labelnames, labels)} {count}'
+
+
+class CallbackMetric:
+    """
+    Значения, которые уже считаются в других объектах (счетчики кэша, возраст
+    снимка): callback() при выдаче /metrics возвращает число или {метки: число}
+    """
+
+    def __init__(self, name, documentation, callback, kind='gauge', labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+
+    def samples(self):
+        values = self.callback()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for labels, value in sorted(values.items()):
+            yield f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}'
+
+
+class MetricsRegistry:
+    """Набор метрик процесса в текстовом формате Prometheus"""
+
+    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f'Metric already registered: {metric.name}')
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name, documentation, callback, kind='gauge', labelnames=()):
+        return self.register(CallbackMetric(name, documentation, callback, kind, labelnames))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+# Общий реестр процесса и метрики, которые заполняют модули панели
+registry = MetricsRegistry()
+
+request_seconds = registry.histogram(
+    'dashboard_request_duration_seconds',
+    'Время обработки запроса до отправки заголовков ответа',
+    ('route', 'method', 'status'))
+figure_build_seconds = registry.histogram(
+    'dashboard_figure_build_seconds',
+    'Время построения ответа при промахе кэша (включая сериализацию)',
+    ('endpoint',))
+serialize_seconds = registry.histogram(
+    'dashboard_serialize_seconds',
+    'Время сериализации графика в JSON',
+    ('builder',))
+figure_cache_requests = registry.counter(
+    'dashboard_figure_cache_requests_total',
+    'Обращения к кэшу готовых ответов',
+    ('endpoint', 'result'))
+
+
+def endpoint_label(endpoint):
+    """Имя эндпоинта кэша без параметров запроса: 'compare:gdp:2020:...' -> 'compare'"""
+    return endpoint.split(':', 1)[0]
+
+
+def instrument_app(app):
+    """
+    Длительность запросов Flask по шаблону маршрута. Регистрируется до
+    остальных обработчиков after_request, поэтому учитывает и сжатие ответа.
+    """
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def observe_request(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            request_seconds.observe(time.perf_counter() - started, route, request.method,
+                                    str(response.status_code))
+        return response
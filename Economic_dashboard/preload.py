@@ -0,0 +1,40 @@
+import importlib
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Модули, которые app загружает при старте, но которые не имеют побочных
+# эффектов при импорте (сам app создает провайдер данных и потоки)
+STARTUP_MODULES = [
+    'numpy', 'pandas', 'flask', 'click',
+    'chart_specs', 'compression', 'data_provider', 'derived_indicators', 'events', 'export',
+    'figure_cache', 'refresh', 'snapshot_file', 'static_build', 'timeseries'
+]
+
+
+def configured_modules():
+    """Модули для текущей настройки: Plotly и requests - только если они будут нужны"""
+    modules = list(STARTUP_MODULES)
+    builders = os.environ.get('DASHBOARD_CHART_BUILDER', 'spec') + ',' + os.environ.get('DASHBOARD_CHART_BUILDERS', '')
+    if 'plotly' in builders:
+        modules += ['plotly.graph_objs', 'plotly.utils']
+    if os.environ.get('DASHBOARD_DATA_SOURCE', '').startswith(('http', 'worldbank')):
+        modules += ['requests', 'ingest']
+    return modules
+
+
+def preload(modules=None):
+    """
+    Импорт тяжелых модулей заранее. В мастер-процессе gunicorn (хук on_starting)
+    они загружаются один раз, и воркеры получают их готовыми после fork,
+    поэтому запуск нового воркера не тратит время на импорт pandas и Flask.
+    """
+    modules = configured_modules() if modules is None else modules
+    started = time.perf_counter()
+    for name in modules:
+        importlib.import_module(name)
+    elapsed = (time.perf_counter() - started) * 1000
+    logger.info(f"📚 Предзагружено модулей: {len(modules)} за {elapsed:.0f} мс")
+    return elapsed
@@ -0,0 +1,97 @@
+import logging
+import os
+import random
+import time
+from threading import Event, Thread
+
+from data_sources import create_data_source
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_settings_from_env(environ=None):
+    """Настройки обновления из переменных окружения"""
+    environ = os.environ if environ is None else environ
+    return {
+        'interval': float(environ.get('DASHBOARD_REFRESH_INTERVAL', 1800)),
+        'jitter': float(environ.get('DASHBOARD_REFRESH_JITTER', 0.1)),
+        'min_backoff': float(environ.get('DASHBOARD_REFRESH_MIN_BACKOFF', 30)),
+        'max_backoff': float(environ.get('DASHBOARD_REFRESH_MAX_BACKOFF', 3600))
+    }
+
+
+class RefreshWorker(Thread):
+    """
+    Фоновое обновление данных провайдера.
+
+    Раз в interval секунд (с разбросом jitter) загружает данные из источника
+    и публикует новый снимок. При ошибке остается последний удачный снимок,
+    а повторная попытка откладывается с экспоненциальной задержкой.
+    """
+
+    def __init__(self, provider, source, interval=1800, jitter=0.1, min_backoff=30, max_backoff=3600):
+        super().__init__(name='data-refresh', daemon=True)
+        self.provider = provider
+        self.source = source
+        self.interval = interval
+        self.jitter = jitter
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+
+        self.failures = 0
+        self.last_success = None
+        self.last_error = None
+        self._stop_event = Event()
+
+    def refresh_once(self):
+        """Одна загрузка из источника; возвращает список изменившихся стран"""
+        started = time.monotonic()
+        try:
+            records = self.source.load()
+            changed = self.provider.publish(records, self.source.labels)
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            logger.warning(f"⚠️ Не удалось обновить данные из {self.source.name}: {e}")
+            raise
+
+        self.failures = 0
+        self.last_error = None
+        self.last_success = time.time()
+        logger.info(f"🔄 Данные из {self.source.name} обновлены за {time.monotonic() - started:.2f} с, "
+                    f"изменились: {', '.join(changed) or 'нет'}")
+        return changed
+
+    def next_delay(self):
+        if self.failures:
+            delay = min(self.max_backoff, self.min_backoff * 2 ** (self.failures - 1))
+        else:
+            delay = self.interval
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.refresh_once()
+            except Exception:
+                pass
+            self._stop_event.wait(self.next_delay())
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def start_background_refresh(provider, source_spec=None, **settings):
+    """
+    Запуск фонового обновления. Источник берется из DASHBOARD_DATA_SOURCE;
+    без него панель работает на встроенных данных и поток не запускается.
+    """
+    source_spec = source_spec or os.environ.get('DASHBOARD_DATA_SOURCE')
+    if not source_spec:
+        return None
+
+    source = create_data_source(source_spec, provider.country_data)
+    worker = RefreshWorker(provider, source, **dict(refresh_settings_from_env(), **settings))
+    worker.start()
+    logger.info(f"🔄 Фоновое обновление данных: {source.name}, интервал {worker.interval:.0f} с")
+    return worker
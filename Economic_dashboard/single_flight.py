@@ -0,0 +1,69 @@
+import threading
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Объединение одновременных загрузок по ключу.
+
+    Первый поток, запросивший ключ, выполняет загрузку; остальные, пришедшие
+    пока она идет, ждут ее результата (или исключения) вместо повторной работы.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.max_waiters = 0
+
+    def do(self, key, loader):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                self.max_waiters = max(self.max_waiters, call.waiters)
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.loads += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = loader()
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    @property
+    def in_flight(self):
+        return len(self._calls)
+
+    def stats(self):
+        with self._lock:
+            return {'loads': self.loads, 'coalesced': self.coalesced, 'errors': self.errors,
+                    'max_waiters': self.max_waiters, 'in_flight': len(self._calls)}
@@ -0,0 +1,228 @@
+from datetime import datetime
+import json
+import logging
+import mmap
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_provider import DataSnapshot, SimpleCountryDataProvider
+from data_sources import create_data_source
+from data_store import CountryDataStore, INDICATOR_COLUMNS
+from refresh import RefreshWorker, refresh_settings_from_env
+
+try:
+    import fcntl
+except ImportError:  # Windows: выбор записывающего процесса недоступен
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Формат файла: сигнатура, длина JSON-заголовка и смещение данных (по 8 байт),
+# заголовок, затем выровненные массивы колонок хранилища
+MAGIC = b'EDSNAP01'
+ALIGNMENT = 64
+
+# Временный файл и файл блокировки не открываются по символической ссылке
+OPEN_NOFOLLOW = getattr(os, 'O_NOFOLLOW', 0)
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def write_snapshot(path, snapshot):
+    """Атомарная запись снимка: временный файл и os.replace"""
+    store = snapshot.store
+    columns_meta = {}
+    offset = 0
+    for name, array in store.columns.items():
+        array = np.ascontiguousarray(array)
+        offset = _align(offset)
+        columns_meta[name] = {'dtype': array.dtype.str, 'offset': offset, 'length': len(array)}
+        offset += array.nbytes
+
+    indicators = store.indicators.astype(object).where(store.indicators.notna(), None)
+    header = json.dumps({
+        'version': snapshot.version,
+        'country_versions': snapshot.country_versions,
+        'loaded_at': snapshot.loaded_at.isoformat(),
+        'data_sources': snapshot.data_sources,
+        'indicators': indicators.to_dict(orient='index'),
+        'rankings': store.rankings,
+        'columns': columns_meta
+    }, default=_json_default).encode('utf-8')
+    data_offset = _align(len(MAGIC) + 16 + len(header))
+
+    tmp_path = f'{path}.tmp.{os.getpid()}'
+    try:
+        os.unlink(tmp_path)  # остаток упавшей записи с тем же pid
+    except FileNotFoundError:
+        pass
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | OPEN_NOFOLLOW, 0o644)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, 'little'))
+        f.write(data_offset.to_bytes(8, 'little'))
+        f.write(header)
+        for name, array in store.columns.items():
+            f.seek(data_offset + columns_meta[name]['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path):
+    """Чтение снимка: колонки хранилища ссылаются прямо на отображенный файл"""
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if mapped[:len(MAGIC)] != MAGIC:
+        raise ValueError(f'{path}: не является файлом снимка данных')
+    header_length = int.from_bytes(mapped[8:16], 'little')
+    data_offset = int.from_bytes(mapped[16:24], 'little')
+    header = json.loads(mapped[24:24 + header_length].decode('utf-8'))
+
+    columns = {
+        name: np.frombuffer(mapped, dtype=np.dtype(meta['dtype']), count=meta['length'],
+                            offset=data_offset + meta['offset'])
+        for name, meta in header['columns'].items()
+    }
+    indicators = pd.DataFrame.from_dict(header['indicators'], orient='index',
+                                        columns=INDICATOR_COLUMNS).astype(float)
+    indicators.index.name = 'country'
+
+    return DataSnapshot(
+        records=None,
+        store=CountryDataStore(columns, indicators, header['rankings']),
+        version=header['version'],
+        country_versions=header['country_versions'],
+        loaded_at=datetime.fromisoformat(header['loaded_at']),
+        data_sources=header['data_sources']
+    )
+
+
+def build_snapshot_file(path, source_spec=None):
+    """Первичная загрузка данных и запись снимка (один раз на деплой)"""
+    provider = SimpleCountryDataProvider()
+    source_spec = source_spec or os.environ.get('DASHBOARD_DATA_SOURCE')
+    if source_spec:
+        source = create_data_source(source_spec, provider.country_data)
+        try:
+            provider.publish(source.load(), source.labels)
+        except Exception as e:
+            logger.warning(f"⚠️ Источник {source.name} недоступен, в снимок записаны резервные данные: {e}")
+
+    write_snapshot(path, provider.snapshot)
+    logger.info(f"💾 Снимок данных версии {provider.data_version} записан в {path}")
+    return provider.snapshot
+
+
+class SharedSnapshot:
+    """
+    Подключение провайдера к общему файлу снимка.
+
+    Один процесс записывает снимок, остальные отображают файл в память,
+    поэтому N рабочих процессов держат одну копию данных.
+
+    refresh_if_changed() вызывается на каждом запросе, но проверяет mtime
+    не чаще раза в check_interval секунд. Если настроен источник данных,
+    ровно один процесс (владелец блокировки <path>.lock) обновляет данные
+    в фоне и перезаписывает файл.
+    """
+
+    def __init__(self, path, provider, check_interval=2.0, source_spec=None):
+        self.path = path
+        self.provider = provider
+        self.check_interval = check_interval
+        self.source_spec = source_spec or os.environ.get('DASHBOARD_DATA_SOURCE')
+
+        self.writer = None
+        self._lock_file = None
+        self._mtime = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def refresh_if_changed(self):
+        now = time.monotonic()
+        if now < self._next_check or not self._lock.acquire(blocking=False):
+            return False
+        try:
+            self._next_check = now + self.check_interval
+            self._try_become_writer()
+
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                return False
+            if mtime == self._mtime:
+                return False
+
+            snapshot = read_snapshot(self.path)
+            self._mtime = mtime
+        finally:
+            self._lock.release()
+
+        changed = self.provider.install_snapshot(snapshot)
+        if changed:
+            logger.info(f"💾 Загружен общий снимок данных версии {snapshot.version}")
+        return True
+
+    def _try_become_writer(self):
+        if self.writer is not None or not self.source_spec or fcntl is None:
+            return
+
+        try:
+            fd = os.open(self.path + '.lock', os.O_WRONLY | os.O_CREAT | os.O_APPEND | OPEN_NOFOLLOW, 0o644)
+        except OSError as e:
+            logger.warning(f"⚠️ Файл блокировки общего снимка недоступен: {e}")
+            return
+
+        lock_file = os.fdopen(fd, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return
+
+        self._lock_file = lock_file
+        self.provider.add_snapshot_listener(self._write)
+        source = create_data_source(self.source_spec, self.provider.country_data)
+        self.writer = RefreshWorker(self.provider, source, **refresh_settings_from_env())
+        self.writer.start()
+        logger.info(f"💾 Процесс {os.getpid()} обновляет общий снимок данных")
+
+    def _write(self, snapshot):
+        write_snapshot(self.path, snapshot)
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+
+def attach_shared_snapshot(provider, path=None):
+    """Подключение к общему снимку из DASHBOARD_SNAPSHOT_PATH (если задан)"""
+    path = path or os.environ.get('DASHBOARD_SNAPSHOT_PATH')
+    if not path:
+        return None
+
+    shared = SharedSnapshot(path, provider,
+                            check_interval=float(os.environ.get('DASHBOARD_SNAPSHOT_CHECK_INTERVAL', 2.0)))
+    shared.refresh_if_changed()
+    return shared
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) < 2:
+        print("Использование: python snapshot_file.py <путь к снимку> [источник данных]")
+        sys.exit(1)
+    build_snapshot_file(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
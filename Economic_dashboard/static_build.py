@@ -0,0 +1,114 @@
+import hashlib
+import json
+import logging
+import os
+import time
+
+from compression import ENCODINGS, compress_body
+
+logger = logging.getLogger(__name__)
+
+# Ответы по каждой стране, которые можно отдать файлами
+COUNTRY_ENDPOINTS = ['country-stats', 'country-info', 'country-gdp', 'country-indicators',
+                     'country-gdp-per-capita', 'country-bundle', 'derived']
+GLOBAL_PATHS = ['/', '/api/countries-comparison', '/api/derived']
+
+EXTENSIONS = {'application/json': 'json', 'text/html': 'html'}
+FILE_SUFFIXES = {'gzip': '.gz', 'br': '.br'}
+
+
+def static_paths(country_codes):
+    return GLOBAL_PATHS + [f'/api/{endpoint}/{country_code}'
+                           for country_code in country_codes for endpoint in COUNTRY_ENDPOINTS]
+
+
+def _write_atomic(path, data):
+    tmp_path = f'{path}.tmp.{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_asset(assets_dir, body, mimetype, level=9):
+    """
+    Файл с именем по хэшу содержимого и сжатые варианты рядом (file.json.gz,
+    file.json.br) для gzip_static/brotli_static. Уже записанные файлы не
+    перезаписываются: при неизменных данных сборка ничего не меняет на диске.
+    """
+    digest = hashlib.sha256(body).hexdigest()[:20]
+    name = f'{digest}.{EXTENSIONS.get(mimetype, "bin")}'
+    path = os.path.join(assets_dir, name)
+    if os.path.exists(path):
+        return name, digest, False
+
+    for encoding in ENCODINGS:
+        _write_atomic(path + FILE_SUFFIXES[encoding], compress_body(body, encoding, level))
+    # Основной файл - последним: его наличие означает, что варианты уже готовы
+    _write_atomic(path, body)
+    return name, digest, True
+
+
+def nginx_map(manifest, assets_url):
+    """Таблица путь API -> файл для map $uri $dashboard_static { ... } в nginx"""
+    lines = [f'# Данные версии {manifest["version"]}, собрано {manifest["generated_at"]}']
+    for path, entry in manifest['files'].items():
+        lines.append(f'{path} {assets_url}{entry["file"]};')
+    return '\n'.join(lines) + '\n'
+
+
+def build_static(app, data_provider, output_dir, assets_url='/assets/', level=9):
+    """
+    Отрисовка всех ответов панели (по странам из countries_info и общих) в
+    файлы output_dir/assets/<хэш>.json со сжатыми вариантами, манифест
+    manifest.json и таблицу для nginx nginx-map.conf.
+
+    Ответы берутся через test_client, поэтому байты совпадают с теми, что
+    отдает Flask. Манифест и таблица заменяются атомарно после записи всех файлов.
+    """
+    started = time.perf_counter()
+    assets_dir = os.path.join(output_dir, 'assets')
+    os.makedirs(assets_dir, exist_ok=True)
+
+    snapshot = data_provider.snapshot
+    client = app.test_client()
+    files = {}
+    written = 0
+    for path in static_paths(data_provider.countries_info):
+        response = client.get(path)
+        if response.status_code != 200:
+            raise RuntimeError(f'{path}: HTTP {response.status_code}')
+
+        body = response.get_data()
+        name, digest, created = write_asset(assets_dir, body, response.mimetype, level)
+        written += created
+        files[path] = {'file': name, 'etag': digest, 'size': len(body), 'mimetype': response.mimetype,
+                       'encodings': list(ENCODINGS)}
+
+    manifest = {
+        'version': snapshot.version,
+        'countries': snapshot.country_versions,
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'files': files
+    }
+    _write_atomic(os.path.join(output_dir, 'manifest.json'),
+                  json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+    _write_atomic(os.path.join(output_dir, 'nginx-map.conf'), nginx_map(manifest, assets_url).encode('utf-8'))
+
+    logger.info(f"📦 Статическая сборка: {len(files)} ответов, новых файлов {written}, "
+                f"{(time.perf_counter() - started) * 1000:.0f} мс")
+    return manifest
+
+
+def prune_assets(output_dir, manifest):
+    """Удаление файлов, на которые не ссылается манифест (после перезагрузки nginx)"""
+    assets_dir = os.path.join(output_dir, 'assets')
+    keep = {entry['file'] for entry in manifest['files'].values()}
+    removed = 0
+    for name in os.listdir(assets_dir):
+        base = name
+        for suffix in FILE_SUFFIXES.values():
+            base = base.removesuffix(suffix)
+        if base not in keep:
+            os.remove(os.path.join(assets_dir, name))
+            removed += 1
+    return removed
@@ -0,0 +1,33 @@
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as dashboard
+from benchmarks.figure_paths import validate_specs
+
+
+class ChartSpecTests(unittest.TestCase):
+    """Графики из шаблонов-словарей chart_specs должны совпадать с JSON, который строит Plotly"""
+
+    def test_specs_match_plotly_for_every_endpoint_and_country(self):
+        self.assertEqual(set(dashboard.FIGURE_BUILDERS),
+                         {'country-gdp', 'country-indicators', 'country-gdp-per-capita', 'countries-comparison'})
+        self.assertEqual(validate_specs(dashboard), [])
+
+    def test_specs_match_plotly_with_request_options(self):
+        builders = dashboard.FIGURE_BUILDERS
+        # Окно ряда (from, to, max_points) и выбор стран с годом - как в параметрах запроса
+        window = (None, None, 12)
+        cases = [('country-gdp', 'USA', window), ('country-gdp-per-capita', 'RUS', window),
+                 ('countries-comparison', None, (('USA', 'RUS', 'CHN'), None))]
+        for endpoint, country_code, options in cases:
+            with self.subTest(endpoint=endpoint, options=options):
+                self.assertEqual(json.loads(builders[endpoint]['plotly'](country_code, options)),
+                                 json.loads(builders[endpoint]['spec'](country_code, options)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as dashboard
+
+
+class DerivedCacheTests(unittest.TestCase):
+    """Ответы с долей в мировом ВВП должны обновляться при изменении данных любой страны"""
+
+    def setUp(self):
+        self.client = dashboard.app.test_client()
+        self.records = dashboard.data_provider.snapshot.records
+        dashboard.figure_cache.invalidate()
+
+    def tearDown(self):
+        dashboard.data_provider.publish(self.records)
+
+    def world_gdp_share(self):
+        derived = self.client.get('/api/derived/USA').get_json()['summary']['world_gdp_share']
+        bundle = json.loads(self.client.get('/api/country-bundle/USA').data)
+        stats = self.client.get('/api/country-stats/USA').get_json()['derived']['world_gdp_share']
+        self.assertEqual(bundle['stats']['derived']['world_gdp_share'], derived)
+        self.assertEqual(stats, derived)
+        return derived
+
+    def test_update_of_other_country_refreshes_cached_payloads(self):
+        share = self.world_gdp_share()
+
+        gdp_data = [dict(point, gdp_trillion=point['gdp_trillion'] * 5)
+                    for point in self.records['CHN']['gdp_data']]
+        dashboard.data_provider.update_country_data('CHN', gdp_data=gdp_data)
+
+        self.assertLess(self.world_gdp_share(), share)
+
+    def test_unknown_country_is_not_found_and_not_cached(self):
+        entries = dashboard.figure_cache.stats()['entries']
+        response = self.client.get('/api/derived/XXX')
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('XXX', response.get_json()['error'])
+        self.assertEqual(dashboard.figure_cache.stats()['entries'], entries)
+
+
+if __name__ == '__main__':
+    unittest.main()
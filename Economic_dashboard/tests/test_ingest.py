@@ -0,0 +1,134 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_sources import WORLD_BANK_INDICATORS
+from ingest import FixtureServer, IndicatorFetcher
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'world_bank')
+COUNTRIES = ['USA', 'RUS', 'DEU']
+
+
+class FlakyServer:
+    """Сервер, который первые failures запросов отвечает 503, затем 200"""
+
+    def __init__(self, failures):
+        self.hits = 0
+        self.hit_times = []
+        lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with lock:
+                    server.hits += 1
+                    server.hit_times.append(time.monotonic())
+                    failed = server.hits <= failures
+                body = b'[{"page": 1}, [{"countryiso3code": "USA", "date": "2023", "value": 1.5}]]'
+                self.send_response(503 if failed else 200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = 'http://%s:%s' % self.server.server_address[:2]
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class IndicatorFetcherTests(unittest.TestCase):
+    def test_fetch_all_from_fixture_server(self):
+        with FixtureServer(FIXTURES_DIR) as server:
+            fetcher = IndicatorFetcher(base_url=server.url, retries=0)
+            values = fetcher.fetch_all(COUNTRIES)
+
+        self.assertEqual(set(values), set(WORLD_BANK_INDICATORS))
+        for name in WORLD_BANK_INDICATORS:
+            self.assertEqual(set(values[name]), set(COUNTRIES))
+        self.assertEqual(values['inflation']['RUS'], {2022: 13.8, 2023: 5.9})
+        self.assertEqual(fetcher.stats, {'requests': 12, 'not_modified': 0, 'errors': 0})
+
+    def test_conditional_get_uses_cached_payload_on_304(self):
+        with FixtureServer(FIXTURES_DIR) as server:
+            fetcher = IndicatorFetcher(base_url=server.url, retries=0)
+            first = fetcher.fetch_all(COUNTRIES)
+            second = fetcher.fetch_all(COUNTRIES)
+
+        self.assertEqual(first, second)
+        self.assertEqual(fetcher.stats, {'requests': 24, 'not_modified': 12, 'errors': 0})
+
+    def test_fetch_all_runs_concurrently_within_host_limit(self):
+        fetcher = IndicatorFetcher(base_url='http://fixtures.test', max_workers=8, per_host_limit=3)
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+
+        class Response:
+            status_code = 200
+            headers = {}
+
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return [{}, []]
+
+        def slow_get(url, headers=None, timeout=None):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.05)
+            with lock:
+                active -= 1
+            return Response()
+
+        fetcher.session.get = slow_get
+        started = time.monotonic()
+        fetcher.fetch_all(COUNTRIES)
+        elapsed = time.monotonic() - started
+
+        # 12 запросов по 50 мс: последовательно 0.6 с, по 3 одновременно - около 0.2 с
+        self.assertEqual(peak, 3)
+        self.assertLess(elapsed, 0.45)
+
+    def test_retries_with_backoff_then_succeeds(self):
+        server = FlakyServer(failures=2)
+        try:
+            fetcher = IndicatorFetcher(base_url=server.url, retries=3, backoff_factor=0.1)
+            payload = fetcher.fetch_json(server.url + '/gdp.json')
+        finally:
+            server.stop()
+
+        self.assertEqual(payload[1][0]['value'], 1.5)
+        self.assertEqual(server.hits, 3)
+        # Пауза перед вторым повтором: backoff_factor * 2 = 0.2 с
+        self.assertGreaterEqual(server.hit_times[2] - server.hit_times[1], 0.15)
+
+    def test_exhausted_retries_count_as_error(self):
+        server = FlakyServer(failures=10)
+        try:
+            fetcher = IndicatorFetcher(base_url=server.url, retries=2, backoff_factor=0)
+            values = fetcher.fetch_all(['USA'], {'gdp': 'NY.GDP.MKTP.CD'})
+        finally:
+            server.stop()
+
+        self.assertEqual(values, {'gdp': {}})
+        self.assertEqual(server.hits, 3)
+        self.assertEqual(fetcher.stats['errors'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as dashboard
+
+
+class QueryCacheTests(unittest.TestCase):
+    """Ответы с параметрами запроса не должны вытеснять ответы по умолчанию"""
+
+    def setUp(self):
+        self.client = dashboard.app.test_client()
+        dashboard.figure_cache.invalidate()
+        dashboard.query_cache.invalidate()
+
+    def test_parameterized_requests_do_not_evict_default_payloads(self):
+        for path in ('/api/country-gdp/USA', '/api/country-bundle/USA', '/api/country-bundle/RUS'):
+            self.assertEqual(self.client.get(path).status_code, 200)
+        entries = dashboard.figure_cache.stats()['entries']
+
+        for max_points in range(3, 3 + dashboard.query_cache.max_entries * 2):
+            self.assertEqual(self.client.get(f'/api/country-gdp/USA?max_points={max_points}').status_code, 200)
+        self.assertEqual(self.client.get('/api/compare?countries=USA,RUS&limit=1').status_code, 200)
+        self.assertEqual(self.client.get('/api/country-bundle?countries=USA,RUS').status_code, 200)
+
+        self.assertEqual(dashboard.figure_cache.stats()['entries'], entries)
+        self.assertEqual(dashboard.query_cache.stats()['entries'], dashboard.query_cache.max_entries)
+
+        hits = dashboard.figure_cache.stats()['hits']
+        self.client.get('/api/country-gdp/USA')
+        self.assertEqual(dashboard.figure_cache.stats()['hits'], hits + 1)
+
+    def test_window_without_data_is_not_found(self):
+        response = self.client.get('/api/country-gdp/USA?from=2100')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.get_json(), {'error': 'No GDP data available'})
+
+
+if __name__ == '__main__':
+    unittest.main()
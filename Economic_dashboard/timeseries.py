@@ -0,0 +1,81 @@
+import numpy as np
+
+
+def parse_date(value):
+    """'2020', '2020-03' или '2020-03-31' -> np.datetime64 (день)"""
+    if value is None or value == '':
+        return None
+    try:
+        return np.datetime64(value, 'D')
+    except ValueError:
+        raise ValueError(f'Invalid date: {value!r}') from None
+
+
+def format_dates(dates):
+    """
+    Подписи оси X: годы для годовых рядов, 'ГГГГ-ММ' для помесячных и
+    квартальных, полные даты для остальных
+    """
+    if not len(dates):
+        return []
+    months = dates.astype('datetime64[M]')
+    if np.all(months.astype('datetime64[D]') == dates):
+        years = dates.astype('datetime64[Y]')
+        if np.all(years.astype('datetime64[D]') == dates):
+            return [str(year) for year in years.astype(int) + 1970]
+        return [str(month) for month in months]
+    return [str(date) for date in dates]
+
+
+def lttb(x, y, threshold):
+    """
+    Прореживание ряда алгоритмом Largest-Triangle-Three-Buckets.
+
+    Возвращает индексы не более чем threshold точек: первая и последняя
+    сохраняются, из каждой корзины берется точка, образующая наибольший
+    треугольник с выбранной точкой предыдущей корзины и средним следующей.
+    Форма ряда (пики и провалы) при этом сохраняется.
+    """
+    n = len(y)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        return np.array([0, n - 1])
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Границы корзин для внутренних точек (без первой и последней)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    # Средние точки следующих корзин считаются сразу для всех корзин
+    next_starts = edges[1:]
+    counts = np.diff(np.append(next_starts, n))
+    average_x = np.add.reduceat(x, next_starts) / counts
+    average_y = np.add.reduceat(y, next_starts) / counts
+
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        # Удвоенная площадь треугольника для каждой точки корзины
+        areas = np.abs((x[previous] - average_x[bucket]) * (y[start:stop] - y[previous])
+                       - (x[previous] - x[start:stop]) * (average_y[bucket] - y[previous]))
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+
+    return selected
+
+
+def window(dates, values, start=None, end=None, max_points=None):
+    """Срез ряда по датам [start, end] с прореживанием до max_points точек"""
+    lo = np.searchsorted(dates, start, side='left') if start is not None else 0
+    hi = np.searchsorted(dates, end, side='right') if end is not None else len(dates)
+    dates, values = dates[lo:hi], values[lo:hi]
+
+    if max_points is not None and len(dates) > max_points:
+        indexes = lttb(dates.astype(np.int64), values, max_points)
+        dates, values = dates[indexes], values[indexes]
+    return dates, values
@@ -11,6 +11,13 @@ app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///contract_management.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['UPLOAD_FOLDER'] = 'uploads/templates'
 app.config['OUTPUT_FOLDER'] = 'outputs'
+# 'xml' - потоковая замена в XML-частях шаблона, 'python-docx' - через объектную модель
+app.config['DOCX_RENDERER'] = 'xml'
+# Процессы для параллельной генерации файлов комплекта через python-docx (1 - без пула);
+# потоковой обработке XML пул не нужен
+app.config['RENDER_WORKERS'] = 1 if app.config['DOCX_RENDERER'] == 'xml' else min(4, os.cpu_count() or 1)
+# Сохранять копию каждого отправленного архива в OUTPUT_FOLDER
+app.config['KEEP_GENERATED_ARCHIVES'] = False
 
 # Создаем папки если их нет
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -0,0 +1,106 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+
+from utils import compile_template_index, get_render_pool, render_contract_files
+
+DATA = {
+    'Номер': '2024-117',
+    'Полное_наименование': 'Общество с ограниченной ответственностью "Ромашка"',
+    'Сокращенное_наименование': 'ООО "Ромашка"',
+    'ИНН': '7701234567',
+    'Адрес': 'г. Москва, ул. Ленина, д. 1',
+    'ФИО_представителя_р': 'Иванова Ивана Ивановича',
+    'Должность_р': 'Генерального директора',
+    'Дата': '01.03.2024',
+}
+
+
+def make_template(path, paragraphs, table_rows):
+    """Шаблон договора: пункты с плейсхолдерами, таблица реквизитов и колонтитул"""
+    doc = Document()
+    doc.sections[0].header.paragraphs[0].text = 'Договор № {{ Номер }} от {{ Дата }}'
+    for i in range(paragraphs):
+        paragraph = doc.add_paragraph(f'{i + 1}. ')
+        if i % 3 == 0:
+            # Плейсхолдер, разбитый на run'ы с разным форматированием
+            paragraph.add_run('{{ Полное_').bold = True
+            paragraph.add_run('наименование }}, в лице {{ Должность_р }} {{ ФИО_представителя_р }}')
+        else:
+            paragraph.add_run('Исполнитель обязуется оказать услуги в сроки, установленные настоящим договором.')
+    table = doc.add_table(rows=table_rows, cols=2)
+    for row_idx, row in enumerate(table.rows):
+        row.cells[0].text = f'Поле {row_idx}'
+        row.cells[1].text = '{{ ИНН }}' if row_idx % 2 else '{{ Адрес }}'
+    doc.save(path)
+
+
+def run_jobs(jobs, workers, renderer, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        results = render_contract_files(jobs, DATA, workers, renderer)
+        timings.append((time.perf_counter() - started) * 1000)
+        errors = [error for _, _, error in results if error is not None]
+        if errors:
+            raise errors[0]
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Последовательная и параллельная генерация комплекта договоров')
+    parser.add_argument('--templates', type=int, default=12, help='файлов в комплекте')
+    parser.add_argument('--paragraphs', type=int, default=400)
+    parser.add_argument('--table-rows', type=int, default=60)
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--min-speedup', type=float, default=1.5,
+                        help='минимальное ускорение python-docx в пуле относительно последовательной генерации')
+    args = parser.parse_args(argv)
+
+    cpu_count = os.cpu_count() or 1
+    if args.workers < 2 or cpu_count < 2:
+        print(f"❌ Ускорение не измерить: процессов {args.workers}, процессоров {cpu_count} (нужно не меньше 2)")
+        return False
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        jobs = []
+        for i in range(args.templates):
+            template_path = os.path.join(temp_dir, f'template_{i:02d}.docx')
+            make_template(template_path, args.paragraphs, args.table_rows)
+            jobs.append((template_path, compile_template_index(template_path)))
+
+        print(f"📄 Комплект: {args.templates} файлов, {args.paragraphs} параграфов и "
+              f"{args.table_rows} строк таблицы в каждом; процессов {args.workers} "
+              f"(процессоров {cpu_count})")
+
+        # Запуск процессов пула - один раз на приложение, в замеры не входит
+        started = time.perf_counter()
+        get_render_pool(args.workers)
+        render_contract_files(jobs[:args.workers], DATA, args.workers, 'python-docx')
+        print(f"   запуск пула: {(time.perf_counter() - started) * 1000:.0f} мс")
+
+        # Потоковая обработка XML в пул не отправляется - для сравнения
+        xml = run_jobs(jobs, 1, 'xml', args.runs)
+        sequential = run_jobs(jobs, 1, 'python-docx', args.runs)
+        parallel = run_jobs(jobs, args.workers, 'python-docx', args.runs)
+
+    speedup = sequential / parallel
+    print(f"   xml          последовательно {xml:7.0f} мс (без пула)")
+    print(f"   python-docx  последовательно {sequential:7.0f} мс, в пуле {parallel:7.0f} мс (x{speedup:.2f})")
+
+    ok = speedup >= args.min_speedup
+    print(f"✅ Пул ускоряет генерацию через python-docx в {speedup:.2f} раза" if ok
+          else f"❌ Ускорение x{speedup:.2f} меньше x{args.min_speedup:.2f}")
+    return ok
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -57,4 +57,26 @@ class TemplateFile(db.Model):
     template_id = db.Column(db.Integer, db.ForeignKey('contract_templates.id'), nullable=False)
     filename = db.Column(db.String(200), nullable=False)
     original_filename = db.Column(db.String(200), nullable=False)
-    uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Индекс плейсхолдеров, собранный при загрузке
+    index = db.relationship('TemplateFileIndex', backref='template_file', uselist=False,
+                            cascade='all, delete-orphan')
+
+
+class TemplateFileIndex(db.Model):
+    """
+    Скомпилированный индекс файла шаблона: в каких параграфах, ячейках
+    таблиц, заголовках и футерах есть плейсхолдеры (JSON, см. utils.compile_template_index).
+    Размер и время изменения файла нужны, чтобы заметить устаревший индекс.
+    """
+    __tablename__ = 'template_file_indexes'
+
+    id = db.Column(db.Integer, primary_key=True)
+    template_file_id = db.Column(db.Integer, db.ForeignKey('template_files.id'), nullable=False, unique=True)
+    version = db.Column(db.Integer, nullable=False)
+    file_size = db.Column(db.Integer, nullable=False)
+    file_mtime = db.Column(db.Float, nullable=False)
+    locations = db.Column(db.Text, nullable=False)
+    placeholders = db.Column(db.Text)
+    compiled_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
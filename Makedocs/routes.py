@@ -1,25 +1,92 @@
-from flask import render_template, request, redirect, url_for, flash, send_file, jsonify
+from flask import render_template, request, redirect, url_for, flash, send_file, jsonify, current_app, Response
 from werkzeug.utils import secure_filename
+import json
 import os
-import zipfile
-import tempfile
 import time
 import random
+import unicodedata
+from urllib.parse import quote
 from datetime import datetime
 
-from models import db, Client, Organization, ContractTemplate, TemplateFile
+from models import db, Client, Organization, ContractTemplate, TemplateFile, TemplateFileIndex
 from utils import (
     normalize_url, clean_filename,
     should_include_template_name, create_simple_output_filename,
     ensure_unique_filename,
     enhanced_process_docx_template,
     process_docx_template_safe,
+    render_contract_files, iter_zip_stream,
+    compile_template_index, index_placeholders, TEMPLATE_INDEX_VERSION,
     create_output_filename_with_client_prefix,
     preserve_original_filename_with_prefix,
     smart_filename_generation
 )
 
 
+def build_template_index(template_file, template_path):
+    """Компиляция индекса плейсхолдеров файла шаблона и запись рядом с TemplateFile"""
+    stat = os.stat(template_path)
+    index = compile_template_index(template_path)
+
+    record = template_file.index or TemplateFileIndex(template_file=template_file)
+    record.version = index['version']
+    record.file_size = stat.st_size
+    record.file_mtime = stat.st_mtime
+    record.locations = json.dumps(index, ensure_ascii=False)
+    record.placeholders = ', '.join(index_placeholders(index))
+    record.compiled_at = datetime.utcnow()
+    db.session.add(record)
+    return index
+
+
+def get_template_index(template_file, template_path):
+    """
+    Индекс плейсхолдеров для генерации. Если индекса нет (шаблон загружен
+    раньше) или файл изменился после компиляции - компилируется заново.
+    """
+    record = template_file.index
+    if record is not None and record.version == TEMPLATE_INDEX_VERSION:
+        stat = os.stat(template_path)
+        if record.file_size == stat.st_size and record.file_mtime == stat.st_mtime:
+            return json.loads(record.locations)
+
+    try:
+        index = build_template_index(template_file, template_path)
+        db.session.commit()
+        return index
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.warning(f"⚠️ Не удалось построить индекс для {template_file.original_filename}: {e}")
+        return None
+
+
+def attachment_filename(filename):
+    """Параметры Content-Disposition для имени файла с кириллицей (как в send_file)"""
+    try:
+        filename.encode('ascii')
+        return {'filename': filename}
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', filename).encode('ascii', 'ignore').decode('ascii')
+        quoted = quote(filename, safe="!#$&+-.^_`|~")
+        return {'filename': simple, 'filename*': f"UTF-8''{quoted}"}
+
+
+def keep_archive_copy(chunks, archive_path):
+    """Копия отправляемого архива в OUTPUT_FOLDER (при KEEP_GENERATED_ARCHIVES)"""
+    tmp_path = f'{archive_path}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                yield chunk
+    except BaseException:
+        # Оборванная отправка копию не оставляет
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, archive_path)
+
+
 def register_routes(app):
     @app.route('/')
     def index():
@@ -228,6 +295,13 @@ def register_routes(app):
                 )
                 db.session.add(template_file)
 
+                # Индекс плейсхолдеров: при генерации обходятся только найденные места.
+                # Если файл не разобрался - индекс построится при первой генерации
+                try:
+                    build_template_index(template_file, filepath)
+                except Exception as e:
+                    app.logger.warning(f"⚠️ Не удалось построить индекс для {filename}: {e}")
+
                 # Небольшая задержка для гарантии разных timestamp'ов
                 time.sleep(0.01)
 
@@ -310,77 +384,83 @@ def register_routes(app):
             'Дата': datetime.now().strftime('%d.%m.%Y')
         }
 
-        # Создание временной папки для файлов
-        with tempfile.TemporaryDirectory() as temp_dir:
-            generated_files = []
-            used_filenames = set()
+        generated_files = []
+        used_filenames = set()
 
-            # Подготавливаем очищенное имя клиента для архива
-            client_short = client.short_name or client.full_name
-            clean_client_name = clean_filename(client_short)
+        # Подготавливаем очищенное имя клиента для архива
+        client_short = client.short_name or client.full_name
+        clean_client_name = clean_filename(client_short)
 
-            # Базовая временная метка для архива (одна для всех)
-            archive_timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        # Базовая временная метка для архива (одна для всех)
+        archive_timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
 
-            for template_idx, template in enumerate(templates):
-                if not template.files:
-                    continue
+        # Сначала раскладываем файлы и имена в порядке шаблонов, затем генерируем
+        jobs = []
+        for template_idx, template in enumerate(templates):
+            if not template.files:
+                continue
 
-                for file_idx, template_file in enumerate(template.files):
-                    template_path = os.path.join(app.config['UPLOAD_FOLDER'], template_file.filename)
+            for file_idx, template_file in enumerate(template.files):
+                template_path = os.path.join(app.config['UPLOAD_FOLDER'], template_file.filename)
 
-                    if not os.path.exists(template_path):
-                        flash(f'Файл шаблона не найден: {template_file.original_filename}', 'error')
-                        continue
-
-                    # Сохраняем оригинальное имя файла
-                    output_filename = preserve_original_filename_with_prefix(
-                        original_filename=template_file.original_filename,
-                        client_name=clean_client_name,
-                        template_name=template.name,
-                        add_template=(len(templates) > 1)
-                    )
-
-                    # Обеспечиваем уникальность
-                    final_filename = ensure_unique_filename(output_filename, used_filenames)
-                    used_filenames.add(final_filename)
-                    output_path = os.path.join(temp_dir, final_filename)
-
-                    try:
-                        # Используем улучшенную версию обработки
-                        process_docx_template_safe(template_path, output_path, data)
-
-                        # Проверяем, что файл действительно создан
-                        if os.path.exists(output_path):
-                            generated_files.append(output_path)
-                        else:
-                            flash(f'Не удалось создать файл для {template_file.original_filename}', 'error')
+                if not os.path.exists(template_path):
+                    flash(f'Файл шаблона не найден: {template_file.original_filename}', 'error')
+                    continue
 
-                    except Exception as e:
-                        flash(
-                            f'Ошибка при обработке файла {template_file.original_filename} из шаблона {template.name}: {str(e)}',
-                            'error')
-                        continue
+                # Сохраняем оригинальное имя файла
+                output_filename = preserve_original_filename_with_prefix(
+                    original_filename=template_file.original_filename,
+                    client_name=clean_client_name,
+                    template_name=template.name,
+                    add_template=(len(templates) > 1)
+                )
 
-            if generated_files:
-                # Создание архива с базовой временной меткой
-                archive_name = f"contracts_{clean_client_name}_{archive_timestamp}.zip"
-                archive_path = os.path.join(app.config['OUTPUT_FOLDER'], archive_name)
+                # Обеспечиваем уникальность
+                final_filename = ensure_unique_filename(output_filename, used_filenames)
+                used_filenames.add(final_filename)
+
+                # Замены только в местах из индекса плейсхолдеров шаблона
+                index = get_template_index(template_file, template_path)
+                jobs.append((template, template_file, template_path, final_filename, index))
+
+        # Файлы генерируются в памяти параллельно в пуле процессов, результаты - в порядке jobs
+        results = render_contract_files(
+            [(template_path, index) for _, _, template_path, _, index in jobs],
+            data,
+            max_workers=app.config.get('RENDER_WORKERS', 1),
+            renderer=app.config.get('DOCX_RENDERER', 'xml')
+        )
+
+        for (template, template_file, _, final_filename, _), (content, unknown, error) in zip(jobs, results):
+            if error is not None:
+                flash(
+                    f'Ошибка при обработке файла {template_file.original_filename} из шаблона {template.name}: {str(error)}',
+                    'error')
+                continue
+
+            if unknown:
+                flash(f'В файле {template_file.original_filename} неизвестные плейсхолдеры: '
+                      f'{", ".join(unknown)}', 'warning')
+
+            # Проверяем, что файл действительно создан
+            if content:
+                generated_files.append((final_filename, content))
+            else:
+                flash(f'Не удалось создать файл для {template_file.original_filename}', 'error')
 
-                try:
-                    with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                        for file_path in generated_files:
-                            file_name = os.path.basename(file_path)
-                            zipf.write(file_path, file_name)
+        if not generated_files:
+            flash('Не удалось создать ни одного договора. Проверьте шаблоны и данные.', 'error')
+            return redirect(url_for('contracts'))
 
-                    return send_file(archive_path, as_attachment=True, download_name=archive_name)
+        # Архив собирается при отправке и уходит клиенту частями, без временных файлов
+        archive_name = f"contracts_{clean_client_name}_{archive_timestamp}.zip"
+        stream = iter_zip_stream(generated_files)
+        if app.config.get('KEEP_GENERATED_ARCHIVES', False):
+            stream = keep_archive_copy(stream, os.path.join(app.config['OUTPUT_FOLDER'], archive_name))
 
-                except Exception as e:
-                    flash(f'Ошибка при создании архива: {str(e)}', 'error')
-                    return redirect(url_for('contracts'))
-            else:
-                flash('Не удалось создать ни одного договора. Проверьте шаблоны и данные.', 'error')
-                return redirect(url_for('contracts'))
+        response = Response(stream, mimetype='application/zip')
+        response.headers.set('Content-Disposition', 'attachment', **attachment_filename(archive_name))
+        return response
 
     @app.route('/cleanup/outputs')
     def cleanup_outputs():
@@ -1,19 +1,95 @@
+import io
+import multiprocessing
 import os
 import re
+import shutil
+import threading
+import time
 import uuid
+import zipfile
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from docx import Document
+from lxml import etree
 
 
-def replace_placeholders(text, data):
+# {{ ключ }} с любыми пробелами внутри скобок: {{Дата}}, {{ Дата }}, {{  Дата  }}
+PLACEHOLDER_PATTERN = re.compile(r'\{\{\s*([^{}]*?)\s*\}\}')
+
+
+def iter_placeholder_matches(text, data, unknown=None):
+    """
+    Один проход по тексту скомпилированным шаблоном: (начало, конец, значение)
+    для каждого плейсхолдера, ключ которого есть в data. Неизвестные ключи
+    добавляются в множество unknown, сам плейсхолдер остается в тексте.
+    """
+    if not text or '{{' not in text:
+        return
+    for match in PLACEHOLDER_PATTERN.finditer(text):
+        key = match.group(1)
+        if key in data:
+            yield match.start(), match.end(), str(data[key] or '')
+        elif key and unknown is not None:
+            unknown.add(key)
+
+
+def replace_placeholders(text, data, unknown=None):
     """Заменяет плейсхолдеры в тексте на данные"""
     if not text:
         return text
 
-    for key, value in data.items():
-        placeholder = '{{ ' + key + ' }}'
-        if placeholder in text:
-            text = text.replace(placeholder, str(value or ''))
-    return text
+    parts = []
+    position = 0
+    for start, end, value in iter_placeholder_matches(text, data, unknown):
+        parts.append(text[position:start])
+        parts.append(value)
+        position = end
+
+    if not parts:
+        return text
+    parts.append(text[position:])
+    return ''.join(parts)
+
+
+def replace_in_runs(texts, data, unknown=None):
+    """
+    Замена плейсхолдеров в тексте, разбитом на run'ы (или w:t): плейсхолдер
+    может начинаться в одном run'е и заканчиваться в другом. Значение
+    записывается в run, где начинается плейсхолдер, остальной текст остается
+    в своих run'ах - форматирование не теряется.
+
+    Возвращает новые тексты run'ов или None, если замен не было.
+    """
+    full_text = ''.join(texts)
+    matches = list(iter_placeholder_matches(full_text, data, unknown))
+    if not matches:
+        return None
+
+    # Начало каждого run'а в общем тексте
+    bounds = []
+    offset = 0
+    for text in texts:
+        bounds.append(offset)
+        offset += len(text)
+
+    new_texts = [[] for _ in texts]
+
+    def keep(span_start, span_end):
+        # Текст вне плейсхолдеров раскладывается обратно по своим run'ам
+        for run_idx, run_start in enumerate(bounds):
+            run_end = run_start + len(texts[run_idx])
+            if run_start < span_end and run_end > span_start:
+                new_texts[run_idx].append(full_text[max(span_start, run_start):min(span_end, run_end)])
+
+    position = 0
+    for start, end, value in matches:
+        keep(position, start)
+        new_texts[bisect_right(bounds, start) - 1].append(value)
+        position = end
+    keep(position, len(full_text))
+
+    return [''.join(parts) for parts in new_texts]
 
 
 def normalize_url(url):
@@ -313,7 +389,7 @@ def ensure_unique_filename(desired_filename, used_filenames):
     return f"{name_part}_{unique_id}{ext_part}"
 
 
-def advanced_replace_in_paragraph(paragraph, data):
+def advanced_replace_in_paragraph(paragraph, data, unknown=None):
     """
     Продвинутая замена плейсхолдеров в параграфе, которая правильно обрабатывает
     разбитые на несколько run'ов плейсхолдеры
@@ -321,39 +397,22 @@ def advanced_replace_in_paragraph(paragraph, data):
     if not paragraph or not hasattr(paragraph, 'runs'):
         return False
 
-    if not paragraph.runs:
-        return False
-
-    # Получаем весь текст параграфа
-    full_text = paragraph.text
-    if not full_text or '{{' not in full_text:
+    runs = paragraph.runs
+    if not runs:
         return False
 
-    # Заменяем плейсхолдеры в тексте
-    original_text = full_text
-    replacements_made = 0
-
-    for key, value in data.items():
-        placeholder = '{{ ' + key + ' }}'
-        if placeholder in full_text:
-            full_text = full_text.replace(placeholder, str(value or ''))
-            replacements_made += 1
+    texts = [run.text for run in runs]
+    new_texts = replace_in_runs(texts, data, unknown)
 
     # Если изменений не было
-    if full_text == original_text:
+    if new_texts is None:
         return False
 
-    # Теперь обновляем параграф
+    # Обновляем только измененные run'ы, их форматирование сохраняется
     try:
-        # Очищаем все существующие run'ы
-        for run in paragraph.runs:
-            run.text = ""
-
-        # Добавляем новый текст в первый run, сохраняя его форматирование
-        if paragraph.runs:
-            paragraph.runs[0].text = full_text
-        else:
-            paragraph.add_run(full_text)
+        for run, text, new_text in zip(runs, texts, new_texts):
+            if new_text != text:
+                run.text = new_text
 
         return True
 
@@ -361,7 +420,23 @@ def advanced_replace_in_paragraph(paragraph, data):
         return False
 
 
-def process_table_with_merged_cells(table, data):
+def replace_in_cell(cell, data, unknown=None):
+    """Замена плейсхолдеров в ячейке таблицы; возвращает число замен"""
+    # Обрабатываем все параграфы в ячейке
+    cell_replacements = 0
+    for paragraph in cell.paragraphs:
+        if advanced_replace_in_paragraph(paragraph, data, unknown):
+            cell_replacements += 1
+
+    if cell_replacements == 0:
+        # Попробуем альтернативный метод для проблемных ячеек
+        if try_alternative_cell_replacement(cell, data, unknown):
+            cell_replacements += 1
+
+    return cell_replacements
+
+
+def process_table_with_merged_cells(table, data, unknown=None):
     """
     Улучшенная обработка таблиц с учётом объединённых ячеек
     """
@@ -375,17 +450,7 @@ def process_table_with_merged_cells(table, data):
                     cell_text = cell.text
 
                     if '{{' in cell_text:
-                        # Обрабатываем все параграфы в ячейке
-                        cell_replacements = 0
-                        for para_idx, paragraph in enumerate(cell.paragraphs):
-                            if advanced_replace_in_paragraph(paragraph, data):
-                                cell_replacements += 1
-                                replacements_made += 1
-
-                        if cell_replacements == 0:
-                            # Попробуем альтернативный метод для проблемных ячеек
-                            if try_alternative_cell_replacement(cell, data):
-                                replacements_made += 1
+                        replacements_made += replace_in_cell(cell, data, unknown)
 
                 except Exception as e:
                     continue
@@ -396,7 +461,7 @@ def process_table_with_merged_cells(table, data):
     return replacements_made
 
 
-def try_alternative_cell_replacement(cell, data):
+def try_alternative_cell_replacement(cell, data, unknown=None):
     """
     Альтернативный метод замены для проблемных ячеек
     """
@@ -408,11 +473,7 @@ def try_alternative_cell_replacement(cell, data):
             return False
 
         # Выполняем замены
-        modified_text = cell_text
-        for key, value in data.items():
-            placeholder = '{{ ' + key + ' }}'
-            if placeholder in modified_text:
-                modified_text = modified_text.replace(placeholder, str(value or ''))
+        modified_text = replace_placeholders(cell_text, data, unknown)
 
         # Если изменений не было
         if modified_text == cell_text:
@@ -429,7 +490,7 @@ def try_alternative_cell_replacement(cell, data):
         return False
 
 
-def enhanced_process_docx_template(template_path, output_path, data):
+def enhanced_process_docx_template(template_path, output_path, data, unknown=None):
     """
     Улучшенная версия обработки DOCX с продвинутой заменой плейсхолдеров
     """
@@ -441,14 +502,14 @@ def enhanced_process_docx_template(template_path, output_path, data):
         # Обработка основного текста с улучшенным алгоритмом
         for i, paragraph in enumerate(doc.paragraphs):
             try:
-                if advanced_replace_in_paragraph(paragraph, data):
+                if advanced_replace_in_paragraph(paragraph, data, unknown):
                     replacements_made += 1
             except Exception as e:
                 continue
 
         # Улучшенная обработка таблиц
         for table_idx, table in enumerate(doc.tables):
-            table_replacements = process_table_with_merged_cells(table, data)
+            table_replacements = process_table_with_merged_cells(table, data, unknown)
             replacements_made += table_replacements
 
         # Обработка заголовков и футеров
@@ -458,7 +519,7 @@ def enhanced_process_docx_template(template_path, output_path, data):
                 if hasattr(section, 'header') and section.header:
                     for para_idx, paragraph in enumerate(section.header.paragraphs):
                         try:
-                            if advanced_replace_in_paragraph(paragraph, data):
+                            if advanced_replace_in_paragraph(paragraph, data, unknown):
                                 replacements_made += 1
                         except Exception as e:
                             continue
@@ -467,7 +528,7 @@ def enhanced_process_docx_template(template_path, output_path, data):
                 if hasattr(section, 'footer') and section.footer:
                     for para_idx, paragraph in enumerate(section.footer.paragraphs):
                         try:
-                            if advanced_replace_in_paragraph(paragraph, data):
+                            if advanced_replace_in_paragraph(paragraph, data, unknown):
                                 replacements_made += 1
                         except Exception as e:
                             continue
@@ -483,8 +544,404 @@ def enhanced_process_docx_template(template_path, output_path, data):
         raise e
 
 
-def process_docx_template_safe(template_path, output_path, data):
+def copy_template(template_path, output):
+    """Копия шаблона без изменений в файл по пути или в файловый объект"""
+    if isinstance(output, (str, os.PathLike)):
+        shutil.copyfile(template_path, output)
+    else:
+        with open(template_path, 'rb') as source:
+            shutil.copyfileobj(source, output)
+
+
+# ===== ИНДЕКС ПЛЕЙСХОЛДЕРОВ =====
+
+TEMPLATE_INDEX_VERSION = 2
+
+
+def find_placeholders(text):
+    """Имена плейсхолдеров {{ ключ }} в тексте"""
+    if not text or '{{' not in text:
+        return []
+    return sorted(set(key for key in PLACEHOLDER_PATTERN.findall(text) if key))
+
+
+def compile_template_index(template_path):
+    """
+    Индекс шаблона: адреса мест, где есть плейсхолдеры, и их имена.
+
+    body    - [номер параграфа, [ключи]]
+    tables  - [номер таблицы, строка, ячейка, [ключи]] (объединённая ячейка - один раз)
+    headers - [номер секции, номер параграфа, [ключи]], так же footers
+    parts   - XML-части пакета с плейсхолдерами (для render_docx_xml)
+
+    Адреса совпадают с порядком обхода в enhanced_process_docx_template,
+    поэтому при генерации открываются только эти места.
+    """
+    doc = Document(template_path)
+    index = {'version': TEMPLATE_INDEX_VERSION, 'body': [], 'tables': [], 'headers': [], 'footers': [],
+             'parts': docx_placeholder_parts(template_path)}
+
+    for paragraph_idx, paragraph in enumerate(doc.paragraphs):
+        text = paragraph.text
+        if '{{' in text:
+            index['body'].append([paragraph_idx, find_placeholders(text)])
+
+    for table_idx, table in enumerate(doc.tables):
+        seen_cells = set()
+        for row_idx, row in enumerate(table.rows):
+            for cell_idx, cell in enumerate(row.cells):
+                # Объединённая ячейка повторяется в row.cells - заменяем её один раз
+                if cell._tc in seen_cells:
+                    continue
+                seen_cells.add(cell._tc)
+                text = cell.text
+                if '{{' in text:
+                    index['tables'].append([table_idx, row_idx, cell_idx, find_placeholders(text)])
+
+    for section_idx, section in enumerate(doc.sections):
+        for part in ('header', 'footer'):
+            for paragraph_idx, paragraph in enumerate(getattr(section, part).paragraphs):
+                text = paragraph.text
+                if '{{' in text:
+                    index[part + 's'].append([section_idx, paragraph_idx, find_placeholders(text)])
+
+    return index
+
+
+def index_placeholders(index):
+    """Все имена плейсхолдеров шаблона по индексу"""
+    names = set()
+    for part in ('body', 'tables', 'headers', 'footers'):
+        for location in index[part]:
+            names.update(location[-1])
+    return sorted(names)
+
+
+def render_indexed_template(template_path, output_path, data, index, unknown=None):
+    """
+    Генерация по индексу: замены только в местах из индекса, без обхода
+    всего документа. Шаблон без плейсхолдеров копируется как есть.
+    """
+    if not any(index[part] for part in ('body', 'tables', 'headers', 'footers')):
+        copy_template(template_path, output_path)
+        return True
+
+    doc = Document(template_path)
+
+    if index['body']:
+        paragraphs = doc.paragraphs
+        for paragraph_idx, _ in index['body']:
+            advanced_replace_in_paragraph(paragraphs[paragraph_idx], data, unknown)
+
+    if index['tables']:
+        tables = doc.tables
+        for table_idx, row_idx, cell_idx, _ in index['tables']:
+            replace_in_cell(tables[table_idx].rows[row_idx].cells[cell_idx], data, unknown)
+
+    if index['headers'] or index['footers']:
+        sections = doc.sections
+        for part in ('header', 'footer'):
+            for section_idx, paragraph_idx, _ in index[part + 's']:
+                advanced_replace_in_paragraph(getattr(sections[section_idx], part).paragraphs[paragraph_idx], data,
+                                              unknown)
+
+    doc.save(output_path)
+    return True
+
+
+# ===== ПОТОКОВАЯ ОБРАБОТКА XML =====
+
+WORD_NAMESPACE = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+W_P = f'{{{WORD_NAMESPACE}}}p'
+W_T = f'{{{WORD_NAMESPACE}}}t'
+XML_SPACE = '{http://www.w3.org/XML/1998/namespace}space'
+
+# Шаблоны загружают пользователи: внешние сущности и сеть при разборе
+# отключены, как в парсере python-docx
+XML_PARSER = etree.XMLParser(resolve_entities=False, no_network=True)
+
+# Части пакета с текстом документа; надписи (w:txbxContent) лежат внутри них
+TEXT_PART_PATTERN = re.compile(r'^word/(document|header\d*|footer\d*|footnotes|endnotes)\.xml$')
+
+# Уже сжатые форматы: повторное сжатие deflate почти ничего не дает, а время занимает
+STORED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+
+
+def iter_xml_paragraphs(root):
+    """
+    Один проход по всем w:t части: (параграф, [его w:t]) в порядке документа.
+    Текст вложенного параграфа (надпись внутри run'а) относится к вложенному
+    параграфу, а не к внешнему.
+    """
+    paragraphs = {}
+    for text_node in root.iter(W_T):
+        paragraph = next(text_node.iterancestors(W_P), None)
+        if paragraph is not None:
+            paragraphs.setdefault(paragraph, []).append(text_node)
+    return paragraphs.items()
+
+
+def replace_in_xml_part(xml_bytes, data, unknown=None):
+    """
+    Замена плейсхолдеров в XML-части: тексты w:t каждого параграфа
+    обрабатываются replace_in_runs, так что форматирование run'ов, а также
+    w:tab, w:br, рисунки и поля параграфа сохраняются. Возвращает новые
+    байты или None, если замен не было.
+    """
+    root = etree.fromstring(xml_bytes, XML_PARSER)
+    changed = False
+
+    for paragraph, text_nodes in iter_xml_paragraphs(root):
+        texts = [node.text or '' for node in text_nodes]
+        new_texts = replace_in_runs(texts, data, unknown)
+        if new_texts is None:
+            continue
+
+        for node, text, new_text in zip(text_nodes, texts, new_texts):
+            if new_text != text:
+                node.text = new_text
+                node.set(XML_SPACE, 'preserve')
+        changed = True
+
+    if not changed:
+        return None
+    return etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+
+
+def docx_placeholder_parts(template_path):
+    """Имена XML-частей шаблона, в параграфах которых есть плейсхолдеры"""
+    parts = []
+    with zipfile.ZipFile(template_path) as source:
+        for name in source.namelist():
+            if not TEXT_PART_PATTERN.match(name):
+                continue
+            xml_bytes = source.read(name)
+            # '{{' может быть разбит на два run'а, поэтому ищем одну скобку
+            if b'{' not in xml_bytes:
+                continue
+            root = etree.fromstring(xml_bytes, XML_PARSER)
+            for _, text_nodes in iter_xml_paragraphs(root):
+                if '{{' in ''.join(node.text or '' for node in text_nodes):
+                    parts.append(name)
+                    break
+    return parts
+
+
+def _copy_zip_entry(source, target, info, data=None):
+    """
+    Запись элемента архива с исходными именем, датой, сжатием и атрибутами;
+    картинки в сжатых форматах записываются без повторного сжатия
+    """
+    new_info = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+    if info.filename.lower().endswith(STORED_EXTENSIONS):
+        new_info.compress_type = zipfile.ZIP_STORED
+    else:
+        new_info.compress_type = info.compress_type
+    new_info.external_attr = info.external_attr
+    if data is not None:
+        target.writestr(new_info, data)
+        return
+    with source.open(info) as src, target.open(new_info, 'w') as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+
+
+def render_docx_xml(template_path, output_path, data, parts=None, unknown=None):
+    """
+    Генерация без объектной модели python-docx: элементы архива шаблона
+    читаются по одному, картинки, стили и настройки копируются как есть,
+    переписываются только document.xml, заголовки, футеры, сноски и надписи.
+
+    parts - части с плейсхолдерами из индекса шаблона; без индекса
+    разбираются все текстовые части, в которых встречается '{'.
+    """
+    if parts is not None and not parts:
+        copy_template(template_path, output_path)
+        return True
+
+    with zipfile.ZipFile(template_path) as source, \
+            zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as target:
+        for info in source.infolist():
+            new_data = None
+            if parts is None:
+                rewrite = TEXT_PART_PATTERN.match(info.filename) is not None
+            else:
+                rewrite = info.filename in parts
+            if rewrite:
+                xml_bytes = source.read(info)
+                if b'{' in xml_bytes:
+                    new_data = replace_in_xml_part(xml_bytes, data, unknown)
+                if new_data is None:
+                    new_data = xml_bytes
+            _copy_zip_entry(source, target, info, new_data)
+
+    return True
+
+
+def process_docx_template_safe(template_path, output_path, data, index=None, renderer='xml', unknown=None):
+    """
+    Обертка для обратной совместимости. output_path - путь или файловый
+    объект (io.BytesIO), в который записывается документ.
+
+    renderer='xml' - потоковая замена в XML-частях (render_docx_xml),
+    'python-docx' - через объектную модель: по индексу плейсхолдеров,
+    если он есть, иначе улучшенная версия с обходом всего документа.
+    Ключи плейсхолдеров, которых нет в data, добавляются в множество unknown.
+    """
+    if index is not None and index.get('version') != TEMPLATE_INDEX_VERSION:
+        index = None
+
+    if renderer == 'xml':
+        try:
+            return render_docx_xml(template_path, output_path, data, index['parts'] if index else None,
+                                   unknown)
+        except (zipfile.BadZipFile, KeyError, etree.XMLSyntaxError):
+            # Нестандартный пакет - пробуем через python-docx
+            if not isinstance(output_path, (str, os.PathLike)):
+                output_path.seek(0)
+                output_path.truncate()
+
+    if index is not None:
+        try:
+            return render_indexed_template(template_path, output_path, data, index, unknown)
+        except IndexError:
+            # Индекс не соответствует файлу - обходим документ целиком
+            pass
+    return enhanced_process_docx_template(template_path, output_path, data, unknown)
+
+
+# ===== ПАРАЛЛЕЛЬНАЯ ГЕНЕРАЦИЯ =====
+
+# Общий пул процессов: обработка через python-docx упирается в процессор и GIL,
+# поэтому файлы комплекта генерируются в отдельных процессах. Потоковой
+# обработке XML (~10 мс на файл) пул только мешает: передача файлов между
+# процессами дороже самой генерации
+POOL_RENDERERS = ('python-docx',)
+_render_pool = None
+_render_pool_workers = 0
+_render_pool_lock = threading.Lock()
+
+
+def render_contract_file(template_path, data, index=None, renderer='xml'):
+    """
+    Генерация одного файла в памяти (в процессе пула):
+    (байты документа, неизвестные плейсхолдеры)
+    """
+    output = io.BytesIO()
+    unknown = set()
+    process_docx_template_safe(template_path, output, data, index, renderer, unknown)
+    return output.getvalue(), sorted(unknown)
+
+
+def get_render_pool(max_workers):
+    """Пул процессов генерации, создается при первом обращении"""
+    global _render_pool, _render_pool_workers
+    with _render_pool_lock:
+        if _render_pool is None or _render_pool_workers != max_workers:
+            if _render_pool is not None:
+                _render_pool.shutdown(wait=False)
+            # spawn: пул запускается из многопоточного сервера, fork копировал бы его блокировки
+            _render_pool = ProcessPoolExecutor(max_workers=max_workers,
+                                               mp_context=multiprocessing.get_context('spawn'))
+            _render_pool_workers = max_workers
+        return _render_pool
+
+
+def reset_render_pool():
+    """Сброс пула после падения процесса: следующий запрос создаст новый"""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown(wait=False)
+        _render_pool = None
+
+
+def render_contract_files(jobs, data, max_workers=1, renderer='xml'):
+    """
+    Генерация файлов комплекта. jobs - [(путь шаблона, индекс)].
+
+    Результаты возвращаются в порядке jobs, независимо от того, какой файл
+    был готов раньше: [(байты, неизвестные плейсхолдеры, None) или
+    (None, None, исключение)]. Пул используется только для обработчиков
+    из POOL_RENDERERS, при max_workers > 1 и больше чем одном файле.
+    """
+    if max_workers <= 1 or len(jobs) <= 1 or renderer not in POOL_RENDERERS:
+        results = []
+        for template_path, index in jobs:
+            try:
+                results.append((*render_contract_file(template_path, data, index, renderer), None))
+            except Exception as e:
+                results.append((None, None, e))
+        return results
+
+    try:
+        pool = get_render_pool(max_workers)
+        futures = [pool.submit(render_contract_file, template_path, data, index, renderer)
+                   for template_path, index in jobs]
+    except BrokenProcessPool:
+        # Пул сломан предыдущим запросом - генерируем в текущем процессе
+        reset_render_pool()
+        return render_contract_files(jobs, data, 1, renderer)
+
+    results = []
+    for future in futures:
+        try:
+            results.append((*future.result(), None))
+        except BrokenProcessPool as e:
+            reset_render_pool()
+            results.append((None, None, e))
+        except Exception as e:
+            results.append((None, None, e))
+    return results
+
+
+# ===== ПОТОКОВЫЙ ZIP =====
+
+class ZipStreamBuffer:
+    """
+    Файл для zipfile.ZipFile, из которого готовые части архива забираются
+    по мере записи. zipfile возвращается назад только к заголовку текущего
+    элемента, поэтому после take() в памяти остается не больше одного файла.
+    """
+
+    def __init__(self):
+        self._buffer = io.BytesIO()
+        self._offset = 0
+
+    def write(self, data):
+        return self._buffer.write(data)
+
+    def tell(self):
+        return self._offset + self._buffer.tell()
+
+    def seek(self, position, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position -= self._offset
+        self._buffer.seek(position, whence)
+        return self.tell()
+
+    def flush(self):
+        pass
+
+    def take(self):
+        """Записанные с прошлого вызова байты архива"""
+        data = self._buffer.getvalue()
+        self._offset += len(data)
+        self._buffer = io.BytesIO()
+        return data
+
+
+def iter_zip_stream(entries, compress_type=zipfile.ZIP_STORED):
     """
-    Обертка для обратной совместимости - использует улучшенную версию
+    ZIP-архив из (имя, байты) частями по мере записи. DOCX уже сжат deflate,
+    поэтому по умолчанию файлы кладутся в архив без повторного сжатия.
     """
-    return enhanced_process_docx_template(template_path, output_path, data)
\ No newline at end of file
+    buffer = ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', compress_type) as archive:
+        for name, content in entries:
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            info.compress_type = compress_type
+            info.external_attr = 0o644 << 16
+            archive.writestr(info, content)
+            yield buffer.take()
+    # Центральный каталог архива
+    yield buffer.take()